@@ -26,7 +26,7 @@ SECRET_KEY = config('SECRET_KEY', default='django-insecure-dev-placeholder')
 
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = config('DEBUG', default=True, cast=bool)
 
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', 'testserver']
 
@@ -39,6 +39,8 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    # Serve static files through WhiteNoise under runserver too
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     # 'django.contrib.sites',
     'home',
@@ -47,7 +49,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'home.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'home.query_budget.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -88,9 +93,35 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default=''),
         'HOST': config('DB_HOST', default='db'),
         'PORT': config('DB_PORT', default='5432'),
+        # Keep connections open between requests so the one each app-server
+        # worker opens during warmup is reused (ignored when pooling)
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# psycopg3 connection pool. Each worker process has its own pool, so
+# DB_POOL_MAX_SIZE × workers must stay below Postgres' max_connections.
+# With CONN_HEALTH_CHECKS, Django has the pool check connections on checkout.
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:  # psycopg-pool not installed
+    ConnectionPool = None
+
+DB_POOL = config('DB_POOL', default=ConnectionPool is not None, cast=bool)
+if DB_POOL:
+    # Django returns pooled connections after each request instead
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            'max_idle': config('DB_POOL_MAX_IDLE', default=600, cast=float),
+            'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=3600, cast=float),
+        },
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -130,14 +161,40 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-# Media files
+# `collectstatic` writes content-hashed copies plus .gz/.br variants, which
+# WhiteNoise serves with far-future immutable caching. The manifest only
+# exists after collectstatic, so it is off by default while DEBUG is on.
+STATIC_MANIFEST = config('STATIC_MANIFEST', default=not DEBUG, cast=bool)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'home.storage.HashedStaticFilesStorage' if STATIC_MANIFEST
+        else 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Media files; served by home.views.serve_media unless SERVE_MEDIA is off
+# because a front-end web server serves MEDIA_ROOT itself
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+SERVE_MEDIA = config('SERVE_MEDIA', default=True, cast=bool)
+
+
+# Profile image optimization runs in a bounded process pool after the upload
+# is committed; set IMAGE_PROCESSING_ASYNC=False to process inline instead.
+# Jobs unfinished after IMAGE_PROCESSING_TIMEOUT seconds are scheduled again
+IMAGE_PROCESSING_ASYNC = config('IMAGE_PROCESSING_ASYNC', default=True, cast=bool)
+IMAGE_PROCESSING_WORKERS = config('IMAGE_PROCESSING_WORKERS', default=2, cast=int)
+IMAGE_PROCESSING_TIMEOUT = config('IMAGE_PROCESSING_TIMEOUT', default=300, cast=int)
 
 
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PAGINATION_CLASS': 'home.pagination.KeysetPagination',
+    'PAGE_SIZE': config('API_PAGE_SIZE', default=20, cast=int),
 }
 
 # API Documentation (drf-spectacular)
@@ -149,6 +206,63 @@ SPECTACULAR_SETTINGS = {
 }
 
 
+# Cache (LocMem by default, for a single process; docker-compose uses Redis).
+# Content versions, rate limits and duplicate claims must be shared between
+# worker processes, so gunicorn.conf.py refuses several workers on LocMem:
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   CACHE_LOCATION=redis://cache:6379/0
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='portfolio'),
+    }
+}
+
+# Public pages are cached until their content changes; this is an upper bound
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Requests running more queries than this, or spending longer in SQL, are
+# logged with their duplicate counts (see home/query_budget.py)
+QUERY_BUDGET = config('QUERY_BUDGET', default=10, cast=int)
+QUERY_BUDGET_MS = config('QUERY_BUDGET_MS', default=200, cast=int)
+
+# Contact submissions (home/ratelimit.py): each client IP and each email
+# address may send CONTACT_RATE_BURST messages per window of
+# CONTACT_RATE_BURST × CONTACT_RATE_PERIOD seconds, one per CONTACT_RATE_PERIOD
+# on average. Windows are fixed and aligned for every client, so a burst at
+# the end of one window and another at the start of the next lets through
+# 2 × CONTACT_RATE_BURST messages in a few seconds; size the burst with that
+# in mind. RATELIMIT_PROXY_COUNT is the number of trusted reverse proxies
+# whose X-Forwarded-For entries identify the client
+CONTACT_RATE_LIMIT = config('CONTACT_RATE_LIMIT', default=True, cast=bool)
+CONTACT_RATE_BURST = config('CONTACT_RATE_BURST', default=5, cast=int)
+CONTACT_RATE_PERIOD = config('CONTACT_RATE_PERIOD', default=600, cast=float)
+RATELIMIT_PROXY_COUNT = config('RATELIMIT_PROXY_COUNT', default=0, cast=int)
+
+# A contact message repeating one from the last this-many seconds (same name,
+# email and message) is acknowledged without being saved or emailed again;
+# 0 saves every submission
+CONTACT_DUPLICATE_WINDOW = config('CONTACT_DUPLICATE_WINDOW', default=600, cast=int)
+
+# Contact messages are kept for the current month plus this many months;
+# `archive_contact_messages` moves older months to CONTACT_ARCHIVE_DIR
+CONTACT_RETENTION_MONTHS = config('CONTACT_RETENTION_MONTHS', default=24, cast=int)
+CONTACT_ARCHIVE_DIR = config('CONTACT_ARCHIVE_DIR', default=str(BASE_DIR / 'archive'))
+
+# Prometheus metrics at /metrics (home/metrics.py). Gunicorn workers and the
+# mailer share their totals through files in METRICS_DIR. Readable by staff,
+# or by a scraper sending `Authorization: Bearer <METRICS_TOKEN>`
+METRICS_DIR = config('METRICS_DIR', default=str(BASE_DIR / 'metrics'))
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=1.0, cast=float)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Route the public pages and read-only API to the async views in
+# home/async_views.py under an ASGI server (Portfolio.asgi). Their queries
+# still run one at a time, and tools/benchmark_asgi.py measures them below
+# the sync views under WSGI, so this is off by default
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
+
 # Default primary key field type
 # DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -161,6 +275,13 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default="")
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default="")
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Email outbox (delivered by `manage.py process_outbox`)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+EMAIL_OUTBOX_RETRY_DELAY = config('EMAIL_OUTBOX_RETRY_DELAY', default=60, cast=int)  # seconds, doubled per attempt
+# Seconds a worker may take to send a claimed batch before another worker takes it over
+EMAIL_OUTBOX_LEASE = config('EMAIL_OUTBOX_LEASE', default=300, cast=int)
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
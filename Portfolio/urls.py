@@ -17,7 +17,6 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
 
 # urlpatterns = [
 #     path('admin/', admin.site.urls),
@@ -42,5 +41,11 @@ urlpatterns = [
     path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Uploads are served by Django in production too: WhiteNoise only serves
+# static files, and the image has no other web server. SERVE_MEDIA=False
+# leaves /media/ to a front-end server instead.
+if settings.SERVE_MEDIA:
+    from home.views import serve_media
+    urlpatterns += [
+        path(f'{settings.MEDIA_URL.lstrip("/")}<path:path>', serve_media, name='media'),
+    ]
@@ -0,0 +1,108 @@
+"""
+Gunicorn configuration for production.
+
+    gunicorn --config gunicorn.conf.py Portfolio.wsgi:application
+
+Every setting can be overridden from the environment (or .env) without
+editing this file.
+"""
+import os
+import sys
+
+from decouple import config
+
+
+def _cores():
+    # Respects CPU affinity (e.g. docker --cpuset-cpus), unlike os.cpu_count()
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = config('GUNICORN_BIND', default='0.0.0.0:8000')
+
+# Processes for CPU-bound work (templates, serializers, images); threads so a
+# worker keeps serving while a request waits on the database or SMTP
+workers = config('WEB_CONCURRENCY', default=_cores() * 2 + 1, cast=int)
+threads = config('GUNICORN_THREADS', default=4, cast=int)
+worker_class = config('GUNICORN_WORKER_CLASS', default='gthread')
+
+# Import Django, DRF, drf-spectacular and Pillow once in the master so the
+# workers share those pages copy-on-write instead of each loading its own
+preload_app = True
+
+# Recycle workers periodically to bound slow memory growth; the jitter
+# keeps them from all restarting at once
+max_requests = config('GUNICORN_MAX_REQUESTS', default=1000, cast=int)
+max_requests_jitter = config('GUNICORN_MAX_REQUESTS_JITTER', default=100, cast=int)
+
+timeout = config('GUNICORN_TIMEOUT', default=30, cast=int)
+graceful_timeout = config('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = config('GUNICORN_KEEPALIVE', default=5, cast=int)
+
+# Heartbeat files on tmpfs; a disk-backed /tmp in containers can stall workers
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = '-'
+errorlog = '-'
+loglevel = config('GUNICORN_LOG_LEVEL', default='info')
+
+
+def pre_fork(server, worker):
+    # A connection or pool opened while preloading would be shared by every
+    # worker; each worker opens its own instead
+    from django.db import connections
+    connections.close_all()
+    for connection in connections.all(initialized_only=True):
+        # Checking `connection.pool` would create the pool, so look for an open one
+        if connection.alias in getattr(connection, '_connection_pools', {}):
+            connection.close_pool()
+
+
+def post_fork(server, worker):
+    # Workers publish their metrics for /metrics to sum (home/metrics.py)
+    from home import metrics
+    metrics.share()
+
+    from home.warmup import warm_up
+    elapsed = warm_up()
+    worker.log.info(f'Worker {worker.pid} warmed up in {elapsed:.0f} ms')
+
+    # Image jobs lost with a recycled or crashed worker's pool
+    from django.db import DatabaseError
+    from home.image_tasks import requeue_stale_jobs
+    try:
+        requeue_stale_jobs()
+    except DatabaseError as e:
+        worker.log.warning(f'Could not requeue stale image jobs: {e}')
+
+
+def on_starting(server):
+    # Content versions, page cache, rate limits and duplicate claims live in
+    # the cache; a per-process one leaves every other worker out of date
+    from django.conf import settings
+    if server.cfg.workers > 1 and settings.CACHES['default']['BACKEND'].endswith('.LocMemCache'):
+        server.log.error(
+            f'Refusing to start {server.cfg.workers} workers with LocMemCache, which each worker '
+            'keeps separately. Set CACHE_BACKEND and CACHE_LOCATION to a shared cache '
+            '(e.g. Redis), or WEB_CONCURRENCY=1.'
+        )
+        sys.exit(1)
+
+    # Metric files of a previous run would otherwise be summed into this one
+    from home import metrics
+    metrics.reset()
+
+
+def worker_exit(server, worker):
+    from home import metrics
+    from home.image_tasks import shutdown_executor
+    shutdown_executor()
+    metrics.flush()
+
+
+def child_exit(server, worker):
+    # Keep the totals of recycled workers in /metrics without their files piling up
+    from home import metrics
+    metrics.mark_process_dead(worker.pid)
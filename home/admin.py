@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from .models import Profile, Education, Experience, Project, Blog, ContactMessage
+from .models import Profile, Education, Experience, Project, Blog, ContactMessage, OutboundEmail
 from .admin_forms import ProfileForm
+from . import search
 
 
 # ─── Site Branding ───────────────────────────────────────────────────────
@@ -15,8 +16,8 @@ admin.site.index_title = "Manage Your Content"
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     form = ProfileForm
-    fields = ('profile_picture', 'profile_preview', 'image_info', 'updated_at')
-    readonly_fields = ('profile_preview', 'image_info', 'updated_at')
+    fields = ('profile_picture', 'profile_preview', 'image_info', 'processing_state', 'updated_at')
+    readonly_fields = ('profile_preview', 'image_info', 'processing_state', 'updated_at')
 
     def profile_preview(self, obj):
         """Display image preview in admin"""
@@ -31,6 +32,10 @@ class ProfileAdmin(admin.ModelAdmin):
     def image_info(self, obj):
         """Display image optimization information"""
         if obj.profile_picture:
+            state = {
+                Profile.STATE_READY: '<span style="color: green;">✓ Optimized & Compressed</span>',
+                Profile.STATE_FAILED: '<span style="color: #c0392b;">✗ Optimization failed</span>',
+            }.get(obj.processing_state, '<span style="color: #e67e22;">⏳ Optimizing in background…</span>')
             info = f"""
             <div style="background-color: #f0f0f0; padding: 15px; border-radius: 5px; font-family: monospace;">
                 <strong>Image Information:</strong><br>
@@ -38,7 +43,7 @@ class ProfileAdmin(admin.ModelAdmin):
                 Dimensions: {obj.get_dimensions_display()}<br>
                 Updated: {obj.updated_at.strftime('%Y-%m-%d %H:%M:%S')}<br>
                 <br>
-                <span style="color: green;">✓ Optimized & Compressed</span>
+                {state}
             </div>
             """
             return format_html(info)
@@ -72,18 +77,30 @@ class ExperienceAdmin(admin.ModelAdmin):
     ordering = ('order',)
 
 
+class FullTextSearchMixin:
+    """Answer the changelist search box from the full-text index instead of icontains scans."""
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term:
+            matched = search.filter_queryset(queryset, search_term)
+            if matched is not None:
+                return matched, False
+        return super().get_search_results(request, queryset, search_term)
+
+
 # ─── Project ─────────────────────────────────────────────────────────────
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'tech_stack', 'github_link', 'order')
     list_editable = ('order',)
+    list_filter = ('tech_tags',)
     search_fields = ('title', 'tech_stack')
     ordering = ('order',)
 
 
 # ─── Blog ────────────────────────────────────────────────────────────────
 @admin.register(Blog)
-class BlogAdmin(admin.ModelAdmin):
+class BlogAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'created_at', 'is_published')
     list_filter = ('is_published', 'created_at')
     list_editable = ('is_published',)
@@ -108,4 +125,20 @@ class ContactMessageAdmin(admin.ModelAdmin):
         return False
 
     def has_change_permission(self, request, obj=None):
-        return False
\ No newline at end of file
+        return False
+
+
+# ─── Email Outbox (Read-only) ────────────────────────────────────────────
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipient', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('recipient', 'subject')
+    ordering = ('-created_at',)
+    readonly_fields = (
+        'contact', 'subject', 'body', 'html_body', 'from_email', 'recipient', 'status',
+        'attempts', 'next_attempt_at', 'last_error', 'created_at', 'sent_at',
+    )
+
+    def has_add_permission(self, request):
+        return False
@@ -47,10 +47,11 @@ class ProjectForm(forms.ModelForm):
 class BlogForm(forms.ModelForm):
     class Meta:
         model = Blog
-        fields = ['title', 'content', 'is_published']
+        fields = ['title', 'slug', 'content', 'is_published']
         widgets = {
             'title': forms.TextInput(attrs={'placeholder': 'Blog post title'}),
-            'content': forms.Textarea(attrs={'placeholder': 'Write your blog post content here...', 'rows': 10}),
+            'slug': forms.TextInput(attrs={'placeholder': 'Leave blank to generate from the title'}),
+            'content': forms.Textarea(attrs={'placeholder': 'Write your blog post in Markdown...', 'rows': 10}),
         }
 
 
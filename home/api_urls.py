@@ -1,11 +1,26 @@
+from django.conf import settings
 from django.urls import path
-from . import api_views
+from . import api_views, async_views
 
-urlpatterns = [
-    path('profile/', api_views.ProfileRetrieveAPI.as_view(), name='api-profile'),
-    path('projects/', api_views.ProjectListAPI.as_view(), name='api-projects'),
-    path('experiences/', api_views.ExperienceListAPI.as_view(), name='api-experiences'),
-    path('educations/', api_views.EducationListAPI.as_view(), name='api-educations'),
-    path('blogs/', api_views.BlogListAPI.as_view(), name='api-blogs'),
+if settings.ASYNC_VIEWS:
+    # Async read-only endpoints for ASGI deployments (JSON only)
+    read_only = [
+        path('profile/', async_views.profile_api, name='api-profile'),
+        path('projects/', async_views.project_list_api, name='api-projects'),
+        path('experiences/', async_views.experience_list_api, name='api-experiences'),
+        path('educations/', async_views.education_list_api, name='api-educations'),
+        path('blogs/', async_views.blog_list_api, name='api-blogs'),
+    ]
+else:
+    read_only = [
+        path('profile/', api_views.ProfileRetrieveAPI.as_view(), name='api-profile'),
+        path('projects/', api_views.ProjectListAPI.as_view(), name='api-projects'),
+        path('experiences/', api_views.ExperienceListAPI.as_view(), name='api-experiences'),
+        path('educations/', api_views.EducationListAPI.as_view(), name='api-educations'),
+        path('blogs/', api_views.BlogListAPI.as_view(), name='api-blogs'),
+    ]
+
+urlpatterns = read_only + [
+    path('search/', api_views.SearchAPI.as_view(), name='api-search'),
     path('contact/', api_views.ContactCreateAPI.as_view(), name='api-contact'),
 ]
@@ -1,8 +1,7 @@
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import generics, status
 from rest_framework.response import Response
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.conf import settings
+from django.utils.decorators import method_decorator
 
 from .models import Project, Experience, Blog, Education, Profile
 from .serializers import (
@@ -12,9 +11,17 @@ from .serializers import (
     BlogSerializer,
     ContactMessageSerializer,
     EducationSerializer,
+    SearchResultSerializer,
 )
+from .ratelimit import ContactRateThrottle
+from .cache import conditional_by_versions
+from .pagination import KeysetPagination, CreatedAtKeysetPagination, SearchPagination
+from .filters import TechTagFilter
+from .search import SearchResults
+from .submissions import submit_contact
 
 
+@method_decorator(conditional_by_versions('profile'), name='dispatch')
 class ProfileRetrieveAPI(generics.RetrieveAPIView):
     queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
@@ -23,69 +30,60 @@ class ProfileRetrieveAPI(generics.RetrieveAPIView):
         return Profile.objects.first() or None
 
 
+@method_decorator(conditional_by_versions('project'), name='dispatch')
 class ProjectListAPI(generics.ListAPIView):
-    queryset = Project.objects.all()
+    queryset = Project.objects.prefetch_related('tech_links__tag')
     serializer_class = ProjectSerializer
+    pagination_class = KeysetPagination
+    filter_backends = [TechTagFilter]
 
 
+@method_decorator(conditional_by_versions('experience'), name='dispatch')
 class ExperienceListAPI(generics.ListAPIView):
     queryset = Experience.objects.all()
     serializer_class = ExperienceSerializer
+    pagination_class = KeysetPagination
 
 
+@method_decorator(conditional_by_versions('blog'), name='dispatch')
 class BlogListAPI(generics.ListAPIView):
     queryset = Blog.objects.filter(is_published=True)
     serializer_class = BlogSerializer
+    pagination_class = CreatedAtKeysetPagination
 
 
+@method_decorator(conditional_by_versions('education'), name='dispatch')
 class EducationListAPI(generics.ListAPIView):
     queryset = Education.objects.all()
     serializer_class = EducationSerializer
+    pagination_class = KeysetPagination
+
+
+@method_decorator(conditional_by_versions('blog', 'project'), name='dispatch')
+@extend_schema(parameters=[
+    OpenApiParameter('q', str, description='Search terms (websearch syntax on PostgreSQL).'),
+])
+class SearchAPI(generics.ListAPIView):
+    serializer_class = SearchResultSerializer
+    pagination_class = SearchPagination
+
+    def get_queryset(self):
+        return SearchResults(self.request.query_params.get('q', ''))
 
 
 class ContactCreateAPI(generics.CreateAPIView):
     serializer_class = ContactMessageSerializer
+    # Anyone may post, so skip authentication: it would load the session
+    # from the database before the rate limit is checked
+    authentication_classes = ()
+    throttle_classes = (ContactRateThrottle,)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        contact = serializer.save()
-
-        # Send email notification (same logic as views._handle_contact_form)
-        subject = f'New Contact Message from {contact.name}'
-        body = (
-            f"Name: {contact.name}\n"
-            f"Email: {contact.email}\n"
-            f"Message:\n{contact.message}\n"
-        )
-        try:
-            send_mail(
-                subject,
-                body,
-                settings.DEFAULT_FROM_EMAIL,
-                [settings.EMAIL_HOST_USER],
-                fail_silently=False,
-            )
-        except Exception:
-            pass
-
-        # Send confirmation email to the visitor
-        try:
-            html_content = render_to_string(
-                'main/emails/confirmation_email.html',
-                {'name': contact.name, 'message': contact.message},
-            )
-            send_mail(
-                'Thank You for Reaching Out — Abhay\'s Portfolio',
-                f'Hi {contact.name}, thank you for visiting my portfolio and reaching out. '
-                f'I have received your message and will get back to you soon.',
-                settings.DEFAULT_FROM_EMAIL,
-                [contact.email],
-                fail_silently=False,
-                html_message=html_content,
-            )
-        except Exception:
-            pass
+        # Repeats of a recent message get the same answer but are not saved
+        data = serializer.validated_data
+        submit_contact(data['name'], data['email'], data['message'])
 
         return Response(
             {'message': 'Your message has been sent successfully!'},
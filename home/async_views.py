@@ -0,0 +1,198 @@
+"""
+Async variants of the public pages and the read-only API.
+
+They are routed instead of the views in `views.py` and `api_views.py` when
+ASYNC_VIEWS is enabled and the site runs under an ASGI server. The contact
+form's transaction runs off the event loop, so a slow database holds up the
+request being served but never the worker.
+
+They are not faster. Django's async ORM runs every query through
+thread-sensitive sync_to_async on the request's single connection, so a
+page's queries still run one after another; awaiting several at once would
+only interleave them on that thread, not overlap them. With
+`tools/benchmark_asgi.py --concurrency 50 --requests 200 --db-latency 5` on
+SQLite, ASGI served 0.59-0.66x the throughput of the sync views under WSGI
+(p95 about 1.4-1.6 s against 0.65 s). Keep ASYNC_VIEWS off unless the
+deployment needs ASGI for other reasons and the benchmark says otherwise
+for its database.
+
+Pages use the same templates, page cache and ETag/Last-Modified handling
+as the sync views. The API views share the serializers and pagination of
+`api_views.py` but always answer in JSON (no browsable API).
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.http import HttpResponse
+from django.shortcuts import redirect, render
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .cache import cache_page_by_versions, conditional_by_versions, is_sessionless
+from .filters import TechTagFilter
+from .forms import ContactForm
+from .models import Project, Experience, Blog, Education, Profile
+from .pagination import KeysetPagination, CreatedAtKeysetPagination
+from .ratelimit import rate_limit_contact
+from .serializers import (
+    ProfileSerializer,
+    ProjectSerializer,
+    ExperienceSerializer,
+    BlogSerializer,
+    EducationSerializer,
+)
+from .views import BLOG_LIST_FIELDS, _handle_contact_form
+
+
+async def _fetch(queryset):
+    """Evaluate a queryset (prefetches included) without blocking the loop."""
+    return [obj async for obj in queryset]
+
+
+async def _render(request, template_name, context):
+    # Rendering reads the session for flash messages; without a session
+    # cookie that needs no query and can stay on the event loop
+    if is_sessionless(request):
+        return render(request, template_name, context)
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def _contact_post(request, redirect_to):
+    """Handle a contact form POST; returns (response, form)."""
+    success, form = await sync_to_async(_handle_contact_form)(request)
+    if success:
+        messages.success(request, 'Your message has been sent successfully!')
+        return redirect(redirect_to), form
+    messages.error(request, 'Please correct the errors below.')
+    return None, form
+
+
+# ============================================================
+# PAGES
+# ============================================================
+
+@rate_limit_contact
+@conditional_by_versions('profile', 'education', 'experience', 'project', 'blog')
+@cache_page_by_versions('profile', 'education', 'experience', 'project', 'blog')
+async def home(request):
+    if request.method == 'POST':
+        response, form = await _contact_post(request, 'home')
+        if response is not None:
+            return response
+    else:
+        form = ContactForm()
+
+    # One after another: the async ORM has a single connection per request
+    profile = await Profile.objects.afirst()
+    educations = await _fetch(Education.objects.all())
+    experiences = await _fetch(Experience.objects.all())
+    projects = await _fetch(Project.objects.prefetch_related('image_variants', 'tech_links__tag'))
+    blogs = await _fetch(Blog.objects.filter(is_published=True).only(*BLOG_LIST_FIELDS))
+    return await _render(request, 'main/home.html', {
+        'form': form,
+        'profile': profile,
+        'educations': educations,
+        'experiences': experiences,
+        'projects': projects,
+        'blogs': blogs,
+    })
+
+
+@cache_page_by_versions('experience', 'profile')
+async def about(request):
+    experiences = await _fetch(Experience.objects.all())
+    profile = await Profile.objects.afirst()
+    return await _render(request, 'main/about.html', {
+        'experiences': experiences,
+        'profile': profile
+    })
+
+
+@conditional_by_versions('project')
+@cache_page_by_versions('project')
+async def projects(request):
+    projects = await _fetch(Project.objects.all())
+    return await _render(request, 'main/projects.html', {'projects': projects})
+
+
+@rate_limit_contact
+async def contact(request):
+    if request.method == 'POST':
+        response, form = await _contact_post(request, 'contact')
+        if response is not None:
+            return response
+    else:
+        form = ContactForm()
+
+    return await _render(request, 'main/contact.html', {'form': form})
+
+
+@conditional_by_versions('blog')
+@cache_page_by_versions('blog')
+async def blog(request):
+    blogs = await _fetch(Blog.objects.filter(is_published=True).only(*BLOG_LIST_FIELDS))
+    return await _render(request, 'main/blog.html', {'blogs': blogs})
+
+
+# ============================================================
+# READ-ONLY API
+# ============================================================
+
+def _json(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+
+
+def _api_view(func):
+    """Wrap the Django request for DRF parsing and report API errors as JSON."""
+    @wraps(func)
+    async def view(request, *args, **kwargs):
+        try:
+            return await func(Request(request), *args, **kwargs)
+        except APIException as exc:
+            return _json({'detail': exc.detail}, status=exc.status_code)
+    return view
+
+
+async def _paginated(request, queryset, serializer_class, pagination_class):
+    paginator = pagination_class()
+    page = await paginator.apaginate_queryset(queryset, request)
+    serializer = serializer_class(page, many=True, context={'request': request})
+    return _json(paginator.get_paginated_data(serializer.data))
+
+
+@conditional_by_versions('profile')
+@_api_view
+async def profile_api(request):
+    profile = await Profile.objects.afirst()
+    return _json(ProfileSerializer(profile, context={'request': request}).data)
+
+
+@conditional_by_versions('project')
+@_api_view
+async def project_list_api(request):
+    queryset = TechTagFilter().filter_queryset(
+        request, Project.objects.prefetch_related('tech_links__tag'), None,
+    )
+    return await _paginated(request, queryset, ProjectSerializer, KeysetPagination)
+
+
+@conditional_by_versions('experience')
+@_api_view
+async def experience_list_api(request):
+    return await _paginated(request, Experience.objects.all(), ExperienceSerializer, KeysetPagination)
+
+
+@conditional_by_versions('education')
+@_api_view
+async def education_list_api(request):
+    return await _paginated(request, Education.objects.all(), EducationSerializer, KeysetPagination)
+
+
+@conditional_by_versions('blog')
+@_api_view
+async def blog_list_api(request):
+    return await _paginated(
+        request, Blog.objects.filter(is_published=True), BlogSerializer, CreatedAtKeysetPagination,
+    )
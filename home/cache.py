@@ -0,0 +1,246 @@
+"""
+Version-keyed page cache and HTTP validators for the public views.
+
+Every content model has a version number stored in the cache. Signals bump
+the version whenever a row is saved or deleted, so a cached page becomes
+unreachable as soon as any of the models it renders changes. The same
+versions back the ETag and Last-Modified headers of pages and API responses.
+
+Both decorators also accept async views, doing their cache and database
+work with the async APIs so an ASGI worker's event loop is never blocked.
+"""
+import hashlib
+import re
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.messages import get_messages
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db.models import Max
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+VERSION_KEY_PREFIX = 'content-version'
+MODIFIED_KEY_PREFIX = 'content-modified'
+PAGE_KEY_PREFIX = 'page'
+
+# Placeholder stored in place of the per-visitor CSRF token
+CSRF_PLACEHOLDER = '__csrf_token__'
+CSRF_INPUT_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+def _version_key(model_name):
+    return f'{VERSION_KEY_PREFIX}:{model_name}'
+
+
+def get_content_version(model_name):
+    """Return the current content version for a model, creating it if needed."""
+    # Seed with a timestamp so an evicted version never repeats an old one
+    return cache.get_or_set(_version_key(model_name), time.time_ns, None)
+
+
+async def aget_content_version(model_name):
+    return await cache.aget_or_set(_version_key(model_name), time.time_ns, None)
+
+
+def bump_content_version(model_name):
+    """Invalidate every cached page that renders `model_name`."""
+    cache.set(_modified_key(model_name), timezone.now(), None)
+    key = _version_key(model_name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, None)
+        return version
+
+
+def _modified_key(model_name):
+    return f'{MODIFIED_KEY_PREFIX}:{model_name}'
+
+
+def get_last_modified(model_name):
+    """Return when `model_name` last changed, falling back to MAX(updated_at)."""
+    key = _modified_key(model_name)
+    modified = cache.get(key)
+    if modified is None:
+        model = apps.get_model('home', model_name)
+        modified = model.objects.aggregate(latest=Max('updated_at'))['latest']
+        # Remember empty tables too (as 0) so they are not re-aggregated
+        cache.set(key, modified or 0, None)
+    return modified or None
+
+
+async def aget_last_modified(model_name):
+    key = _modified_key(model_name)
+    modified = await cache.aget(key)
+    if modified is None:
+        model = apps.get_model('home', model_name)
+        modified = (await model.objects.aaggregate(latest=Max('updated_at')))['latest']
+        await cache.aset(key, modified or 0, None)
+    return modified or None
+
+
+def _page_key(request, versions, query_params=()):
+    versions = '.'.join(str(version) for version in versions)
+    # Only the parameters the view reads, so arbitrary query strings
+    # (tracking tags, cache busters) cannot fill the cache with copies
+    query = urlencode(sorted((name, value) for name in query_params for value in request.GET.getlist(name)))
+    return f'{PAGE_KEY_PREFIX}:{request.path}?{query}:{versions}'
+
+
+def _is_cacheable(request):
+    """Only anonymous GET/HEAD requests with no pending flash messages."""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    return len(get_messages(request)) == 0
+
+
+def is_sessionless(request):
+    """
+    True when the request carries neither a session nor a messages cookie.
+
+    Such a visitor is anonymous with no flash messages, which can be known
+    without loading the session from the database.
+    """
+    return (
+        settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+async def _ais_cacheable(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if is_sessionless(request):
+        return True
+    return await sync_to_async(_is_cacheable)(request)
+
+
+def _cached_response(request, cached):
+    content, content_type = cached
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    return HttpResponse(content, content_type=content_type)
+
+
+def _cache_entry(response):
+    """The (content, content_type) to store for `response`, or None."""
+    if response.status_code != 200 or response.streaming:
+        return None
+    content = CSRF_INPUT_RE.sub(
+        rf'\g<1>{CSRF_PLACEHOLDER}\g<2>',
+        response.content.decode(response.charset),
+    )
+    return content, response['Content-Type']
+
+
+def cache_page_by_versions(*model_names, query_params=()):
+    """
+    Cache a view's rendered page until one of `model_names` changes.
+
+    Pages are keyed by path and the `query_params` the view reads; any other
+    query parameters are ignored. The CSRF token in any form is swapped for
+    a placeholder before storing and replaced with a fresh token for the
+    current visitor on every hit.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if not await _ais_cacheable(request):
+                    return await view_func(request, *args, **kwargs)
+
+                versions = [await aget_content_version(name) for name in model_names]
+                key = _page_key(request, versions, query_params)
+                cached = await cache.aget(key)
+                if cached is not None:
+                    return _cached_response(request, cached)
+
+                response = await view_func(request, *args, **kwargs)
+                entry = _cache_entry(response)
+                if entry is not None:
+                    await cache.aset(key, entry, settings.PAGE_CACHE_TIMEOUT)
+                return response
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable(request):
+                return view_func(request, *args, **kwargs)
+
+            key = _page_key(request, [get_content_version(name) for name in model_names], query_params)
+            cached = cache.get(key)
+            if cached is not None:
+                return _cached_response(request, cached)
+
+            response = view_func(request, *args, **kwargs)
+            entry = _cache_entry(response)
+            if entry is not None:
+                cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_by_versions(*model_names):
+    """
+    Add ETag and Last-Modified headers derived from content versions and
+    answer matching conditional GETs with 304 before the view runs.
+    """
+    def etag_func(request, *args, **kwargs):
+        if not _is_cacheable(request):
+            return None
+        return _etag(request, [get_content_version(name) for name in model_names])
+
+    def last_modified_func(request, *args, **kwargs):
+        if not _is_cacheable(request):
+            return None
+        return _latest([get_last_modified(name) for name in model_names])
+
+    sync_condition = condition(etag_func=etag_func, last_modified_func=last_modified_func)
+
+    # Django's `condition` calls the validator functions synchronously, so
+    # for async views they are computed first and handed over on the request
+    async_condition = condition(
+        etag_func=lambda request, *args, **kwargs: request._version_etag,
+        last_modified_func=lambda request, *args, **kwargs: request._version_modified,
+    )
+
+    def decorator(view_func):
+        if not iscoroutinefunction(view_func):
+            return sync_condition(view_func)
+
+        conditional_view = async_condition(view_func)
+
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            request._version_etag = request._version_modified = None
+            if await _ais_cacheable(request):
+                versions = [await aget_content_version(name) for name in model_names]
+                request._version_etag = _etag(request, versions)
+                request._version_modified = _latest([await aget_last_modified(name) for name in model_names])
+            return await conditional_view(request, *args, **kwargs)
+        return async_wrapper
+    return decorator
+
+
+def _etag(request, versions):
+    versions = '.'.join(str(version) for version in versions)
+    # The API renders JSON or the browsable HTML depending on Accept
+    raw = f'{request.get_full_path()}|{request.META.get("HTTP_ACCEPT", "")}|{versions}'
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def _latest(times):
+    times = [t for t in times if t]
+    return max(times) if times else None
@@ -0,0 +1,51 @@
+"""
+Materialized row counts for the admin sidebar.
+
+Signals adjust a `ContentCounter` row whenever a counted model is created or
+deleted, so the panel reads every count in one query instead of running
+COUNT(*) on each table. `manage.py reconcile_counters` corrects any drift
+left by bulk operations that bypass signals.
+"""
+from django.db.models import F
+
+from .models import ContentCounter, Project, Blog, Education, Experience, ContactMessage
+
+COUNTED_MODELS = (Project, Blog, Education, Experience, ContactMessage)
+
+
+def adjust_counter(model, delta):
+    """Atomically add `delta` to the counter for `model`."""
+    name = model._meta.model_name
+    updated = ContentCounter.objects.filter(name=name).update(value=F('value') + delta)
+    if not updated:
+        # First write for this model: seed from the real count (already includes this row)
+        ContentCounter.objects.get_or_create(name=name, defaults={'value': model.objects.count()})
+
+
+def get_counts():
+    """Return {model_name: row count} for every counted model in one query."""
+    counts = dict(ContentCounter.objects.values_list('name', 'value'))
+    for model in COUNTED_MODELS:
+        name = model._meta.model_name
+        if name not in counts:
+            counter, _ = ContentCounter.objects.get_or_create(
+                name=name, defaults={'value': model.objects.count()},
+            )
+            counts[name] = counter.value
+    return counts
+
+
+def reconcile_counters():
+    """Recount every table and fix drifted counters. Returns {name: (old, new)} for changes."""
+    changes = {}
+    for model in COUNTED_MODELS:
+        name = model._meta.model_name
+        actual = model.objects.count()
+        counter, created = ContentCounter.objects.get_or_create(name=name, defaults={'value': actual})
+        if created:
+            changes[name] = (None, actual)
+        elif counter.value != actual:
+            changes[name] = (counter.value, actual)
+            counter.value = actual
+            counter.save(update_fields=['value', 'updated_at'])
+    return changes
@@ -0,0 +1,56 @@
+"""
+Statistics for the psycopg3 connection pool (settings.DB_POOL).
+
+Pools live in each app-server worker process, so the numbers describe the
+worker that answers the request and are cumulative since it started.
+"""
+import os
+
+from django.db import connections
+
+
+def _average(total, count):
+    return round(total / count, 2) if count else 0.0
+
+
+def pool_stats(alias='default'):
+    """Occupancy, wait time and checkout latency of a database's pool."""
+    connection = connections[alias]
+    pool = getattr(connection, 'pool', None)
+    if pool is None:
+        return {'alias': alias, 'pid': os.getpid(), 'enabled': False}
+
+    # psycopg_pool leaves counters out until they are first incremented
+    stats = pool.get_stats()
+    size, available = stats.get('pool_size', 0), stats.get('pool_available', 0)
+    requests = stats.get('requests_num', 0)
+    queued = stats.get('requests_queued', 0)
+    wait_ms = stats.get('requests_wait_ms', 0)
+    return {
+        'alias': alias,
+        'pid': os.getpid(),
+        'enabled': True,
+        'occupancy': {
+            'min_size': stats.get('pool_min', 0),
+            'max_size': stats.get('pool_max', 0),
+            'size': size,
+            'in_use': size - available,
+            'available': available,
+            'waiting': stats.get('requests_waiting', 0),
+        },
+        'checkouts': {
+            'total': requests,
+            'queued': queued,
+            'wait_ms_total': wait_ms,
+            'avg_checkout_ms': _average(wait_ms, requests),
+            'avg_queued_wait_ms': _average(wait_ms, queued),
+            'timeouts': stats.get('requests_errors', 0),
+        },
+        'connections': {
+            'opened': stats.get('connections_num', 0),
+            'avg_connect_ms': _average(stats.get('connections_ms', 0), stats.get('connections_num', 0)),
+            'errors': stats.get('connections_errors', 0),
+            'lost': stats.get('connections_lost', 0),
+            'returned_bad': stats.get('returns_bad', 0),
+        },
+    }
@@ -0,0 +1,36 @@
+"""
+Query-string filters for the REST API.
+"""
+from rest_framework.filters import BaseFilterBackend
+
+from .models import normalize_tech_name
+
+
+class TechTagFilter(BaseFilterBackend):
+    """
+    Filter projects by tech tag: `?tech=Django`, or `?tech=Django&tech=React`
+    for projects using all of them.
+
+    Matching is case-insensitive through the unique `normalized_name` index
+    rather than a `LIKE` scan of `tech_stack`.
+    """
+    query_param = 'tech'
+
+    def filter_queryset(self, request, queryset, view):
+        for value in request.query_params.getlist(self.query_param):
+            name = normalize_tech_name(value)
+            if name:
+                queryset = queryset.filter(tech_links__tag__normalized_name=name)
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Only projects using this technology (case-insensitive). Repeat to require several.',
+                'schema': {'type': 'array', 'items': {'type': 'string'}},
+                'explode': True,
+            },
+        ]
@@ -0,0 +1,171 @@
+"""
+Single-decode ingestion pipeline for image uploads.
+
+`sniff_image` identifies an upload from its magic bytes and reads the width
+and height straight from the container header, without handing the file to
+Pillow. The result is memoized on the underlying file object, so form
+validation, model validation and `Profile.save()` share one header parse.
+
+`ingest_image` then decodes the pixels at most once, using JPEG draft mode
+to decode at 1/2, 1/4 or 1/8 scale when the output is smaller anyway.
+"""
+import struct
+from collections import namedtuple
+from io import BytesIO
+
+from PIL import Image
+
+ImageInfo = namedtuple('ImageInfo', ['format', 'width', 'height'])
+
+# Enough bytes for every header below except JPEG, which is scanned in chunks
+HEADER_SIZE = 64
+
+# JPEG start-of-frame markers that carry the image dimensions
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _file_chain(image_file):
+    """FieldFile -> UploadedFile -> raw file, innermost first, so every wrapper shares one memo."""
+    chain = [image_file]
+    while hasattr(chain[-1], 'file'):
+        inner = chain[-1].file
+        if inner is None or any(inner is f for f in chain):
+            break
+        chain.append(inner)
+    return chain[::-1]
+
+
+def _parse_jpeg(read):
+    """Walk JPEG segments until a SOF marker; `read` is positioned after SOI."""
+    while True:
+        byte = read(1)
+        while byte and byte != b'\xff':
+            byte = read(1)
+        while byte == b'\xff':
+            byte = read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            continue  # markers without a length field
+        length_bytes = read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if marker in _JPEG_SOF_MARKERS:
+            segment = read(5)
+            if len(segment) < 5:
+                return None
+            height, width = struct.unpack('>HH', segment[1:5])
+            return width, height
+        read(length - 2)
+
+
+def _parse_header(head, read):
+    if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+        width, height = struct.unpack('>II', head[16:24])
+        return ImageInfo('png', width, height)
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        width, height = struct.unpack('<HH', head[6:10])
+        return ImageInfo('gif', width, height)
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        chunk = head[12:16]
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', head[26:30])
+            return ImageInfo('webp', width & 0x3FFF, height & 0x3FFF)
+        if chunk == b'VP8L':
+            bits = struct.unpack('<I', head[21:25])[0]
+            return ImageInfo('webp', (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+        if chunk == b'VP8X':
+            width = int.from_bytes(head[24:27], 'little') + 1
+            height = int.from_bytes(head[27:30], 'little') + 1
+            return ImageInfo('webp', width, height)
+        return None
+    if head[:2] == b'\xff\xd8':
+        stream = BytesIO(head[2:])
+
+        def read_jpeg(n):
+            data = stream.read(n)
+            if len(data) < n:
+                data += read(n - len(data))
+            return data
+
+        size = _parse_jpeg(read_jpeg)
+        return ImageInfo('jpeg', *size) if size else None
+    return None
+
+
+def sniff_image(image_file):
+    """
+    Identify an image from its magic bytes and header, without decoding it.
+
+    Returns:
+        ImageInfo(format, width, height), or None if the bytes are not a
+        JPEG, PNG, GIF or WebP image
+    """
+    chain = _file_chain(image_file)
+    for f in chain:
+        memo = getattr(f, '_image_info', False)
+        if memo is not False:
+            return memo
+
+    raw = chain[0]
+    position = raw.tell() if hasattr(raw, 'tell') else None
+    try:
+        raw.seek(0)
+        info = _parse_header(raw.read(HEADER_SIZE), raw.read)
+    except (struct.error, ValueError, OSError):
+        info = None
+    finally:
+        if position is not None:
+            raw.seek(position)
+
+    # Temporary files on disk (io.BufferedRandom) do not take attributes;
+    # fall back to the nearest wrapper that does
+    for f in chain:
+        try:
+            f._image_info = info
+            break
+        except AttributeError:
+            continue
+    return info
+
+
+def ingest_image(data, max_width=1200, max_height=1200, quality=85):
+    """
+    Decode an image once, bounded to max dimensions, and encode it as JPEG.
+
+    Returns:
+        Dict with the output content, width and height, and the source
+        dimensions
+    """
+    img = Image.open(BytesIO(data))
+    source_size = img.size
+
+    scale = min(max_width / img.width, max_height / img.height, 1)
+    target = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+    if img.format == 'JPEG' and scale < 1:
+        # Let libjpeg decode directly at the nearest scale >= target
+        img.draft('RGB', target)
+
+    img.load()
+    if img.mode in ('RGBA', 'LA', 'P'):
+        # Create white background
+        rgba = img.convert('RGBA')
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.split()[-1])
+        img = background
+    elif img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return {
+        'content': buffer.getvalue(),
+        'width': img.width,
+        'height': img.height,
+        'source_width': source_size[0],
+        'source_height': source_size[1],
+    }
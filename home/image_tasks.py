@@ -0,0 +1,193 @@
+"""
+Background image processing for profile uploads.
+
+`Profile.save()` stores the original upload and schedules optimization once
+the transaction commits. The CPU-heavy decode/resize/encode runs in a
+bounded `ProcessPoolExecutor`, so it neither blocks the request nor holds
+the GIL of the worker serving it. The result is swapped into the profile
+when it is ready.
+
+Jobs only live in the pool of the process that scheduled them. A profile
+left pending or processing for IMAGE_PROCESSING_TIMEOUT seconds, because
+that worker was recycled or crashed, is scheduled again by
+requeue_stale_jobs(): on every gunicorn worker start and from the
+`requeue_image_jobs` command.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import partial
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .image_ingest import ingest_image, sniff_image
+from .image_utils import get_optimized_image_name
+from .metrics import IMAGE_FAILURES, IMAGE_OPTIMIZATION
+
+logger = logging.getLogger(__name__)
+
+# Files larger than this are re-encoded; smaller ones only have their dimensions read
+COMPRESS_THRESHOLD = 500 * 1024  # 500KB
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Create the process pool lazily so that it is owned by the serving process."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESSING_WORKERS)
+        return _executor
+
+
+def shutdown_executor():
+    """Finish running jobs and drop queued ones, which requeue_stale_jobs() picks up later."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def optimize_profile_bytes(data, filename):
+    """
+    Read dimensions and, for large files, compress an image. Runs in a child process.
+
+    Small files only have their header parsed; large ones are decoded exactly
+    once by `ingest_image`, which also reports the output dimensions.
+
+    Returns:
+        Dict with width, height, the seconds it took and, if it was
+        re-encoded, content/filename
+    """
+    started = time.perf_counter()
+    if len(data) > COMPRESS_THRESHOLD:
+        ingested = ingest_image(data)
+        return {
+            'width': ingested['width'],
+            'height': ingested['height'],
+            'content': ingested['content'],
+            'filename': get_optimized_image_name(filename),
+            'seconds': time.perf_counter() - started,
+        }
+
+    info = sniff_image(BytesIO(data))
+    if info is None:
+        raise ValueError(f'Unrecognized image format: {filename}')
+    return {'width': info.width, 'height': info.height, 'seconds': time.perf_counter() - started}
+
+
+def schedule_profile_optimization(profile_id):
+    """Optimize the profile picture of `profile_id` in the pool (or inline)."""
+    from .models import Profile
+
+    profile = Profile.objects.filter(pk=profile_id).first()
+    if not profile or not profile.profile_picture:
+        return
+
+    original_name = profile.profile_picture.name
+    with profile.profile_picture.open('rb') as f:
+        data = f.read()
+    # updated_at is when the job started; QuerySet.update() does not set it
+    Profile.objects.filter(pk=profile_id).update(processing_state=Profile.STATE_PROCESSING, updated_at=timezone.now())
+
+    if not settings.IMAGE_PROCESSING_ASYNC:
+        try:
+            result = optimize_profile_bytes(data, os.path.basename(original_name))
+        except Exception as e:
+            result = e
+        _apply_result(profile_id, original_name, result)
+        return
+
+    future = _get_executor().submit(optimize_profile_bytes, data, os.path.basename(original_name))
+    future.add_done_callback(partial(_on_done, profile_id, original_name))
+
+
+def requeue_stale_jobs(older_than=None):
+    """
+    Schedule again the profiles pending or processing for more than
+    `older_than` seconds (default IMAGE_PROCESSING_TIMEOUT). Returns their ids.
+    """
+    from .models import Profile
+
+    if older_than is None:
+        older_than = settings.IMAGE_PROCESSING_TIMEOUT
+    unfinished = Profile.objects.filter(
+        processing_state__in=[Profile.STATE_PENDING, Profile.STATE_PROCESSING],
+        updated_at__lt=timezone.now() - timedelta(seconds=older_than),
+    )
+    requeued = []
+    for profile_id in unfinished.values_list('pk', flat=True):
+        # Moving the timestamp claims the job, so concurrent sweeps take it once
+        if unfinished.filter(pk=profile_id).update(updated_at=timezone.now()):
+            logger.warning(f'Requeuing profile image of profile {profile_id}, unfinished for {older_than:.0f}s')
+            schedule_profile_optimization(profile_id)
+            requeued.append(profile_id)
+    return requeued
+
+
+def _on_done(profile_id, original_name, future):
+    if future.cancelled():
+        # Dropped by shutdown_executor(); left for requeue_stale_jobs()
+        return
+    # Runs on the pool's management thread, which needs its own DB connection
+    try:
+        error = future.exception()
+        _apply_result(profile_id, original_name, error or future.result())
+    finally:
+        close_old_connections()
+
+
+def _apply_result(profile_id, original_name, result):
+    """Swap the optimized file into the profile unless it was replaced meanwhile."""
+    from .cache import bump_content_version
+    from .models import Profile
+
+    # Timed in the child process; recorded here, in the process serving /metrics
+    if isinstance(result, Exception):
+        IMAGE_FAILURES.inc('profile')
+    else:
+        IMAGE_OPTIMIZATION.observe(result['seconds'], 'profile')
+
+    profile = Profile.objects.filter(pk=profile_id, profile_picture=original_name).first()
+    if profile is None:
+        logger.info(f'Profile image {original_name} was replaced before processing finished')
+        return
+
+    if isinstance(result, Exception):
+        logger.error(f'✗ Failed to optimize {original_name}: {type(result).__name__}: {str(result)}')
+        Profile.objects.filter(pk=profile_id).update(processing_state=Profile.STATE_FAILED)
+        return
+
+    updates = {
+        'image_width': result['width'],
+        'image_height': result['height'],
+        'processing_state': Profile.STATE_READY,
+    }
+    field = profile.profile_picture
+    if 'content' in result:
+        new_name = field.storage.save(
+            field.field.generate_filename(profile, result['filename']),
+            ContentFile(result['content']),
+        )
+        updates.update(profile_picture=new_name, file_size=len(result['content']))
+
+    swapped = Profile.objects.filter(pk=profile_id, profile_picture=original_name).update(**updates)
+    if 'content' in result:
+        if swapped:
+            field.storage.delete(original_name)
+        else:
+            field.storage.delete(updates['profile_picture'])
+    if swapped:
+        # QuerySet.update() skips post_save, so invalidate cached pages here
+        bump_content_version('profile')
+        logger.info(f'✓ Profile image optimized: {original_name} → {updates.get("profile_picture", original_name)}')
@@ -8,7 +8,34 @@ from django.core.files.storage import default_storage
 import os
 
 
-def optimize_image(image_file, max_width=1200, max_height=1200, quality=85):
+# Widths generated for responsive <img srcset> derivatives
+DERIVATIVE_WIDTHS = (320, 640, 960, 1280)
+
+# Pillow format name -> file extension
+DERIVATIVE_FORMATS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+
+def _flatten(img):
+    """Convert RGBA/LA/P images to RGB on a white background (for JPEG compatibility)."""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        # Create white background
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+        return background
+    return img
+
+
+def _encode(img, format, quality):
+    buffer = BytesIO()
+    if format == 'WEBP':
+        img.save(buffer, format='WEBP', quality=quality, method=6)
+    else:
+        img.save(buffer, format='JPEG', quality=quality, optimize=True)
+    buffer.seek(0)
+    return buffer
+
+
+def optimize_image(image_file, max_width=1200, max_height=1200, quality=85, format='JPEG'):
     """
     Optimize and compress image while maintaining aspect ratio.
     
@@ -16,29 +43,77 @@ def optimize_image(image_file, max_width=1200, max_height=1200, quality=85):
         image_file: Django ImageField file
         max_width: Maximum width in pixels
         max_height: Maximum height in pixels
-        quality: JPEG quality (1-100)
+        quality: JPEG/WebP quality (1-100)
+        format: Output format, 'JPEG' or 'WEBP'
     
     Returns:
         Optimized Image file
     """
-    img = Image.open(image_file)
-    
-    # Convert RGBA to RGB if needed (for JPEG compatibility)
-    if img.mode in ('RGBA', 'LA', 'P'):
-        # Create white background
-        background = Image.new('RGB', img.size, (255, 255, 255))
-        background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-        img = background
+    img = _flatten(Image.open(image_file))
     
     # Calculate new dimensions maintaining aspect ratio
     img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
     
-    # Save to BytesIO buffer
+    return _encode(img, format, quality)
+
+
+def generate_derivatives(image_file, widths=DERIVATIVE_WIDTHS, quality=80):
+    """
+    Build width-bounded WebP and JPEG copies of an image for srcset.
+
+    The source is decoded once; widths larger than the original are skipped
+    (the original width is used instead so there is always one derivative).
+
+    Returns:
+        List of dicts with width, height, format (extension) and content (bytes)
+    """
+    if hasattr(image_file, 'seek'):
+        image_file.seek(0)
+    source = _flatten(Image.open(image_file))
+    if source.mode not in ('RGB', 'L'):
+        source = source.convert('RGB')
+    targets = sorted({w for w in widths if w < source.width} | {min(max(widths), source.width)})
+
+    derivatives = []
+    for width in targets:
+        img = source.copy()
+        img.thumbnail((width, source.height), Image.Resampling.LANCZOS)
+        for format, ext in DERIVATIVE_FORMATS.items():
+            derivatives.append({
+                'width': img.width,
+                'height': img.height,
+                'format': ext,
+                'content': _encode(img, format, quality).getvalue(),
+            })
+    return derivatives
+
+
+def reencode_image_bytes(data, max_width=1920, max_height=1920, quality=85):
+    """
+    Re-encode an image in its own format, bounded to max dimensions.
+
+    PNGs are re-compressed losslessly; JPEG and WebP are re-encoded at
+    `quality`. Other formats are left alone.
+
+    Returns:
+        Tuple of (content, width, height), or None if the format is unsupported
+    """
+    img = Image.open(BytesIO(data))
+    format = img.format
+    if format not in ('JPEG', 'PNG', 'WEBP'):
+        return None
+
+    img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
     buffer = BytesIO()
-    img.save(buffer, format='JPEG', quality=quality, optimize=True)
-    buffer.seek(0)
-    
-    return buffer
+    if format == 'PNG':
+        img.save(buffer, format='PNG', optimize=True)
+    elif format == 'WEBP':
+        img.save(buffer, format='WEBP', quality=quality, method=6)
+    else:
+        if img.mode not in ('RGB', 'L', 'CMYK'):
+            img = img.convert('RGB')
+        img.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue(), img.width, img.height
 
 
 def get_optimized_image_name(original_filename):
@@ -0,0 +1,72 @@
+"""
+Management command that archives expired contact messages and keeps monthly partitions ahead
+Usage: python manage.py archive_contact_messages [--retain-months 24] [--archive-dir archive]
+                                                 [--months-ahead 3] [--keep-tables] [--dry-run]
+
+Run it monthly (e.g. from cron): each month older than the retention
+period is written to <archive-dir>/home_contactmessage_yYYYYmMM.jsonl.gz
+and its partition detached and dropped.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from home import partitions
+from home.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Archive contact messages older than the retention period and create upcoming partitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retain-months',
+            type=int,
+            default=settings.CONTACT_RETENTION_MONTHS,
+            help='Full months kept besides the current one (default: CONTACT_RETENTION_MONTHS)',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default=settings.CONTACT_ARCHIVE_DIR,
+            help='Directory for the gzipped JSON Lines archives (default: CONTACT_ARCHIVE_DIR)',
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=partitions.MONTHS_AHEAD,
+            help='Partitions to keep created beyond the current month (default: 3)',
+        )
+        parser.add_argument(
+            '--keep-tables',
+            action='store_true',
+            help='Detach expired partitions but leave their tables in place',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list the months that would be archived',
+        )
+
+    def handle(self, *args, **options):
+        partitioned = partitions.is_partitioned()
+        if partitioned and not options['dry_run']:
+            for month in partitions.ensure_partitions(options['months_ahead']):
+                self.stdout.write(f'  Created partition {partitions.partition_name(month)}')
+
+        expired = partitions.expired_months(options['retain_months'])
+        if not expired:
+            self.stdout.write(self.style.SUCCESS('✓ No contact messages past the retention period'))
+            return
+
+        total = 0
+        for month in expired:
+            if options['dry_run']:
+                self.stdout.write(f'  Would archive {month:%Y-%m}')
+                continue
+            path, count = partitions.archive_month(month, options['archive_dir'], options['keep_tables'])
+            total += count
+            self.stdout.write(f'  {month:%Y-%m}: {count} message(s) → {path}')
+
+        if not options['dry_run']:
+            if partitioned:
+                # Detached partitions skip the delete signals that keep these current
+                reconcile_counters()
+            self.stdout.write(self.style.SUCCESS(f'✓ Archived {total} message(s) from {len(expired)} month(s)'))
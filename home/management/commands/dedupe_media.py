@@ -0,0 +1,66 @@
+"""
+Management command to move existing uploads into content-addressed storage
+Usage: python manage.py dedupe_media [--dry-run]
+"""
+from django.core.management.base import BaseCommand
+from home.models import Profile, Project, ProjectImageVariant
+from home.storage import is_content_addressed
+
+MEDIA_FIELDS = (
+    (Profile, 'profile_picture'),
+    (Project, 'image'),
+    (ProjectImageVariant, 'image'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Rename uploads to their content hash, merging byte-identical copies'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the files that would be migrated without changing anything',
+        )
+
+    def handle(self, *args, **options):
+        migrated = 0
+        legacy = {}  # legacy name -> (storage, size)
+        stored = {}  # hashed name -> size
+
+        for model, field_name in MEDIA_FIELDS:
+            for obj in model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True}):
+                field_file = getattr(obj, field_name)
+                old_name = field_file.name
+                if is_content_addressed(old_name):
+                    continue
+                storage = field_file.storage
+                if not storage.exists(old_name):
+                    self.stdout.write(self.style.WARNING(f'⚠ Missing file: {old_name}'))
+                    continue
+
+                legacy.setdefault(old_name, (storage, storage.size(old_name)))
+                if options['dry_run']:
+                    self.stdout.write(f'  would migrate {old_name}')
+                    continue
+
+                with storage.open(old_name, 'rb') as f:
+                    new_name = storage.save(old_name, f)
+                model.objects.filter(pk=obj.pk).update(**{field_name: new_name})
+                stored[new_name] = storage.size(new_name)
+                migrated += 1
+                self.stdout.write(f'  {old_name} → {new_name}')
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'✓ {len(legacy)} file(s) would be migrated'))
+            return
+
+        # Originals are no longer referenced once every row points at the hashed copy
+        before = 0
+        for name, (storage, size) in legacy.items():
+            storage.delete(name)
+            before += size
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Migrated {migrated} reference(s) from {len(legacy)} file(s)'))
+        after = sum(stored.values())
+        self.stdout.write(f'  Disk used: {before / 1024:.1f} KB → {after / 1024:.1f} KB')
@@ -0,0 +1,35 @@
+"""
+Management command to build responsive derivatives for existing project images
+Usage: python manage.py generate_image_variants [--missing-only]
+"""
+from django.core.management.base import BaseCommand
+from home.models import Project
+
+
+class Command(BaseCommand):
+    help = 'Generate WebP/JPEG srcset derivatives for project images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='Skip projects that already have derivatives',
+        )
+
+    def handle(self, *args, **options):
+        projects = Project.objects.exclude(image='').exclude(image__isnull=True)
+        if options['missing_only']:
+            projects = projects.filter(image_variants__isnull=True)
+
+        generated = 0
+        for project in projects.distinct():
+            try:
+                variants = project.generate_image_variants()
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'❌ {project.title}: {str(e)}'))
+                continue
+            generated += 1
+            widths = sorted({v.width for v in variants})
+            self.stdout.write(f'  {project.title}: {len(variants)} files at {widths}')
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Generated derivatives for {generated} project(s)'))
@@ -0,0 +1,174 @@
+"""
+Management command to optimize every uploaded image across all CPU cores
+Usage: python manage.py optimize_media [--jobs N] [--chunk-size N] [--dry-run] [--force]
+"""
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from home.cache import bump_content_version
+from home.image_utils import reencode_image_bytes
+from home.models import Profile, Project, OptimizedMedia
+
+# Longest side allowed for each kind of upload
+MAX_DIMENSIONS = {
+    'profile': 1200,
+    'project': 1920,
+}
+
+
+def _optimize(data, max_size):
+    # Runs in a worker process
+    return reencode_image_bytes(data, max_width=max_size, max_height=max_size)
+
+
+class Command(BaseCommand):
+    help = 'Re-encode profile and project images in parallel, skipping already optimized files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes (default: number of CPU cores)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help='Files held in memory at once (default: 4 per worker process)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report the savings without writing any files',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-process files even if their hash matches the recorded optimized version',
+        )
+
+    def _collect(self):
+        """Yield (kind, instance, field_file) for every stored image."""
+        for profile in Profile.objects.exclude(profile_picture='').exclude(profile_picture__isnull=True).iterator():
+            yield 'profile', profile, profile.profile_picture
+        for project in Project.objects.exclude(image='').exclude(image__isnull=True).iterator():
+            yield 'project', project, project.image
+
+    def _read(self, chunk, force):
+        """Bytes of each file in `chunk` not already optimized; returns (jobs, number skipped)."""
+        recorded = dict(
+            OptimizedMedia.objects.filter(path__in=[f.name for _, _, f in chunk]).values_list('path', 'sha256')
+        )
+        jobs = []
+        skipped = 0
+        for kind, instance, field_file in chunk:
+            try:
+                with field_file.open('rb') as f:
+                    data = f.read()
+            except (FileNotFoundError, OSError) as e:
+                self.stdout.write(self.style.WARNING(f'⚠ {field_file.name}: {str(e)}'))
+                continue
+            if not force and recorded.get(field_file.name) == hashlib.sha256(data).hexdigest():
+                skipped += 1
+                continue
+            jobs.append((kind, instance, field_file, data))
+        return jobs, skipped
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        workers = max(1, options['jobs'])
+        chunk_size = max(1, options['chunk_size'] or workers * 4)
+
+        self.stdout.write(
+            f'🔄 Optimizing images with {workers} worker(s){" (dry run)" if dry_run else ""}'
+        )
+
+        bytes_in = bytes_out = processed = skipped = 0
+        started = time.perf_counter()
+        files = self._collect()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # A chunk at a time, so memory stays bounded however many files there are
+            while chunk := list(islice(files, chunk_size)):
+                jobs, chunk_skipped = self._read(chunk, options['force'])
+                skipped += chunk_skipped
+                futures = {
+                    pool.submit(_optimize, data, MAX_DIMENSIONS[kind]): (kind, instance, field_file, data)
+                    for kind, instance, field_file, data in jobs
+                }
+                for future in as_completed(futures):
+                    kind, instance, field_file, data = futures.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f'❌ {field_file.name}: {str(e)}'))
+                        continue
+
+                    processed += 1
+                    bytes_in += len(data)
+                    content = data
+                    if result and len(result[0]) < len(data):
+                        content = result[0]
+                    bytes_out += len(content)
+
+                    self.stdout.write(
+                        f'  {field_file.name}: {len(data) / 1024:.1f} KB → {len(content) / 1024:.1f} KB'
+                    )
+                    if not dry_run:
+                        self._store(kind, instance, field_file, data, content, result)
+        elapsed = time.perf_counter() - started
+
+        saved = bytes_in - bytes_out
+        reduction = (saved / bytes_in) * 100 if bytes_in else 0
+        throughput = (bytes_in / (1024 * 1024)) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Processed {processed} file(s) in {elapsed:.2f}s; {skipped} already optimized'
+        ))
+        self.stdout.write(f'  Bytes saved: {saved / 1024:.1f} KB ({reduction:.1f}%)')
+        self.stdout.write(f'  Throughput: {throughput:.2f} MB/s, {processed / elapsed if elapsed else 0:.1f} files/s')
+
+    def _store(self, kind, instance, field_file, original, content, result):
+        """
+        Save the smaller file, point the row at it, then release the original.
+
+        The row is only switched if it still references the original, so an
+        upload made meanwhile is kept; the file that lost is released instead.
+        """
+        name = field_file.name
+        if content is not original:
+            storage = field_file.storage
+            new_name = storage.save(name, ContentFile(content))
+            if new_name == name:
+                # Same bytes already stored under this name; save() added a reference
+                storage.delete(new_name)
+            else:
+                _, width, height = result
+                if kind == 'profile':
+                    swapped = Profile.objects.filter(pk=instance.pk, profile_picture=name).update(
+                        profile_picture=new_name, file_size=len(content), image_width=width, image_height=height,
+                    )
+                else:
+                    swapped = Project.objects.filter(pk=instance.pk, image=name).update(image=new_name)
+                if not swapped:
+                    storage.delete(new_name)
+                    self.stdout.write(self.style.WARNING(f'⚠ {name}: replaced while optimizing, skipped'))
+                    return
+                storage.delete(name)
+                name = new_name
+                # QuerySet.update() skips post_save, so invalidate cached pages here
+                bump_content_version(kind)
+
+        OptimizedMedia.objects.filter(path=field_file.name).exclude(path=name).delete()
+        OptimizedMedia.objects.update_or_create(
+            path=name,
+            defaults={
+                'sha256': hashlib.sha256(content).hexdigest(),
+                'original_size': len(original),
+                'optimized_size': len(content),
+            },
+        )
@@ -44,6 +44,7 @@ class Command(BaseCommand):
             profile.image_width = img.width
             profile.image_height = img.height
             profile.file_size = profile.profile_picture.size
+            profile.processing_state = Profile.STATE_READY
             
             profile.save()
             
@@ -0,0 +1,64 @@
+"""
+Management command that delivers queued emails from the outbox
+Usage: python manage.py process_outbox [--once] [--batch-size 50] [--interval 5]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from home import metrics
+from home.outbox import send_pending
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending outbox emails over a reused SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the currently due emails and exit instead of polling',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Maximum number of emails sent per SMTP connection (default: 50)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls when the outbox is empty (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total_sent = total_failed = 0
+
+        if not options['once']:
+            # The long-running mailer publishes its delivery metrics for /metrics
+            metrics.share()
+
+        self.stdout.write('📬 Processing email outbox...')
+        try:
+            while True:
+                sent, failed = send_pending(batch_size=batch_size)
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    self.stdout.write(f'  Sent: {sent}  Failed: {failed}')
+                    # Publish the delivery metrics before going idle
+                    metrics.flush()
+
+                # A full batch means more may be due right away
+                if sent + failed >= batch_size:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Outbox processed: {total_sent} sent, {total_failed} failed'
+        ))
@@ -0,0 +1,19 @@
+"""
+Management command to rebuild the full-text search index
+Usage: python manage.py rebuild_search_index  (after bulk QuerySet.update() edits or a restore)
+"""
+from django.core.management.base import BaseCommand
+from home import search
+from home.models import Blog, Project
+
+
+class Command(BaseCommand):
+    help = 'Re-index every blog post and project for full-text search'
+
+    def handle(self, *args, **options):
+        if search.backend() is None:
+            self.stdout.write(self.style.WARNING('⚠ This database has no full-text index; nothing to do'))
+            return
+
+        indexed = search.rebuild_index(Blog, Project)
+        self.stdout.write(self.style.SUCCESS(f'✓ Indexed {indexed} row(s) on {search.backend()}'))
@@ -0,0 +1,24 @@
+"""
+Management command to correct drift in the admin sidebar counters
+Usage: python manage.py reconcile_counters  (e.g. hourly from cron)
+"""
+from django.core.management.base import BaseCommand
+from home.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recount content tables and fix any drifted sidebar counters'
+
+    def handle(self, *args, **options):
+        changes = reconcile_counters()
+
+        if not changes:
+            self.stdout.write(self.style.SUCCESS('✓ All counters are accurate'))
+            return
+
+        for name, (old, new) in changes.items():
+            if old is None:
+                self.stdout.write(f'  {name}: created with {new}')
+            else:
+                self.stdout.write(self.style.WARNING(f'  {name}: {old} → {new}'))
+        self.stdout.write(self.style.SUCCESS(f'✓ Reconciled {len(changes)} counter(s)'))
@@ -0,0 +1,28 @@
+"""
+Management command to reschedule profile images whose optimization never finished
+Usage: python manage.py requeue_image_jobs [--older-than 300]
+"""
+from django.core.management.base import BaseCommand
+from home.image_tasks import requeue_stale_jobs, shutdown_executor
+
+
+class Command(BaseCommand):
+    help = 'Optimize again the profile images left pending or processing by a lost worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=float,
+            default=None,
+            help='Seconds a job must be unfinished to count as lost (default: IMAGE_PROCESSING_TIMEOUT)',
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs(options['older_than'])
+        # Let the jobs finish before the command exits
+        shutdown_executor()
+
+        if not requeued:
+            self.stdout.write(self.style.SUCCESS('✓ No stale image jobs'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'✓ Requeued {len(requeued)} image job(s)'))
@@ -0,0 +1,163 @@
+"""
+Markdown rendering for blog posts.
+
+Posts are rendered once, when they are saved, and the HTML is stored next
+to the source. The renderer covers the everyday subset of Markdown
+(headings, paragraphs, emphasis, inline and fenced code, links, images,
+lists, blockquotes and rules). It is sanitized by construction: every
+character of the source is HTML-escaped before any markup is added, so
+raw HTML in a post is shown as text, and link/image URLs are limited to
+http(s), mailto and site-relative targets.
+"""
+import html
+import math
+import re
+
+from django.utils.html import escape, strip_tags
+from django.utils.text import Truncator
+
+WORDS_PER_MINUTE = 200
+EXCERPT_WORDS = 40
+
+_SAFE_URL_RE = re.compile(r'^(https?://|mailto:|/|#)', re.IGNORECASE)
+_FENCE_RE = re.compile(r'^(```|~~~)')
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_RULE_RE = re.compile(r'^(\*\s*){3,}$|^(-\s*){3,}$|^(_\s*){3,}$')
+_UL_RE = re.compile(r'^[-*+]\s+(.*)$')
+_OL_RE = re.compile(r'^\d+[.)]\s+(.*)$')
+_QUOTE_RE = re.compile(r'^>\s?(.*)$')
+
+_CODE_SPAN_RE = re.compile(r'`([^`]+)`')
+_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\(([^)\s]+)\)')
+_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)')
+_STRONG_RE = re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1')
+_EM_RE = re.compile(r'(?<![\w*])([*_])(?=\S)(.+?)(?<=\S)\1(?![\w*])')
+
+
+def _safe_url(url):
+    """The escaped URL if its scheme is allowed, else None."""
+    url = html.unescape(url)
+    if not _SAFE_URL_RE.match(url):
+        return None
+    return escape(url)
+
+
+def _inline(text):
+    """Render inline markup in one block of source text."""
+    text = escape(text)
+
+    # Code spans are set aside so nothing inside them is interpreted
+    spans = []
+
+    def stash(match):
+        spans.append(f'<code>{match.group(1)}</code>')
+        return f'\x00{len(spans) - 1}\x00'
+
+    text = _CODE_SPAN_RE.sub(stash, text)
+
+    def image(match):
+        url = _safe_url(match.group(2))
+        if url is None:
+            return match.group(1)
+        return f'<img src="{url}" alt="{match.group(1)}" loading="lazy">'
+
+    def link(match):
+        url = _safe_url(match.group(2))
+        if url is None:
+            return match.group(1)
+        rel = ' rel="nofollow noopener"' if url.lower().startswith('http') else ''
+        return f'<a href="{url}"{rel}>{match.group(1)}</a>'
+
+    text = _IMAGE_RE.sub(image, text)
+    text = _LINK_RE.sub(link, text)
+    text = _STRONG_RE.sub(r'<strong>\2</strong>', text)
+    text = _EM_RE.sub(r'<em>\2</em>', text)
+    return re.sub('\x00(\\d+)\x00', lambda m: spans[int(m.group(1))], text)
+
+
+def render_markdown(source):
+    """Convert Markdown source to sanitized HTML."""
+    lines = (source or '').replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    blocks = []
+    paragraph = []
+    i = 0
+
+    def flush_paragraph():
+        if paragraph:
+            blocks.append(f'<p>{_inline(" ".join(paragraph))}</p>')
+            paragraph.clear()
+
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        fence = _FENCE_RE.match(stripped)
+        if fence:
+            flush_paragraph()
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith(fence.group(1)):
+                code.append(lines[i])
+                i += 1
+            blocks.append('<pre><code>' + escape('\n'.join(code)) + '</code></pre>')
+            i += 1
+            continue
+
+        if not stripped:
+            flush_paragraph()
+            i += 1
+            continue
+
+        heading = _HEADING_RE.match(stripped)
+        if heading:
+            flush_paragraph()
+            level = len(heading.group(1))
+            blocks.append(f'<h{level}>{_inline(heading.group(2))}</h{level}>')
+            i += 1
+            continue
+
+        if _RULE_RE.match(stripped):
+            flush_paragraph()
+            blocks.append('<hr>')
+            i += 1
+            continue
+
+        for pattern, tag in ((_UL_RE, 'ul'), (_OL_RE, 'ol')):
+            if pattern.match(stripped):
+                flush_paragraph()
+                items = []
+                while i < len(lines) and pattern.match(lines[i].strip()):
+                    items.append(f'<li>{_inline(pattern.match(lines[i].strip()).group(1))}</li>')
+                    i += 1
+                blocks.append(f'<{tag}>' + '\n'.join(items) + f'</{tag}>')
+                break
+        else:
+            if _QUOTE_RE.match(stripped):
+                flush_paragraph()
+                quoted = []
+                while i < len(lines) and _QUOTE_RE.match(lines[i].strip()):
+                    quoted.append(_QUOTE_RE.match(lines[i].strip()).group(1))
+                    i += 1
+                blocks.append('<blockquote>' + render_markdown('\n'.join(quoted)) + '</blockquote>')
+                continue
+
+            paragraph.append(stripped)
+            i += 1
+
+    flush_paragraph()
+    return '\n'.join(blocks)
+
+
+def html_to_text(rendered):
+    """Plain text of rendered HTML, for excerpts, word counts and search."""
+    return ' '.join(html.unescape(strip_tags(rendered)).split())
+
+
+def reading_time(text):
+    """Whole minutes needed to read `text`, at least 1."""
+    return max(1, math.ceil(len(text.split()) / WORDS_PER_MINUTE))
+
+
+def summarize(text, words=EXCERPT_WORDS):
+    """The first `words` words of plain text, ellipsized."""
+    return Truncator(text).words(words, truncate='…')
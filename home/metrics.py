@@ -0,0 +1,337 @@
+"""
+Prometheus metrics, aggregated across app-server worker processes.
+
+Each process keeps its counters and histograms in memory. Recording a value
+costs a lock and a few dict updates; at most once every
+METRICS_FLUSH_INTERVAL seconds the process also writes its totals to its own
+JSON file in METRICS_DIR. `/metrics` sums the files of every process into
+the Prometheus text format, so there is nothing to run or reach besides the
+site itself.
+
+Only processes that call share() write files: gunicorn workers (post_fork)
+and the process_outbox mailer. Tests, other management commands and the
+tools/ scripts keep their values to themselves, so nothing they record is
+summed into the site's totals; /metrics in such a process (or without
+METRICS_DIR) reports that process alone.
+
+Files of exited gunicorn workers are folded into an archive file by the
+master (see gunicorn.conf.py), so totals survive worker recycling without
+the directory growing.
+"""
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+ARCHIVE_NAME = 'archive.json'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_lock = threading.Lock()
+# {metric name: {label values (tuple): number, or [bucket counts..., sum, count]}}
+_values = {}
+_metrics = {}
+_last_flush = 0.0
+# Set by share() in the processes that publish to METRICS_DIR
+_shared = False
+# Unique per process, so a recycled pid never reuses an older file
+_file_name = None
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        _metrics[name] = self
+        _values[name] = {}
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with _lock:
+            series = _values[self.name]
+            series[labels] = series.get(labels, 0) + amount
+        _maybe_flush()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        # One slot per bucket plus +Inf, then sum and count
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            series = _values[self.name]
+            counts = series.get(labels)
+            if counts is None:
+                counts = series[labels] = [0] * (len(self.buckets) + 3)
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+        _maybe_flush()
+
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by route pattern.', ['route', 'method'],
+)
+RESPONSES = Counter(
+    'http_responses_total', 'Responses sent, by route pattern and status code.', ['route', 'method', 'status'],
+)
+REQUEST_SQL = Histogram(
+    'http_request_sql_seconds', 'Time spent in SQL per request, by route pattern.', ['route'], SQL_BUCKETS,
+)
+REQUEST_QUERIES = Counter(
+    'http_request_queries_total', 'SQL queries run by requests, by route pattern.', ['route'],
+)
+EMAIL_SEND = Histogram(
+    'email_send_duration_seconds', 'SMTP delivery time of outbox emails.', ['outcome'], SLOW_BUCKETS,
+)
+EMAIL_FAILURES = Counter(
+    'email_send_failures_total', 'Outbox emails that could not be delivered, by error type.', ['error'],
+)
+IMAGE_OPTIMIZATION = Histogram(
+    'image_optimization_duration_seconds', 'Decode, resize and encode time of uploaded images.', ['kind'],
+    SLOW_BUCKETS,
+)
+IMAGE_FAILURES = Counter(
+    'image_optimization_failures_total', 'Uploaded images that could not be optimized.', ['kind'],
+)
+
+
+# ============================================================
+# PER-PROCESS FILES
+# ============================================================
+
+def share(enabled=True):
+    """Publish this process's totals to METRICS_DIR and report every process's."""
+    global _shared
+    _shared = enabled
+
+
+def _directory():
+    # Where this process publishes and reads; housekeeping in the gunicorn
+    # master uses METRICS_DIR directly
+    return settings.METRICS_DIR if _shared else None
+
+
+def _own_file():
+    global _file_name
+    if _file_name is None or not _file_name.startswith(f'{os.getpid()}-'):
+        _file_name = f'{os.getpid()}-{time.time_ns()}.json'
+    return _file_name
+
+
+def _snapshot():
+    with _lock:
+        return {
+            name: {json.dumps(labels): (list(value) if isinstance(value, list) else value)
+                   for labels, value in series.items()}
+            for name, series in _values.items()
+        }
+
+
+def _write(path, data):
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def flush():
+    """Write this process's totals to its file in METRICS_DIR."""
+    global _last_flush
+    _last_flush = time.monotonic()
+    directory = _directory()
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        _write(os.path.join(directory, _own_file()), _snapshot())
+
+
+def _maybe_flush():
+    if _directory() and time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL:
+        flush()
+
+
+atexit.register(lambda: _directory() and flush())
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _merge(total, data):
+    for name, series in data.items():
+        target = total.setdefault(name, {})
+        for labels, value in series.items():
+            if isinstance(value, list):
+                current = target.get(labels)
+                target[labels] = value if current is None else [a + b for a, b in zip(current, value)]
+            else:
+                target[labels] = target.get(labels, 0) + value
+    return total
+
+
+def mark_process_dead(pid):
+    """
+    Fold the files of exited process `pid` into the archive.
+
+    Runs in the gunicorn master, one worker at a time. The archive lists the
+    files it already contains so a concurrent scrape never counts them twice.
+    """
+    directory = settings.METRICS_DIR
+    if not directory or not os.path.isdir(directory):
+        return
+    dead = [name for name in os.listdir(directory) if name.startswith(f'{pid}-') and name.endswith('.json')]
+    if not dead:
+        return
+
+    with open(os.path.join(directory, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive_path = os.path.join(directory, ARCHIVE_NAME)
+        archive = _read(archive_path) or {'merged': [], 'values': {}}
+        present = set(os.listdir(directory))
+        for name in dead:
+            _merge(archive['values'], _read(os.path.join(directory, name)))
+        archive['merged'] = sorted({n for n in archive['merged'] if n in present} | set(dead))
+        _write(archive_path, archive)
+        for name in dead:
+            os.remove(os.path.join(directory, name))
+
+
+def reset():
+    """Forget all recorded values and remove every file in METRICS_DIR."""
+    with _lock:
+        for series in _values.values():
+            series.clear()
+    directory = settings.METRICS_DIR
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(directory, name))
+
+
+def collect():
+    """Totals of every process: {metric name: {label values JSON: value}}."""
+    directory = _directory()
+    if not directory:
+        return _snapshot()
+
+    flush()
+    # Live files are read before the archive; see mark_process_dead()
+    live = {
+        name: _read(os.path.join(directory, name))
+        for name in os.listdir(directory)
+        if name.endswith('.json') and name != ARCHIVE_NAME
+    }
+    archive = _read(os.path.join(directory, ARCHIVE_NAME)) or {'merged': [], 'values': {}}
+    total = _merge({}, archive['values'])
+    for name, data in live.items():
+        if name not in archive['merged']:
+            _merge(total, data)
+    return total
+
+
+# ============================================================
+# EXPOSITION
+# ============================================================
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(values=None):
+    """The Prometheus text exposition (version 0.0.4) of `values` or collect()."""
+    values = collect() if values is None else values
+    lines = []
+    for name, metric in _metrics.items():
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for key, value in sorted(values.get(name, {}).items()):
+            labels = json.loads(key)
+            if metric.kind == 'counter':
+                lines.append(f'{name}{_labels(metric.labels, labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip((*metric.buckets, float('inf')), value):
+                cumulative += count
+                le = (('le', _number(bound)),)
+                lines.append(f'{name}_bucket{_labels(metric.labels, labels, le)} {cumulative}')
+            lines.append(f'{name}_sum{_labels(metric.labels, labels)} {_number(value[-2])}')
+            lines.append(f'{name}_count{_labels(metric.labels, labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+# ============================================================
+# REQUEST INSTRUMENTATION
+# ============================================================
+
+class MetricsMiddleware:
+    """Record latency, status and SQL usage of every request by route pattern."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - started)
+        return response
+
+    def _record(self, request, response, elapsed):
+        # The route pattern (not the path) keeps label cardinality bounded
+        match = request.resolver_match
+        route = f'/{match.route}' if match is not None else 'unmatched'
+        REQUEST_DURATION.observe(elapsed, route, request.method)
+        RESPONSES.inc(route, request.method, str(response.status_code))
+
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            REQUEST_SQL.observe(stats.seconds, route)
+            if stats.count:
+                REQUEST_QUERIES.inc(route, amount=stats.count)
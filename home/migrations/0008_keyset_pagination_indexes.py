@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0007_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['-created_at', 'id'], name='blog_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='education',
+            index=models.Index(fields=['order', 'id'], name='education_order_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='experience',
+            index=models.Index(fields=['order', 'id'], name='experience_order_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['order', 'id'], name='project_order_id_idx'),
+        ),
+    ]
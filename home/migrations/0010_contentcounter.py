@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    ContentCounter = apps.get_model('home', 'ContentCounter')
+    for model_name in ('project', 'blog', 'education', 'experience', 'contactmessage'):
+        model = apps.get_model('home', model_name)
+        ContentCounter.objects.create(name=model_name, value=model.objects.count())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0009_blog_updated_at_education_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0010_contentcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectImageVariant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='projects/variants/')),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('format', models.CharField(choices=[('webp', 'WebP'), ('jpg', 'JPEG')], max_length=4)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_variants', to='home.project')),
+            ],
+            options={
+                'ordering': ['format', 'width'],
+            },
+        ),
+    ]
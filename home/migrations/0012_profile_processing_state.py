@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0011_projectimagevariant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='processing_state',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', editable=False, max_length=10),
+        ),
+    ]
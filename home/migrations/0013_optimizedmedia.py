@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0012_profile_processing_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OptimizedMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(max_length=64)),
+                ('original_size', models.PositiveIntegerField(default=0)),
+                ('optimized_size', models.PositiveIntegerField(default=0)),
+                ('optimized_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Optimized media',
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:10
+
+import home.storage
+import home.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0013_optimizedmedia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(max_length=64)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='profile_picture',
+            field=models.ImageField(blank=True, help_text='Upload a profile picture (JPG, PNG, GIF, WebP). Max 5MB, recommended 200x200px or larger.', null=True, storage=home.storage.ContentAddressedStorage(), upload_to='profile/', validators=[home.validators.validate_profile_image]),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=home.storage.ContentAddressedStorage(), upload_to='projects/'),
+        ),
+        migrations.AlterField(
+            model_name='projectimagevariant',
+            name='image',
+            field=models.ImageField(storage=home.storage.ContentAddressedStorage(), upload_to='projects/variants/'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_tech_tags(apps, schema_editor):
+    Project = apps.get_model('home', 'Project')
+    TechTag = apps.get_model('home', 'TechTag')
+    ProjectTechTag = apps.get_model('home', 'ProjectTechTag')
+
+    tags = {}
+    links = []
+    for project in Project.objects.only('id', 'tech_stack').iterator():
+        seen = set()
+        for part in (project.tech_stack or '').split(','):
+            name = ' '.join(part.split())
+            key = name.lower()
+            if not name or key in seen:
+                continue
+            seen.add(key)
+            if key not in tags:
+                tags[key] = TechTag.objects.create(name=name, normalized_name=key)
+            links.append(ProjectTechTag(project_id=project.id, tag=tags[key], position=len(seen) - 1))
+    ProjectTechTag.objects.bulk_create(links)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0014_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TechTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('normalized_name', models.CharField(max_length=100, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectTechTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tech_links', to='home.project')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_links', to='home.techtag')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tech_tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='projects', through='home.ProjectTechTag', to='home.techtag'),
+        ),
+        migrations.AddConstraint(
+            model_name='projecttechtag',
+            constraint=models.UniqueConstraint(fields=('project', 'tag'), name='unique_project_tech_tag'),
+        ),
+        migrations.RunPython(backfill_tech_tags, migrations.RunPython.noop),
+    ]
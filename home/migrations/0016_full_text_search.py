@@ -0,0 +1,109 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_INDEXES = (
+    ('blog', 'blog_search_idx'),
+    ('project', 'project_search_idx'),
+)
+
+# Frozen copies of home.search as of this migration, so later changes to the
+# app cannot change what it does
+FTS_TABLE = 'home_search_index'
+FTS_CREATE_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    'kind UNINDEXED, object_id UNINDEXED, published UNINDEXED, title, body, '
+    "tokenize = 'porter unicode61')"
+)
+FTS_DROP_SQL = f'DROP TABLE IF EXISTS {FTS_TABLE}'
+
+
+def create_search_indexes(apps, schema_editor):
+    """GIN indexes on PostgreSQL, the FTS5 fallback table on SQLite."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for model_name, index_name in SEARCH_INDEXES:
+            schema_editor.add_index(
+                apps.get_model('home', model_name),
+                django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name=index_name),
+            )
+    elif vendor == 'sqlite':
+        schema_editor.execute(FTS_CREATE_SQL)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for model_name, index_name in SEARCH_INDEXES:
+            schema_editor.remove_index(
+                apps.get_model('home', model_name),
+                django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name=index_name),
+            )
+    elif vendor == 'sqlite':
+        schema_editor.execute(FTS_DROP_SQL)
+
+
+def backfill_search_index(apps, schema_editor):
+    SearchVector = django.contrib.postgres.search.SearchVector
+    Blog = apps.get_model('home', 'Blog')
+    Project = apps.get_model('home', 'Project')
+
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        Blog.objects.update(
+            search_vector=SearchVector('title', weight='A', config='english')
+            + SearchVector('content', weight='B', config='english'),
+        )
+        Project.objects.update(
+            search_vector=SearchVector('title', weight='A', config='english')
+            + SearchVector('tech_stack', weight='B', config='english')
+            + SearchVector('description', weight='C', config='english'),
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (kind, object_id, published, title, body) '
+            f"SELECT 'blog', id, is_published, title, content FROM {Blog._meta.db_table}"
+        )
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (kind, object_id, published, title, body) '
+            f"SELECT 'project', id, 1, title, description || char(10) || tech_stack FROM {Project._meta.db_table}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0015_techtag'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # GIN is PostgreSQL-only, so the index is created conditionally
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='blog',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='blog_search_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='project',
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='project_search_idx'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_indexes, drop_search_indexes),
+            ],
+        ),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def partition_contacts(apps, schema_editor):
+    """Range-partition the contact table by month; PostgreSQL only."""
+    from home import partitions
+
+    if schema_editor.connection.vendor == 'postgresql':
+        partitions.partition_table(schema_editor, apps.get_model('home', 'ContactMessage'))
+
+
+def unpartition_contacts(apps, schema_editor):
+    from home import partitions
+
+    if schema_editor.connection.vendor == 'postgresql':
+        partitions.unpartition_table(schema_editor, apps.get_model('home', 'ContactMessage'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0018_contact_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboundemail',
+            name='contact',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='emails', to='home.contactmessage'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['-created_at', 'id'], name='contact_created_id_idx'),
+        ),
+        migrations.RunPython(partition_contacts, unpartition_contacts),
+    ]
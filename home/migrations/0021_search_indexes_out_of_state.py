@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Take the GIN search indexes out of the model state.
+
+    0016 only creates them on PostgreSQL, but recorded them in the state for
+    every database, so SQLite tracked indexes it does not have (and would
+    try to build them whenever a table is remade). The indexes themselves
+    stay in place; 0016 creates and drops them.
+    """
+
+    dependencies = [
+        ('home', '0020_outbox_sending_lease'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(model_name='blog', name='blog_search_idx'),
+                migrations.RemoveIndex(model_name='project', name='project_search_idx'),
+            ],
+            database_operations=[],
+        ),
+    ]
@@ -1,13 +1,34 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.core.files.base import ContentFile
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import slugify
+from .cache import bump_content_version
+from .image_ingest import sniff_image
 from .validators import validate_profile_image
-from .image_utils import compress_and_optimize_profile_image
+from .image_utils import generate_derivatives
+from .markup import html_to_text, reading_time, render_markdown, summarize
+from .storage import content_addressed_storage
+import hashlib
 import os
 
 
 class Profile(models.Model):
+    STATE_PENDING = 'pending'
+    STATE_PROCESSING = 'processing'
+    STATE_READY = 'ready'
+    STATE_FAILED = 'failed'
+    STATE_CHOICES = [
+        (STATE_PENDING, 'Pending'),
+        (STATE_PROCESSING, 'Processing'),
+        (STATE_READY, 'Ready'),
+        (STATE_FAILED, 'Failed'),
+    ]
+
     profile_picture = models.ImageField(
         upload_to='profile/',
+        storage=content_addressed_storage,
         blank=True,
         null=True,
         validators=[validate_profile_image],
@@ -16,6 +37,9 @@ class Profile(models.Model):
     file_size = models.PositiveIntegerField(default=0, help_text='File size in bytes', editable=False)
     image_width = models.PositiveIntegerField(default=0, editable=False)
     image_height = models.PositiveIntegerField(default=0, editable=False)
+    processing_state = models.CharField(
+        max_length=10, choices=STATE_CHOICES, default=STATE_READY, editable=False,
+    )
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -41,34 +65,23 @@ class Profile(models.Model):
         if not self.pk and Profile.objects.exists():
             self.pk = Profile.objects.first().pk
         
-        # Optimize and compress image if a new one is uploaded
-        if self.profile_picture:
-            # Validate image before processing
+        # A freshly uploaded file is not committed to storage until super().save()
+        new_upload = bool(self.profile_picture) and not self.profile_picture._committed
+        if new_upload:
+            # Validate image before processing (header only, cheap)
             validate_profile_image(self.profile_picture)
-            
-            # Optimize and compress
-            from PIL import Image
-            img = Image.open(self.profile_picture)
-            self.image_width = img.width
-            self.image_height = img.height
-            
-            # Only compress if file is relatively large
-            original_size = self.profile_picture.size
-            if original_size > 500 * 1024:  # If larger than 500KB
-                optimized_file, optimized_filename = compress_and_optimize_profile_image(
-                    self.profile_picture,
-                    self.profile_picture.name
-                )
-                self.profile_picture.save(
-                    optimized_filename,
-                    optimized_file,
-                    save=False
-                )
-            
-            # Update file size
+            info = sniff_image(self.profile_picture)  # memoized by the validator
+            self.image_width, self.image_height = info.width, info.height
             self.file_size = self.profile_picture.size
+            self.processing_state = self.STATE_PENDING
         
         super().save(*args, **kwargs)
+        
+        if new_upload:
+            # Optimize and compress outside the request once the row is committed
+            from .image_tasks import schedule_profile_optimization
+            profile_id = self.pk
+            transaction.on_commit(lambda: schedule_profile_optimization(profile_id))
 
     def delete_old_image(self):
         """Delete old image file when updating"""
@@ -87,9 +100,13 @@ class Education(models.Model):
     duration = models.CharField(max_length=100)
     description = models.TextField()
     order = models.PositiveIntegerField(default=0, help_text='Lower numbers appear first')
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order', 'id'], name='education_order_id_idx'),
+        ]
         verbose_name_plural = 'Education'
 
     def __str__(self):
@@ -107,52 +124,339 @@ class Experience(models.Model):
     )
     github_link = models.URLField(blank=True)
     order = models.PositiveIntegerField(default=0, help_text='Lower numbers appear first')
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order', 'id'], name='experience_order_id_idx'),
+        ]
 
     def __str__(self):
         return self.organization
 
 
+def normalize_tech_name(name):
+    """Canonical lookup key for a tech tag: trimmed, single-spaced, lowercase."""
+    return ' '.join(name.split()).lower()
+
+
+def parse_tech_stack(value):
+    """Split a comma-separated stack into display names, dropping blanks and duplicates."""
+    names = {}
+    for part in (value or '').split(','):
+        name = ' '.join(part.split())
+        if name:
+            names.setdefault(normalize_tech_name(name), name)
+    return list(names.values())
+
+
+class TechTag(models.Model):
+    """A normalized technology name shared by every project that uses it."""
+    name = models.CharField(max_length=100)
+    normalized_name = models.CharField(max_length=100, unique=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_tech_name(self.name)
+        super().save(*args, **kwargs)
+
+
 class Project(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     tech_stack = models.CharField(max_length=200)
     github_link = models.URLField(blank=True)
     live_link = models.URLField(blank=True)
-    image = models.ImageField(upload_to='projects/', blank=True, null=True)
+    image = models.ImageField(upload_to='projects/', storage=content_addressed_storage, blank=True, null=True)
     date_created = models.DateField(auto_now_add=True)
     order = models.PositiveIntegerField(default=0, help_text='Lower numbers appear first')
+    updated_at = models.DateTimeField(auto_now=True)
+    tech_tags = models.ManyToManyField(TechTag, through='ProjectTechTag', related_name='projects', blank=True, editable=False)
+    # Maintained by home.search; only populated on PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order', 'id'], name='project_order_id_idx'),
+            # project_search_idx (GIN on search_vector) exists on PostgreSQL
+            # only, so migrations manage it outside the model state
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # A freshly uploaded file is not committed to storage until super().save()
+        new_upload = bool(self.image) and not self.image._committed
+        update_fields = kwargs.get('update_fields')
+        super().save(*args, **kwargs)
+
+        if update_fields is None or 'tech_stack' in update_fields:
+            self.sync_tech_tags()
+
+        if new_upload:
+            self.generate_image_variants()
+        elif not self.image:
+            self.delete_image_variants()
+
+    def generate_image_variants(self):
+        """Replace this project's responsive derivatives with fresh ones from `image`."""
+        self.delete_image_variants()
+        if not self.image:
+            return []
+
+        base = os.path.splitext(os.path.basename(self.image.name))[0]
+        variants = []
+        with self.image.open('rb') as source:
+            for derivative in generate_derivatives(source):
+                variant = ProjectImageVariant(
+                    project=self,
+                    width=derivative['width'],
+                    height=derivative['height'],
+                    format=derivative['format'],
+                )
+                variant.image.save(
+                    f"{base}_{derivative['width']}w.{derivative['format']}",
+                    ContentFile(derivative['content']),
+                    save=False,
+                )
+                variants.append(variant)
+        return ProjectImageVariant.objects.bulk_create(variants)
+
+    def delete_image_variants(self):
+        """Remove derivative rows for this project (signals release their files)."""
+        self.image_variants.all().delete()
+
+    def sync_tech_tags(self):
+        """
+        Point `tech_tags` at the names in `tech_stack`, keeping their order.
+
+        `tech_stack` stays the editable source; the tags are the indexed copy
+        used for rendering and filtering. Returns True if the links changed.
+        """
+        names = parse_tech_stack(self.tech_stack)
+        wanted = [normalize_tech_name(name) for name in names]
+        current = list(self.tech_links.values_list('tag__normalized_name', flat=True))
+        if current == wanted:
+            return False
+
+        tags = {tag.normalized_name: tag for tag in TechTag.objects.filter(normalized_name__in=wanted)}
+        missing = [
+            TechTag(name=name, normalized_name=key)
+            for name, key in zip(names, wanted) if key not in tags
+        ]
+        TechTag.objects.bulk_create(missing, ignore_conflicts=True)
+        if missing:
+            tags = {tag.normalized_name: tag for tag in TechTag.objects.filter(normalized_name__in=wanted)}
+
+        self.tech_links.all().delete()
+        ProjectTechTag.objects.bulk_create([
+            ProjectTechTag(project=self, tag=tags[key], position=position)
+            for position, key in enumerate(wanted)
+        ])
+        # Tags that no project uses any more
+        TechTag.objects.filter(projects__isnull=True).delete()
+
+        # The post_save bump happened before the links changed
+        bump_content_version('project')
+        return True
+
+
+class ProjectTechTag(models.Model):
+    """Links a project to a tech tag, remembering where it appears in the stack."""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tech_links')
+    tag = models.ForeignKey(TechTag, on_delete=models.CASCADE, related_name='project_links')
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['position']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'tag'], name='unique_project_tech_tag'),
+        ]
+
+    def __str__(self):
+        return f'{self.project} → {self.tag}'
+
+
+class ProjectImageVariant(models.Model):
+    """A width-bounded WebP or JPEG copy of `Project.image` used in srcset."""
+    FORMAT_CHOICES = [('webp', 'WebP'), ('jpg', 'JPEG')]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='image_variants')
+    image = models.ImageField(upload_to='projects/variants/', storage=content_addressed_storage)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    format = models.CharField(max_length=4, choices=FORMAT_CHOICES)
+
+    class Meta:
+        ordering = ['format', 'width']
+
+    def __str__(self):
+        return f'{self.project} ({self.width}w {self.format})'
+
 
 class Blog(models.Model):
     title = models.CharField(max_length=200)
-    content = models.TextField()
+    slug = models.SlugField(max_length=220, unique=True, blank=True, help_text='Leave blank to generate from the title')
+    content = models.TextField(help_text='Markdown')
     created_at = models.DateTimeField(auto_now_add=True)
     is_published = models.BooleanField(default=True, help_text='Uncheck to save as draft')
+    updated_at = models.DateTimeField(auto_now=True)
+    # Rendered from `content` on save, so no request ever converts Markdown
+    content_html = models.TextField(blank=True, editable=False)
+    excerpt = models.CharField(max_length=400, blank=True, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=1, editable=False, help_text='Minutes')
+    # Maintained by home.search; only populated on PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], name='blog_created_id_idx'),
+            # blog_search_idx: see Project.Meta
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = self._unique_slug()
+        self.render_content()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'content_html', 'excerpt', 'reading_time'}
+        super().save(*args, **kwargs)
+
+    def get_absolute_url(self):
+        return reverse('blog_detail', kwargs={'slug': self.slug})
+
+    def render_content(self):
+        """Store the sanitized HTML, excerpt and reading time of `content`."""
+        self.content_html = render_markdown(self.content)
+        text = html_to_text(self.content_html)
+        self.excerpt = summarize(text)
+        self.reading_time = reading_time(text)
+
+    def _unique_slug(self):
+        base = slugify(self.title)[:200] or 'post'
+        slug, n = base, 2
+        while Blog.objects.filter(slug=slug).exclude(pk=self.pk).exists():
+            slug, n = f'{base}-{n}', n + 1
+        return slug
+
 
 class ContactMessage(models.Model):
     name = models.CharField(max_length=100)
     email = models.EmailField()
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Hash of the normalized name, email and message (see home.submissions)
+    fingerprint = models.CharField(max_length=64, blank=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], name='contact_created_id_idx'),
+            models.Index(fields=['fingerprint', 'created_at'], name='contact_fingerprint_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        if not self.fingerprint:
+            self.fingerprint = self.compute_fingerprint(self.name, self.email, self.message)
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def compute_fingerprint(name, email, message):
+        """Equal for submissions differing only in case and whitespace."""
+        parts = (' '.join(str(value).split()).casefold() for value in (name, email, message))
+        return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+
+
+class OutboundEmail(models.Model):
+    """Email queued in the same transaction as the row that triggered it."""
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    # Not a database constraint: the contact table is partitioned on
+    # PostgreSQL (see home.partitions)
+    contact = models.ForeignKey(
+        ContactMessage, on_delete=models.SET_NULL, null=True, blank=True, related_name='emails',
+        db_constraint=False,
+    )
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254, blank=True)
+    recipient = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When a pending email is due, or when the lease of a sending one expires
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} → {self.recipient}'
+
+
+class ContentCounter(models.Model):
+    """Row count of a content table, kept current by signals (see home.counters)."""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
+
+
+class OptimizedMedia(models.Model):
+    """Content hash of a media file after `optimize_media` processed it."""
+    path = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64)
+    original_size = models.PositiveIntegerField(default=0)
+    optimized_size = models.PositiveIntegerField(default=0)
+    optimized_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Optimized media'
+
+    def __str__(self):
+        return self.path
+
+
+class MediaBlob(models.Model):
+    """A content-addressed media file and how many fields reference it (see home.storage)."""
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.ref_count} refs)'
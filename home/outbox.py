@@ -0,0 +1,167 @@
+"""
+Durable email outbox.
+
+Contact submissions only insert rows into `OutboundEmail`; the
+`process_outbox` management command delivers them over a single SMTP
+connection per batch, retrying failures with exponential backoff.
+
+A batch is claimed in a short transaction that marks it `sending` and moves
+`next_attempt_at` EMAIL_OUTBOX_LEASE seconds ahead; the emails are then
+sent with no transaction or row lock held, and each outcome is recorded as
+soon as it is known. A worker that dies mid-batch leaves its claimed emails
+to be picked up again once the lease expires; the attempt is counted when
+claimed, so an email that keeps crashing its sender still gives up.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .metrics import EMAIL_FAILURES, EMAIL_SEND
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_contact_emails(contact):
+    """Queue the admin notification and visitor confirmation for `contact`."""
+    html_body = f"""
+        <html>
+            <body>
+                <h2>New Contact Message</h2>
+                <p><strong>Name:</strong> {contact.name}</p>
+                <p><strong>Email:</strong> {contact.email}</p>
+                <p><strong>Message:</strong></p>
+                <p>{contact.message.replace(chr(10), '<br>')}</p>
+            </body>
+        </html>
+        """
+    confirmation_html = render_to_string(
+        'main/emails/confirmations_email.html',
+        {'name': contact.name, 'message': contact.message},
+    )
+    return OutboundEmail.objects.bulk_create([
+        # Email notification to admin
+        OutboundEmail(
+            contact=contact,
+            subject=f'New Contact Message from {contact.name}',
+            body=f"Name: {contact.name}\nEmail: {contact.email}\nMessage:\n{contact.message}",
+            html_body=html_body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient=settings.EMAIL_HOST_USER,
+        ),
+        # Confirmation email to the visitor
+        OutboundEmail(
+            contact=contact,
+            subject='Thank You for Reaching Out — Arun Sah\'s Portfolio',
+            body=f'Hi {contact.name}, thank you for visiting my portfolio and reaching out. I have received your message and will get back to you soon.',
+            html_body=confirmation_html,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient=contact.email,
+        ),
+    ])
+
+
+def _build_message(email, connection):
+    message = EmailMultiAlternatives(
+        email.subject,
+        email.body,
+        email.from_email or settings.DEFAULT_FROM_EMAIL,
+        [email.recipient],
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base, ..."""
+    return timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def _claim(batch_size, now):
+    """Mark up to `batch_size` due emails as being sent by this worker and return them."""
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True)
+            # A sending email whose lease expired was claimed by a worker that died
+            .filter(status__in=[OutboundEmail.STATUS_PENDING, OutboundEmail.STATUS_SENDING], next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        if batch:
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+                status=OutboundEmail.STATUS_SENDING,
+                next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE),
+                attempts=F('attempts') + 1,
+            )
+    for email in batch:
+        email.attempts += 1
+    return batch
+
+
+def _record(email, **fields):
+    # Only while the claim is still ours; a row reclaimed after an expired lease belongs to another worker
+    OutboundEmail.objects.filter(pk=email.pk, status=OutboundEmail.STATUS_SENDING, attempts=email.attempts).update(
+        **fields,
+    )
+
+
+def send_pending(batch_size=50):
+    """
+    Deliver up to `batch_size` due emails over one SMTP connection.
+
+    Returns:
+        Tuple of (sent_count, failed_count)
+    """
+    sent = failed = 0
+    now = timezone.now()
+
+    batch = _claim(batch_size, now)
+    if not batch:
+        return 0, 0
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        logger.error(f'✗ Could not open SMTP connection: {type(e).__name__}: {str(e)}')
+        connection = None
+
+    for email in batch:
+        started = time.perf_counter()
+        try:
+            if connection is None:
+                raise ConnectionError('SMTP connection unavailable')
+            _build_message(email, connection).send()
+        except Exception as e:
+            error = f'{type(e).__name__}: {str(e)}'
+            EMAIL_SEND.observe(time.perf_counter() - started, 'failed')
+            EMAIL_FAILURES.inc(type(e).__name__)
+            if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                _record(email, status=OutboundEmail.STATUS_FAILED, last_error=error)
+            else:
+                _record(
+                    email, status=OutboundEmail.STATUS_PENDING, last_error=error,
+                    next_attempt_at=now + _retry_delay(email.attempts),
+                )
+            failed += 1
+            logger.error(f'✗ Failed to send outbox email to {email.recipient}: {error}')
+            continue
+
+        _record(email, status=OutboundEmail.STATUS_SENT, sent_at=timezone.now(), last_error='')
+        EMAIL_SEND.observe(time.perf_counter() - started, 'sent')
+        sent += 1
+        logger.info(f'✓ Outbox email "{email.subject}" sent to {email.recipient}')
+
+    if connection is not None:
+        connection.close()
+
+    return sent, failed
@@ -0,0 +1,185 @@
+"""
+Keyset (cursor) pagination for the REST API.
+
+Pages are addressed by the ordering values of the last row seen instead of an
+OFFSET, so every page is an indexed range scan no matter how deep it is.
+Ranked search results are the exception and use numbered pages.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Opaque-cursor pagination over a unique, composite ordering."""
+    ordering = ('order', 'id')
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request)
+        return self._set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """`paginate_queryset` for async views, fetching the page with the async ORM."""
+        queryset = self._page_queryset(queryset, request)
+        return self._set_page([row async for row in queryset])
+
+    def _page_queryset(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+
+        self.position, self.reverse = self.decode_cursor(request)
+        ordering = self._ordering(self.reverse)
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._after(ordering, self.position))
+        # Fetch one extra row to learn whether another page exists
+        return queryset[:self.page_size + 1]
+
+    def _set_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, self.position is not None
+        else:
+            self.has_previous, self.has_next = self.position is not None, has_more
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def _ordering(self, reverse):
+        if not reverse:
+            return list(self.ordering)
+        return [f[1:] if f.startswith('-') else f'-{f}' for f in self.ordering]
+
+    def _after(self, ordering, position):
+        """Row-value comparison `(a, b, ...) > (x, y, ...)` expressed as Q objects."""
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': position[i]})
+            for prev_field, prev_value in zip(ordering[:i], position[:i]):
+                term &= Q(**{prev_field.lstrip('-'): prev_value})
+            condition |= term
+        return condition
+
+    def _position(self, row):
+        values = []
+        for field in self.ordering:
+            value = getattr(row, field.lstrip('-'))
+            if isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            values.append(value)
+        return values
+
+    def encode_cursor(self, position, reverse=False):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            raw = payload['p']
+            if len(raw) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, raw)
+            ]
+            return position, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class CreatedAtKeysetPagination(KeysetPagination):
+    """Newest first, for models ordered by `-created_at`."""
+    ordering = ('-created_at', 'id')
+
+
+class SearchPagination(PageNumberPagination):
+    """
+    Numbered pages for ranked search results.
+
+    Relevance order has no stable keyset, and `SearchResults` only fetches
+    the requested slice, so offset pages stay cheap here.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
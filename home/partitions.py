@@ -0,0 +1,265 @@
+"""
+Monthly partitions of the contact message table, and their retention.
+
+On PostgreSQL `home_contactmessage` is range-partitioned by `created_at`,
+one partition per calendar month (UTC) plus a default partition for rows
+outside them. Queries bounded by `created_at` (recent messages, duplicate
+detection) only touch the partitions they need, and an expired month
+leaves the table by detaching its partition instead of a large DELETE.
+
+The primary key becomes (id, created_at), as PostgreSQL requires the
+partition key in it; ids still come from one sequence, so `id` alone stays
+unique. Foreign keys cannot reference a partitioned table without the full
+key, so `OutboundEmail.contact` is not enforced by the database.
+
+`archive_contact_messages` keeps partitions created ahead of time and
+moves expired months to gzipped JSON Lines files. Months that reached the
+default partition (because the command did not run for a while) get a
+partition of their own first, so they are archived like any other. Other databases, and
+PostgreSQL before the migration, archive the same months row by row.
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+
+TABLE = 'home_contactmessage'
+DEFAULT_PARTITION = f'{TABLE}_default'
+SEQUENCE = f'{TABLE}_id_seq'
+# Partitions created ahead of the current month by the migration
+MONTHS_AHEAD = 3
+
+
+def month_start(moment):
+    """First instant (UTC) of the month containing `moment`."""
+    moment = moment.astimezone(dt_timezone.utc) if timezone.is_aware(moment) else moment
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year}m{month.month:02d}'
+
+
+def retention_cutoff(retain_months, now=None):
+    """Months that ended before this are expired: the current month plus `retain_months` are kept."""
+    return add_months(month_start(now or timezone.now()), -retain_months)
+
+
+def _bound(moment):
+    # Generated from datetimes, never from input, so safe to inline in DDL
+    return f"'{moment.isoformat()}'"
+
+
+def _partition_of_sql(month):
+    return (
+        f'CREATE TABLE {partition_name(month)} PARTITION OF {TABLE} '
+        f'FOR VALUES FROM ({_bound(month)}) TO ({_bound(add_months(month, 1))})'
+    )
+
+
+# ============================================================
+# MIGRATION
+# ============================================================
+
+def partition_table(schema_editor, model):
+    """Convert the plain contact table into a partitioned one, keeping its rows."""
+    execute = schema_editor.execute
+    old = f'{TABLE}_unpartitioned'
+    execute(f'ALTER TABLE {TABLE} RENAME TO {old}')
+    execute(f'CREATE TABLE {TABLE} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)')
+    execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT')
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN(created_at) FROM {old}')
+        (oldest,) = cursor.fetchone()
+    current = month_start(timezone.now())
+    month = month_start(oldest) if oldest else current
+    while month <= add_months(current, MONTHS_AHEAD):
+        execute(_partition_of_sql(month))
+        month = add_months(month, 1)
+
+    execute(f'INSERT INTO {TABLE} SELECT * FROM {old}')
+    # Takes the old identity sequence with it; ids continue from a new one
+    execute(f'DROP TABLE {old}')
+    execute(f'CREATE SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id')
+    execute(f"SELECT setval('{SEQUENCE}', COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}")
+    execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+    execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id, created_at)')
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+def unpartition_table(schema_editor, model):
+    """Turn the partitioned table back into a plain one with the attached partitions' rows."""
+    execute = schema_editor.execute
+    partitioned = f'{TABLE}_partitioned'
+    execute(f'ALTER TABLE {TABLE} RENAME TO {partitioned}')
+    execute(f'CREATE TABLE {TABLE} (LIKE {partitioned})')
+    execute(f'INSERT INTO {TABLE} SELECT * FROM {partitioned}')
+    execute(f'DROP TABLE {partitioned}')
+    execute(f'ALTER TABLE {TABLE} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY')
+    execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}"
+    )
+    execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY (id)')
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+
+
+# ============================================================
+# PARTITION MAINTENANCE
+# ============================================================
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)', [TABLE])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def partitions():
+    """Months that have an attached partition, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s)',
+            [TABLE],
+        )
+        names = {name for (name,) in cursor.fetchall()}
+    months = []
+    for name in names - {DEFAULT_PARTITION}:
+        year, month = name.removeprefix(f'{TABLE}_y').split('m')
+        months.append(datetime(int(year), int(month), 1, tzinfo=dt_timezone.utc))
+    return sorted(months)
+
+
+def create_partition(month):
+    """
+    Add the partition for `month`.
+
+    The table is built detached and then attached, so rows for the month
+    that already went to the default partition can be moved into it first.
+    """
+    name, end = partition_name(month), add_months(month, 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s '
+            f'RETURNING *) INSERT INTO {name} SELECT * FROM moved',
+            [month, end],
+        )
+        cursor.execute(
+            f'ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({_bound(month)}) TO ({_bound(end)})'
+        )
+
+
+def default_months():
+    """Months with rows in the default partition, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') FROM {DEFAULT_PARTITION}"
+        )
+        return sorted(month.replace(tzinfo=dt_timezone.utc) for (month,) in cursor.fetchall())
+
+
+def ensure_partitions(months_ahead, now=None):
+    """
+    Create the missing partitions up to `months_ahead` months ahead.
+
+    That includes every month with rows in the default partition, however
+    old, so no month is left there out of reach of retention.
+    """
+    existing = set(partitions())
+    current = month_start(now or timezone.now())
+    wanted = {add_months(current, offset) for offset in range(months_ahead + 1)} | set(default_months())
+    created = []
+    for month in sorted(wanted - existing):
+        create_partition(month)
+        created.append(month)
+    return created
+
+
+# ============================================================
+# ARCHIVAL
+# ============================================================
+
+def expired_months(retain_months, now=None):
+    """Months older than the retention period that still hold messages."""
+    from .models import ContactMessage
+
+    cutoff = retention_cutoff(retain_months, now)
+    if is_partitioned():
+        months = set(partitions()) | set(default_months())
+        return sorted(month for month in months if add_months(month, 1) <= cutoff)
+    return [
+        month_start(month) for month in
+        ContactMessage.objects.filter(created_at__lt=cutoff).datetimes('created_at', 'month', tzinfo=dt_timezone.utc)
+    ]
+
+
+def archive_path(directory, month):
+    return os.path.join(directory, f'{partition_name(month)}.jsonl.gz')
+
+
+def _write_archive(path, columns, rows):
+    """Write `rows` as gzipped JSON Lines, replacing `path` only once complete."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f'{path}.tmp'
+    count = 0
+    with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n')
+            count += 1
+    os.replace(tmp, path)
+    return count
+
+
+def archive_month(month, directory, keep_table=False):
+    """
+    Write the messages of `month` to `directory` and remove them from the table.
+
+    Partitions are detached (and dropped unless `keep_table`); otherwise the
+    rows are deleted. Returns (path, number of messages archived).
+    """
+    from .models import ContactMessage
+
+    columns = [field.column for field in ContactMessage._meta.concrete_fields]
+    path = archive_path(directory, month)
+
+    if not is_partitioned():
+        rows = ContactMessage.objects.filter(created_at__gte=month, created_at__lt=add_months(month, 1))
+        with transaction.atomic():
+            count = _write_archive(path, columns, rows.order_by('created_at', 'id').values_list(*columns).iterator())
+            rows.delete()
+        return path, count
+
+    if month not in partitions():
+        # Still in the default partition; see ensure_partitions()
+        create_partition(month)
+
+    name = partition_name(month)
+    with transaction.atomic():
+        # A server-side cursor, so a large month is streamed
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(f'SELECT {", ".join(columns)} FROM {name} ORDER BY created_at, id')
+            count = _write_archive(path, columns, iter(cursor))
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {name}')
+            # Not enforced by a foreign key (see above), so cleared here
+            cursor.execute(
+                f'UPDATE home_outboundemail SET contact_id = NULL WHERE contact_id IN (SELECT id FROM {name})'
+            )
+            if not keep_table:
+                cursor.execute(f'DROP TABLE {name}')
+    return path, count
@@ -0,0 +1,111 @@
+"""
+Per-request SQL instrumentation.
+
+`QueryBudgetMiddleware` wraps every query a request runs, records the
+count, the time spent in SQL and how many statements were repeats, and logs
+requests that go over QUERY_BUDGET queries or QUERY_BUDGET_MS milliseconds.
+The figures are left on `request.query_stats` for tests and other
+middleware to read.
+
+Under ASGI the middleware stays async, so async views are not pushed onto
+a thread. The ORM runs their queries in the request's sync_to_async
+thread, whose connections are not the event loop's, so the recorder is
+attached there.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """An `execute_wrapper` that counts, times and fingerprints queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+        self.executions = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+            self.executions[(sql, repr(params))] += 1
+
+    @property
+    def time_ms(self):
+        return self.seconds * 1000
+
+    @property
+    def duplicates(self):
+        """Queries that repeated an earlier one exactly, parameters included."""
+        return sum(n - 1 for n in self.executions.values())
+
+    @property
+    def similar(self):
+        """Queries that repeated an earlier statement with any parameters (N+1)."""
+        return sum(n - 1 for n in self.statements.values())
+
+    def most_repeated(self):
+        """The statement run most often and how many times, or None."""
+        if not self.statements:
+            return None
+        return self.statements.most_common(1)[0]
+
+
+def _record(stack, recorder):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(recorder))
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = request.query_stats = QueryRecorder()
+        with ExitStack() as stack:
+            _record(stack, recorder)
+            response = self.get_response(request)
+        self._check(request, recorder)
+        return response
+
+    async def __acall__(self, request):
+        recorder = request.query_stats = QueryRecorder()
+        stack = ExitStack()
+        await sync_to_async(_record)(stack, recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self._check(request, recorder)
+        return response
+
+    def _check(self, request, recorder):
+        if recorder.count > settings.QUERY_BUDGET or recorder.time_ms > settings.QUERY_BUDGET_MS:
+            view = request.resolver_match.view_name if request.resolver_match else '-'
+            sql, times = recorder.most_repeated()
+            logger.warning(
+                f'Query budget exceeded: {request.method} {request.path} ({view}) ran '
+                f'{recorder.count} queries in {recorder.time_ms:.1f} ms, '
+                f'{recorder.duplicates} duplicate, {recorder.similar} similar; '
+                f'most repeated ({times}x): {sql[:200]}'
+            )
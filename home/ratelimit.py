@@ -0,0 +1,151 @@
+"""
+Fixed-window rate limiting of contact submissions.
+
+Every client IP and every email address may send CONTACT_RATE_BURST
+messages per window of CONTACT_RATE_BURST × CONTACT_RATE_PERIOD seconds,
+one per CONTACT_RATE_PERIOD on average. A submission counts against both;
+when either is used up the request is answered with 429 before the form is
+validated or the database is touched.
+
+Windows are fixed and start at the same moments for every client, so a
+client that spends its burst just before a window ends can spend the next
+one just after: up to 2 × CONTACT_RATE_BURST messages back to back, but
+never more than that in any one window's length.
+
+Counters are taken with the cache's atomic add() and incr(), so concurrent
+requests cannot both spend the last message. Both counters are checked
+before either is taken, and a request that still loses a race gives back
+what it took, so a rejected message never uses up the other limit.
+
+Counters live in the default cache, so limits are only shared between worker
+processes when that is Redis or Memcached; with LocMem each worker counts
+on its own and the effective limit is multiplied by the number of workers.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.throttling import BaseThrottle
+
+KEY_PREFIX = 'ratelimit:contact'
+
+
+def client_ip(request):
+    """The client address, skipping RATELIMIT_PROXY_COUNT trusted proxies."""
+    proxies = settings.RATELIMIT_PROXY_COUNT
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _keys(request, email):
+    keys = [f'{KEY_PREFIX}:ip:{client_ip(request)}']
+    email = (email or '').strip().lower() if isinstance(email, str) else ''
+    if email:
+        # Hashed to keep arbitrary input within cache key limits
+        keys.append(f'{KEY_PREFIX}:email:{hashlib.sha1(email.encode(), usedforsecurity=False).hexdigest()}')
+    return keys
+
+
+def _window(now):
+    """Index of the window containing `now`, and seconds until it ends."""
+    length = settings.CONTACT_RATE_BURST * settings.CONTACT_RATE_PERIOD
+    index = int(now // length)
+    return index, (index + 1) * length - now
+
+
+def _counters(request, email, now):
+    index, wait = _window(now)
+    # Kept for a whole window whenever in it they are created
+    timeout = math.ceil(settings.CONTACT_RATE_BURST * settings.CONTACT_RATE_PERIOD)
+    return [f'{key}:{index}' for key in _keys(request, email)], wait, timeout
+
+
+def contact_wait(request, email):
+    """Seconds until `request` may submit a message as `email`; 0 counts the message."""
+    if not settings.CONTACT_RATE_LIMIT:
+        return 0.0
+    keys, wait, timeout = _counters(request, email, time.time())
+    limit = settings.CONTACT_RATE_BURST
+    if any(count >= limit for count in cache.get_many(keys).values()):
+        return wait
+    counts = []
+    for key in keys:
+        cache.add(key, 0, timeout)
+        counts.append(cache.incr(key))
+    if any(count > limit for count in counts):
+        # A concurrent request took the last message first
+        for key in keys:
+            cache.decr(key)
+        return wait
+    return 0.0
+
+
+async def acontact_wait(request, email):
+    if not settings.CONTACT_RATE_LIMIT:
+        return 0.0
+    keys, wait, timeout = _counters(request, email, time.time())
+    limit = settings.CONTACT_RATE_BURST
+    if any(count >= limit for count in (await cache.aget_many(keys)).values()):
+        return wait
+    counts = []
+    for key in keys:
+        await cache.aadd(key, 0, timeout)
+        counts.append(await cache.aincr(key))
+    if any(count > limit for count in counts):
+        for key in keys:
+            await cache.adecr(key)
+        return wait
+    return 0.0
+
+
+def _too_many(wait):
+    response = HttpResponse(
+        'Too many messages. Please try again later.', status=429, content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+def rate_limit_contact(view_func):
+    """Answer contact form POSTs over the limit with 429 before `view_func` runs."""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method == 'POST':
+                wait = await acontact_wait(request, request.POST.get('email'))
+                if wait:
+                    return _too_many(wait)
+            return await view_func(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method == 'POST':
+            wait = contact_wait(request, request.POST.get('email'))
+            if wait:
+                return _too_many(wait)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+class ContactRateThrottle(BaseThrottle):
+    """The same limits for the contact API; DRF answers with 429 and Retry-After."""
+
+    def allow_request(self, request, view):
+        self.delay = 0.0
+        if request.method != 'POST':
+            return True
+        data = request.data
+        self.delay = contact_wait(request, data.get('email') if hasattr(data, 'get') else None)
+        return not self.delay
+
+    def wait(self):
+        return self.delay
@@ -0,0 +1,219 @@
+"""
+Full-text search over published blog posts and projects.
+
+On PostgreSQL each `Blog`/`Project` row carries a weighted `search_vector`
+(GIN indexed), refreshed by signals after every save. On SQLite, which the
+test suite uses, the same text is mirrored into an FTS5 table instead.
+Either way `SearchResults` yields ranked hits across both models and can
+be handed straight to a `Paginator`.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Left
+from django.urls import reverse
+
+SEARCH_CONFIG = 'english'
+EXCERPT_LENGTH = 200
+
+# SQLite fallback index; `published` is only ever 0 for draft blog posts
+FTS_TABLE = 'home_search_index'
+FTS_CREATE_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    'kind UNINDEXED, object_id UNINDEXED, published UNINDEXED, title, body, '
+    "tokenize = 'porter unicode61')"
+)
+FTS_DROP_SQL = f'DROP TABLE IF EXISTS {FTS_TABLE}'
+
+
+def backend():
+    """'postgresql', 'sqlite' or None when neither index is available."""
+    if connection.vendor in ('postgresql', 'sqlite'):
+        return connection.vendor
+    return None
+
+
+def _kind(model):
+    return model._meta.model_name
+
+
+def _vector(model):
+    if _kind(model) == 'blog':
+        return SearchVector('title', weight='A', config=SEARCH_CONFIG) + \
+            SearchVector('content', weight='B', config=SEARCH_CONFIG)
+    return SearchVector('title', weight='A', config=SEARCH_CONFIG) + \
+        SearchVector('tech_stack', weight='B', config=SEARCH_CONFIG) + \
+        SearchVector('description', weight='C', config=SEARCH_CONFIG)
+
+
+def _fts_row(instance):
+    if _kind(type(instance)) == 'blog':
+        return (instance.title, instance.content, int(instance.is_published))
+    return (instance.title, f'{instance.description}\n{instance.tech_stack}', 1)
+
+
+def index_instance(instance):
+    """Refresh the search index entry of one blog post or project."""
+    model = type(instance)
+    if backend() == 'postgresql':
+        # QuerySet.update() does not send post_save, so this cannot recurse
+        model.objects.filter(pk=instance.pk).update(search_vector=_vector(model))
+    elif backend() == 'sqlite':
+        title, body, published = _fts_row(instance)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE kind = %s AND object_id = %s', [_kind(model), instance.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (kind, object_id, published, title, body) VALUES (%s, %s, %s, %s, %s)',
+                [_kind(model), instance.pk, published, title, body],
+            )
+
+
+def unindex_instance(instance):
+    """Drop a deleted row from the SQLite index (Postgres vectors go with the row)."""
+    if backend() == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE kind = %s AND object_id = %s',
+                [_kind(type(instance)), instance.pk],
+            )
+
+
+def rebuild_index(*models):
+    """Re-index every row of `models` in bulk. Returns the number of rows indexed."""
+    total = 0
+    for model in models:
+        if backend() == 'postgresql':
+            total += model.objects.update(search_vector=_vector(model))
+        elif backend() == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE kind = %s', [_kind(model)])
+            for instance in model.objects.all().iterator():
+                index_instance(instance)
+                total += 1
+    return total
+
+
+def _fts_match(term):
+    # Quote every word so user input cannot inject FTS5 query syntax
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in term.split())
+
+
+def filter_queryset(queryset, term):
+    """
+    Restrict a Blog or Project queryset to rows matching `term`.
+
+    Returns None when no full-text index is available, so callers can fall
+    back to `icontains`.
+    """
+    if backend() == 'postgresql':
+        query = SearchQuery(term, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=query)
+    if backend() == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT object_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND kind = %s',
+                [_fts_match(term), _kind(queryset.model)],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        return queryset.filter(pk__in=ids)
+    return None
+
+
+def _attach_links(hits):
+    """Give each hit its public URL; blog posts also get their stored excerpt."""
+    from .models import Blog
+
+    blog_ids = [hit['id'] for hit in hits if hit['kind'] == 'blog']
+    blogs = {
+        blog.pk: blog
+        for blog in Blog.objects.filter(pk__in=blog_ids).only('slug', 'excerpt')
+    } if blog_ids else {}
+    for hit in hits:
+        blog = blogs.get(hit['id']) if hit['kind'] == 'blog' else None
+        if blog is not None:
+            hit['url'] = blog.get_absolute_url()
+            hit['excerpt'] = blog.excerpt
+        else:
+            hit['url'] = reverse('home') + '#projects'
+    return hits
+
+
+class SearchResults:
+    """
+    Ranked blog and project hits for `term`, best first.
+
+    Sliceable and countable like a queryset, so `Paginator` only fetches the
+    requested page. Each hit is a dict with kind, id, title, excerpt, rank
+    and url.
+    """
+
+    def __init__(self, term):
+        self.term = ' '.join((term or '').split())
+        self._count = None
+
+    def _postgres_queryset(self):
+        from .models import Blog, Project
+
+        query = SearchQuery(self.term, search_type='websearch', config=SEARCH_CONFIG)
+
+        # Both halves of the UNION must select identical columns; `snippet`
+        # avoids clashing with the `Blog.excerpt` field
+        def ranked(queryset, kind, text_field):
+            return queryset.filter(search_vector=query).annotate(
+                kind=Value(kind, output_field=CharField()),
+                snippet=Left(text_field, EXCERPT_LENGTH),
+                rank=SearchRank(F('search_vector'), query),
+            ).order_by().values('id', 'title', 'kind', 'snippet', 'rank')
+
+        blogs = ranked(Blog.objects.filter(is_published=True), 'blog', 'excerpt')
+        projects = ranked(Project.objects.all(), 'project', 'description')
+        return blogs.union(projects, all=True).order_by('-rank', 'kind', 'id')
+
+    def _sqlite_query(self, select, suffix='', params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT {select} FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND published = 1{suffix}',
+                [_fts_match(self.term), *params],
+            )
+            return cursor.fetchall()
+
+    def count(self):
+        if self._count is None:
+            if not self.term or backend() is None:
+                self._count = 0
+            elif backend() == 'postgresql':
+                self._count = self._postgres_queryset().count()
+            else:
+                self._count = self._sqlite_query('COUNT(*)')[0][0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = index.stop if index.stop is not None else self.count()
+        if not self.term or backend() is None or stop <= start:
+            return []
+
+        if backend() == 'postgresql':
+            hits = [
+                {'kind': row['kind'], 'id': row['id'], 'title': row['title'],
+                 'excerpt': row['snippet'], 'rank': row['rank']}
+                for row in self._postgres_queryset()[start:stop]
+            ]
+        else:
+            # bm25() is lower-is-better; weights follow the column order
+            rows = self._sqlite_query(
+                f'kind, object_id, title, substr(body, 1, {EXCERPT_LENGTH}), '
+                f'-bm25({FTS_TABLE}, 0, 0, 0, 10.0, 1.0) AS rank',
+                ' ORDER BY rank DESC, kind, object_id LIMIT %s OFFSET %s',
+                [stop - start, start],
+            )
+            hits = [
+                {'kind': kind, 'id': int(object_id), 'title': title, 'excerpt': excerpt, 'rank': rank}
+                for kind, object_id, title, excerpt, rank in rows
+            ]
+        return _attach_links(hits)
@@ -1,3 +1,4 @@
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 from .models import Profile, Project, Experience, Blog, ContactMessage, Education
 
@@ -9,9 +10,16 @@ class ProfileSerializer(serializers.ModelSerializer):
 
 
 class ProjectSerializer(serializers.ModelSerializer):
+    tech_tags = serializers.SerializerMethodField()
+
     class Meta:
         model = Project
-        fields = '__all__'
+        exclude = ['search_vector']
+
+    @extend_schema_field(serializers.ListField(child=serializers.CharField()))
+    def get_tech_tags(self, obj):
+        # Reads the prefetched links so the stack keeps its written order
+        return [link.tag.name for link in obj.tech_links.all()]
 
 
 class ExperienceSerializer(serializers.ModelSerializer):
@@ -23,7 +31,7 @@ class ExperienceSerializer(serializers.ModelSerializer):
 class BlogSerializer(serializers.ModelSerializer):
     class Meta:
         model = Blog
-        fields = '__all__'
+        exclude = ['search_vector']
 
 
 class ContactMessageSerializer(serializers.ModelSerializer):
@@ -36,3 +44,12 @@ class EducationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Education
         fields = '__all__'
+
+
+class SearchResultSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=['blog', 'project'])
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    excerpt = serializers.CharField()
+    rank = serializers.FloatField()
+    url = serializers.CharField()
@@ -0,0 +1,95 @@
+"""
+Signal handlers that keep cached content, sidebar counters, the search
+index and media reference counts in sync with the database.
+"""
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from .cache import bump_content_version
+from .counters import COUNTED_MODELS, adjust_counter
+from .models import Project, Blog, Education, Experience, Profile, ProjectImageVariant
+from .search import index_instance, unindex_instance
+from .storage import ContentAddressedStorage
+
+CACHED_CONTENT_MODELS = (Project, Blog, Education, Experience, Profile)
+
+
+def invalidate_cached_pages(sender, **kwargs):
+    """Bump the content version of a public model that was saved or deleted."""
+    bump_content_version(sender._meta.model_name)
+
+
+for _model in CACHED_CONTENT_MODELS:
+    post_save.connect(invalidate_cached_pages, sender=_model)
+    post_delete.connect(invalidate_cached_pages, sender=_model)
+
+
+def increment_counter(sender, created, **kwargs):
+    """Count a newly created row in the admin sidebar counters."""
+    if created:
+        adjust_counter(sender, 1)
+
+
+def decrement_counter(sender, **kwargs):
+    """Uncount a deleted row in the admin sidebar counters."""
+    adjust_counter(sender, -1)
+
+
+for _model in COUNTED_MODELS:
+    post_save.connect(increment_counter, sender=_model)
+    post_delete.connect(decrement_counter, sender=_model)
+
+
+SEARCHABLE_MODELS = (Blog, Project)
+
+
+def update_search_index(sender, instance, **kwargs):
+    """Re-index the text of a saved blog post or project."""
+    index_instance(instance)
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    """Drop a deleted blog post or project from the search index."""
+    unindex_instance(instance)
+
+
+for _model in SEARCHABLE_MODELS:
+    post_save.connect(update_search_index, sender=_model)
+    post_delete.connect(remove_from_search_index, sender=_model)
+
+
+MEDIA_FIELDS = {
+    Profile: 'profile_picture',
+    Project: 'image',
+    ProjectImageVariant: 'image',
+}
+
+
+def remember_replaced_file(sender, instance, **kwargs):
+    """Note the stored file a save is about to replace."""
+    field_name = MEDIA_FIELDS[sender]
+    instance._replaced_file = None
+    if instance.pk:
+        old = sender.objects.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+        if old and old != getattr(instance, field_name).name:
+            instance._replaced_file = old
+
+
+def release_replaced_file(sender, instance, **kwargs):
+    """Drop one reference to the file replaced by this save."""
+    old = getattr(instance, '_replaced_file', None)
+    if old:
+        getattr(instance, MEDIA_FIELDS[sender]).storage.delete(old)
+        instance._replaced_file = None
+
+
+def release_deleted_file(sender, instance, **kwargs):
+    """Drop one reference to the file of a deleted row."""
+    file = getattr(instance, MEDIA_FIELDS[sender])
+    if file and isinstance(file.storage, ContentAddressedStorage):
+        file.storage.delete(file.name)
+
+
+for _model in MEDIA_FIELDS:
+    pre_save.connect(remember_replaced_file, sender=_model)
+    post_save.connect(release_replaced_file, sender=_model)
+    post_delete.connect(release_deleted_file, sender=_model)
@@ -0,0 +1,121 @@
+"""
+Content-addressed, deduplicated storage for image uploads.
+
+Files are named after the SHA-256 of their bytes (`projects/<hash>.png`), so
+re-uploading the same image stores nothing new. A `MediaBlob` row counts the
+fields referencing each file; `delete()` releases one reference and only
+removes the file when the last one is gone. Both lock the blob row and count
+in the caller's transaction, so concurrent uploads and deletes of the same
+file serialize and a rolled-back save takes its reference with it. Because a name can never point
+at different bytes, these URLs can be cached forever.
+
+`HashedStaticFilesStorage` applies the same idea to static assets.
+"""
+import hashlib
+import logging
+import os
+import re
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+HASHED_NAME_RE = re.compile(r'(^|/)[0-9a-f]{64}\.[A-Za-z0-9]+$')
+
+
+def is_content_addressed(name):
+    """True if `name` is a hash-named file whose bytes can never change."""
+    return bool(name and HASHED_NAME_RE.search(name))
+
+
+def hash_content(content):
+    """SHA-256 of a Django File, leaving it rewound."""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files by content hash and reference-counts them."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            from django.core.files import File
+            content = File(content, name)
+
+        digest = hash_content(content)
+        directory = os.path.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        name = f'{directory}/{digest}{ext}' if directory else f'{digest}{ext}'
+
+        MediaBlob = apps.get_model('home', 'MediaBlob')
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if not self.exists(name):
+                name = self._save(name, content)
+            if blob is not None:
+                MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+                return name
+            try:
+                with transaction.atomic():
+                    MediaBlob.objects.create(name=name, sha256=digest, size=self.size(name), ref_count=1)
+            except IntegrityError:
+                # A concurrent upload of the same bytes created it first
+                MediaBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1)
+        return name
+
+    def delete(self, name):
+        if not name:
+            return
+        MediaBlob = apps.get_model('home', 'MediaBlob')
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                # Not tracked (e.g. uploaded before this storage was used)
+                super().delete(name)
+                return
+            if blob.ref_count > 1:
+                MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+                return
+            blob.delete()
+            # Only once the row is gone for good, and unless an upload brought it back
+            transaction.on_commit(lambda: self._delete_unreferenced(name))
+
+    def _delete_unreferenced(self, name):
+        MediaBlob = apps.get_model('home', 'MediaBlob')
+        if not MediaBlob.objects.filter(name=name).exists():
+            super().delete(name)
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+class HashedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    Manifest-hashed, gzip/Brotli-precompressed static files.
+
+    A template referencing an asset that is missing from the build keeps its
+    plain URL (and 404s) instead of failing the whole page with a ValueError.
+    """
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            logger.warning(f'Static file {name} is missing from the build; serving it unhashed')
+            # Remember the miss so later renders skip the disk lookup
+            self.hashed_files[self.hash_key(self.clean_name(name))] = name
+            return name
@@ -0,0 +1,79 @@
+"""
+Saving contact submissions without duplicates.
+
+Double-clicks and resubmitted forms repeat a message seconds apart. Each
+message stores a fingerprint of its normalized content, indexed together
+with `created_at`, so a repeat within CONTACT_DUPLICATE_WINDOW seconds is
+found with one index lookup whatever the size of the table. Repeats are
+acknowledged like a new message but insert no row and queue no email.
+
+Two copies of a double-click can arrive at the same moment, before either
+is committed. A cache entry per fingerprint, held for CLAIM_TIMEOUT
+seconds, makes the second one back off instead of racing the first past
+the lookup. It only has to outlive the first request's commit: after that
+the indexed lookup finds the saved message, so a claim left behind by a
+crashed request, or a message since deleted or archived, never blocks a
+retry for longer than that.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ContactMessage
+from .outbox import queue_contact_emails
+
+CLAIM_KEY_PREFIX = 'contact-claim'
+# Seconds a submission holds its fingerprint; enough to serialize a double-click
+CLAIM_TIMEOUT = 5
+
+
+def submit_contact(name, email, message):
+    """
+    Save a contact message and queue its emails unless it is a recent repeat.
+
+    Returns:
+        Tuple of (contact, created); `contact` is None for a repeat still
+        being saved by a concurrent request
+    """
+    fingerprint = ContactMessage.compute_fingerprint(name, email, message)
+    window = settings.CONTACT_DUPLICATE_WINDOW
+    if window <= 0:
+        return _save(name, email, message, fingerprint), True
+
+    claim = f'{CLAIM_KEY_PREFIX}:{fingerprint}'
+    if not cache.add(claim, True, CLAIM_TIMEOUT):
+        return _recent(fingerprint, window), False
+
+    try:
+        contact = _recent(fingerprint, window)
+        if contact is not None:
+            return contact, False
+        contact = _save(name, email, message, fingerprint)
+    except Exception:
+        # Let the visitor retry a submission that was not saved
+        cache.delete(claim)
+        raise
+    return contact, True
+
+
+def _save(name, email, message, fingerprint):
+    # The message and its emails are committed together; the
+    # process_outbox worker delivers them outside the request.
+    with transaction.atomic():
+        contact = ContactMessage.objects.create(name=name, email=email, message=message, fingerprint=fingerprint)
+        queue_contact_emails(contact)
+    return contact
+
+
+def _recent(fingerprint, window):
+    """The message with `fingerprint` saved in the last `window` seconds, or None."""
+    since = timezone.now() - timedelta(seconds=window)
+    return (
+        ContactMessage.objects
+        .filter(fingerprint=fingerprint, created_at__gte=since)
+        .order_by('-created_at')
+        .first()
+    )
@@ -1,4 +1,5 @@
 from django import template
+from django.utils.html import format_html, format_html_join
 
 register = template.Library()
 
@@ -12,3 +13,30 @@ def split(value, sep=','):
         return [part.strip() for part in value.split(sep) if part.strip()]
     except Exception:
         return []
+
+
+@register.simple_tag
+def responsive_image(project, sizes='100vw', alt=''):
+    """
+    Render a project's image as <picture> with WebP and JPEG srcsets.
+
+    Uses the prefetched `image_variants` when available and falls back to a
+    plain <img> of the original upload when no derivatives exist yet.
+    """
+    variants = list(project.image_variants.all())
+    if not variants:
+        return format_html('<img src="{}" alt="{}" loading="lazy">', project.image.url, alt)
+
+    def srcset(fmt):
+        return ', '.join(f'{v.image.url} {v.width}w' for v in variants if v.format == fmt)
+
+    jpegs = [v for v in variants if v.format == 'jpg'] or variants
+    largest = max(jpegs, key=lambda v: v.width)
+    webp_srcset = srcset('webp')
+    sources = format_html_join(
+        '', '<source type="image/webp" srcset="{}" sizes="{}">', [(webp_srcset, sizes)] if webp_srcset else []
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" loading="lazy" decoding="async"></picture>',
+        sources, largest.image.url, srcset('jpg') or srcset(largest.format), sizes, largest.width, largest.height, alt,
+    )
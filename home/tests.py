@@ -1,6 +1,56 @@
-from django.test import TestCase
+import importlib
+import gzip
+import hashlib
+import json
+import os
+import runpy
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO, StringIO
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from PIL import Image, ImageFile
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import F
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.template.loader import get_template
+from django.test import RequestFactory, TestCase, override_settings
 from django.test.client import Client
-from .models import Project, Blog, Education, Experience, ContactMessage
+from django.urls import clear_url_caches, resolve, reverse
+from django.utils import timezone
+from Portfolio import urls as portfolio_urls
+from . import api_urls as home_api_urls, metrics, partitions, urls as home_urls
+from .api_views import ProjectListAPI
+from .cache import CSRF_PLACEHOLDER, cache_page_by_versions, get_last_modified
+from .counters import get_counts, reconcile_counters
+from .image_ingest import _parse_header, ingest_image, sniff_image
+from .image_tasks import _get_executor, _on_done, optimize_profile_bytes, requeue_stale_jobs
+from .management.commands.optimize_media import Command as OptimizeMediaCommand
+from .models import (
+    Project, Blog, Education, Experience, ContactMessage, OutboundEmail, Profile,
+    OptimizedMedia, MediaBlob, TechTag,
+)
+from .outbox import send_pending
+from .query_budget import QueryBudgetMiddleware, QueryRecorder
+from .ratelimit import _counters, client_ip, contact_wait
+from .storage import is_content_addressed
+from .submissions import CLAIM_KEY_PREFIX, CLAIM_TIMEOUT, submit_contact
+from .validators import validate_profile_image
+from .views import DASHBOARD_PAGE_SIZE
+from .warmup import PUBLIC_TEMPLATES, warm_up
 
 
 class ProjectModelTest(TestCase):
@@ -102,6 +152,7 @@ class ContactViewTests(TestCase):
     
     def setUp(self):
         """Setup test client"""
+        cache.clear()
         self.client = Client()
 
     def test_contact_page_loads(self):
@@ -120,3 +171,1532 @@ class ContactViewTests(TestCase):
         # Check that message was saved
         self.assertTrue(ContactMessage.objects.filter(name='Test User').exists())
 
+
+class PageCacheTests(TestCase):
+    """Test cases for the version-keyed public page cache"""
+
+    def setUp(self):
+        """Start every test with an empty cache"""
+        cache.clear()
+        self.client = Client()
+        self.project = Project.objects.create(
+            title='Cached Project',
+            description='Test',
+            tech_stack='Django'
+        )
+
+    def test_second_request_is_served_from_cache(self):
+        """Test that a repeat anonymous GET issues no queries"""
+        self.client.get('/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/')
+        self.assertContains(response, 'Cached Project')
+
+    def test_unread_query_parameters_share_the_cached_page(self):
+        """Test that query strings a view ignores do not create new cache entries"""
+        self.client.get('/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/', {'utm_source': 'newsletter', 'v': '123'})
+        self.assertContains(response, 'Cached Project')
+
+    def test_whitelisted_query_parameters_are_keyed(self):
+        """Test that only the declared query parameters distinguish cached pages"""
+        calls = []
+
+        @cache_page_by_versions('project', query_params=('page',))
+        def view(request):
+            calls.append(request.GET.get('page'))
+            return HttpResponse(f'page {request.GET.get("page")}')
+
+        factory = RequestFactory()
+        for query in ({'page': '2'}, {'page': '2', 'ref': 'x'}, {'page': '3'}, {'ref': 'x', 'page': '2'}):
+            request = factory.get('/list/', query)
+            request.user = AnonymousUser()
+            request._messages = CookieStorage(request)
+            view(request)
+        self.assertEqual(calls, ['2', '3'])
+
+    def test_edit_invalidates_cached_page(self):
+        """Test that saving a project shows up on the next request"""
+        self.client.get('/')
+        self.project.title = 'Renamed Project'
+        self.project.save()
+        response = self.client.get('/')
+        self.assertContains(response, 'Renamed Project')
+
+    def test_unrelated_edit_keeps_cached_page(self):
+        """Test that a new contact message does not invalidate the home page"""
+        self.client.get('/')
+        ContactMessage.objects.create(name='Visitor', email='v@example.com', message='Hi')
+        with self.assertNumQueries(0):
+            self.client.get('/')
+
+    def test_cached_home_page_gets_fresh_csrf_token(self):
+        """Test that the cached contact form carries a usable CSRF token"""
+        self.client.get('/')
+        response = self.client.get('/')
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+
+
+@override_settings(EMAIL_HOST_USER='admin@example.com')
+class EmailOutboxTests(TestCase):
+    """Test cases for the contact email outbox"""
+
+    def setUp(self):
+        """Setup test client"""
+        cache.clear()
+        self.client = Client()
+        self.data = {
+            'name': 'Test User',
+            'email': 'test@example.com',
+            'message': 'Test message'
+        }
+
+    def test_contact_submit_queues_without_sending(self):
+        """Test that a contact POST queues two emails and sends none"""
+        self.client.post('/contact/', self.data)
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.STATUS_PENDING).count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_api_contact_queues_emails(self):
+        """Test that the contact API queues the same emails"""
+        response = self.client.post('/api/contact/', self.data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(OutboundEmail.objects.count(), 2)
+
+    def test_send_pending_delivers_queued_emails(self):
+        """Test that the worker sends due emails and marks them sent"""
+        self.client.post('/contact/', self.data)
+        sent, failed = send_pending()
+        self.assertEqual((sent, failed), (2, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.STATUS_SENT).exists())
+
+    def test_failed_send_is_retried_with_backoff(self):
+        """Test that a failed send is rescheduled and not retried immediately"""
+        self.client.post('/contact/', self.data)
+        with mock.patch('home.outbox.EmailMultiAlternatives.send', side_effect=OSError('boom')):
+            self.assertEqual(send_pending(), (0, 2))
+        email = OutboundEmail.objects.first()
+        self.assertEqual(email.status, OutboundEmail.STATUS_PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertEqual(send_pending(), (0, 0))
+
+    def test_emails_are_sent_outside_a_transaction(self):
+        """Test that SMTP runs after the claimed batch is committed as sending"""
+        self.client.post('/contact/', self.data)
+        # The test case wraps each test in atomic blocks of its own
+        depth = len(connection.savepoint_ids)
+        seen = []
+
+        def send(message):
+            seen.append((len(connection.savepoint_ids), OutboundEmail.objects.get(recipient=message.to[0]).status))
+            return 1
+
+        with mock.patch('home.outbox.EmailMultiAlternatives.send', autospec=True, side_effect=send):
+            send_pending()
+        self.assertEqual(seen, [(depth, OutboundEmail.STATUS_SENDING)] * 2)
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.STATUS_SENT).count(), 2)
+
+    def test_expired_lease_is_reclaimed(self):
+        """Test that emails claimed by a worker that died are sent once the lease expires"""
+        self.client.post('/contact/', self.data)
+        OutboundEmail.objects.update(
+            status=OutboundEmail.STATUS_SENDING, attempts=1, next_attempt_at=timezone.now() + timedelta(minutes=5),
+        )
+        self.assertEqual(send_pending(), (0, 0))
+        OutboundEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(send_pending(), (2, 0))
+        self.assertEqual(list(OutboundEmail.objects.values_list('attempts', flat=True)), [2, 2])
+
+    def test_outcome_of_reclaimed_email_is_not_overwritten(self):
+        """Test that a worker whose lease was taken over does not record its result"""
+        self.client.post('/contact/', self.data)
+
+        def taken_over(message):
+            # Another worker reclaims the batch while this one is still sending
+            OutboundEmail.objects.update(attempts=F('attempts') + 1)
+            return 1
+
+        with mock.patch('home.outbox.EmailMultiAlternatives.send', autospec=True, side_effect=taken_over):
+            send_pending()
+        self.assertFalse(OutboundEmail.objects.exclude(status=OutboundEmail.STATUS_SENDING).exists())
+
+
+class KeysetPaginationTests(TestCase):
+    """Test cases for cursor pagination on the API list endpoints"""
+
+    def setUp(self):
+        """Create projects that share an order value and a few blog posts"""
+        self.client = Client()
+        for i in range(5):
+            Project.objects.create(title=f'Project {i}', description='Test', tech_stack='Django', order=i // 2)
+        for i in range(3):
+            Blog.objects.create(title=f'Blog {i}', content='Test')
+
+    def _walk(self, url):
+        ids = []
+        while url:
+            data = self.client.get(url).json()
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        return ids
+
+    def test_pages_cover_every_row_once_in_order(self):
+        """Test that following next links returns each project once"""
+        expected = list(Project.objects.order_by('order', 'id').values_list('id', flat=True))
+        self.assertEqual(self._walk('/api/projects/?page_size=2'), expected)
+
+    def test_previous_link_returns_prior_page(self):
+        """Test that the previous link of page two is page one"""
+        first = self.client.get('/api/projects/?page_size=2').json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(first['previous'])
+
+    def test_blogs_are_paginated_newest_first(self):
+        """Test that blog pagination follows (-created_at, id)"""
+        expected = list(Blog.objects.order_by('-created_at', 'id').values_list('id', flat=True))
+        self.assertEqual(self._walk('/api/blogs/?page_size=1'), expected)
+
+    def test_invalid_cursor_returns_404(self):
+        """Test that a tampered cursor is rejected"""
+        response = self.client.get('/api/projects/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+
+class TechTagTests(TestCase):
+    """Test cases for normalized tech-stack tags"""
+
+    def setUp(self):
+        """Create projects with overlapping, inconsistently written stacks"""
+        cache.clear()
+        self.client = Client()
+        self.api = Project.objects.create(title='API', description='Test', tech_stack='Django, Python ,PostgreSQL')
+        self.web = Project.objects.create(title='Web', description='Test', tech_stack='django,React, react')
+
+    def _names(self, project):
+        return [link.tag.name for link in project.tech_links.all()]
+
+    def test_tags_are_shared_and_ordered(self):
+        """Test that names are normalized into one tag each, in written order"""
+        self.assertEqual(self._names(self.api), ['Django', 'Python', 'PostgreSQL'])
+        self.assertEqual(self._names(self.web), ['Django', 'React'])
+        self.assertEqual(TechTag.objects.count(), 4)
+
+    def test_editing_stack_resyncs_tags(self):
+        """Test that changing tech_stack relinks and drops unused tags"""
+        self.api.tech_stack = 'Go'
+        self.api.save()
+        self.assertEqual(self._names(self.api), ['Go'])
+        self.assertFalse(TechTag.objects.filter(normalized_name='postgresql').exists())
+
+    def test_api_filters_by_tech(self):
+        """Test that ?tech= matches case-insensitively and repeats combine"""
+        def titles(query):
+            return [item['title'] for item in self.client.get(f'/api/projects/{query}').json()['results']]
+        self.assertEqual(titles('?tech=DJANGO'), ['API', 'Web'])
+        self.assertEqual(titles('?tech=react'), ['Web'])
+        self.assertEqual(titles('?tech=django&tech=python'), ['API'])
+        self.assertEqual(titles('?tech=Rust'), [])
+
+    def test_api_and_home_render_tags(self):
+        """Test that tags are serialized and rendered from the prefetch"""
+        item = self.client.get('/api/projects/?tech=python').json()['results'][0]
+        self.assertEqual(item['tech_tags'], ['Django', 'Python', 'PostgreSQL'])
+        self.assertContains(self.client.get('/'), '<span>PostgreSQL</span>')
+
+
+class BlogDetailTests(TestCase):
+    """Test cases for pre-rendered blog detail pages"""
+
+    def setUp(self):
+        """Create a Markdown post"""
+        cache.clear()
+        self.client = Client()
+        self.blog = Blog.objects.create(
+            title='Hello World',
+            content='# Intro\n\nSome **bold** text <script>alert(1)</script> and [a link](javascript:alert(1)).',
+        )
+
+    def test_content_is_rendered_on_save(self):
+        """Test that HTML, excerpt and reading time are stored and sanitized"""
+        self.assertEqual(self.blog.slug, 'hello-world')
+        self.assertIn('<h1>Intro</h1>', self.blog.content_html)
+        self.assertIn('<strong>bold</strong>', self.blog.content_html)
+        self.assertNotIn('<script>', self.blog.content_html)
+        self.assertNotIn('javascript:', self.blog.content_html)
+        self.assertTrue(self.blog.excerpt.startswith('Intro Some bold text'))
+        self.assertEqual(self.blog.reading_time, 1)
+
+    def test_slugs_are_unique(self):
+        """Test that a repeated title gets a numbered slug"""
+        self.assertEqual(Blog.objects.create(title='Hello World', content='x').slug, 'hello-world-2')
+
+    def test_detail_serves_stored_html(self):
+        """Test that the detail page does not re-render Markdown"""
+        with mock.patch('home.models.render_markdown') as render_markdown:
+            response = self.client.get(self.blog.get_absolute_url())
+        render_markdown.assert_not_called()
+        self.assertContains(response, '<strong>bold</strong>', html=True)
+
+    def test_drafts_are_not_public(self):
+        """Test that unpublished posts return 404"""
+        draft = Blog.objects.create(title='Draft', content='x', is_published=False)
+        self.assertEqual(self.client.get(draft.get_absolute_url()).status_code, 404)
+
+    def test_home_lists_excerpt_and_link(self):
+        """Test that the home page links to the detail page with the excerpt"""
+        response = self.client.get('/')
+        self.assertContains(response, self.blog.get_absolute_url())
+        self.assertContains(response, '1 min read')
+
+
+class FullTextSearchTests(TestCase):
+    """Test cases for ranked search over blogs and projects"""
+
+    def setUp(self):
+        """Index a few posts and projects"""
+        cache.clear()
+        self.client = Client()
+        self.guide = Blog.objects.create(title='Django caching guide', content='Caching pages with Redis.')
+        self.mention = Blog.objects.create(title='Weekend notes', content='Tried a little django on Sunday.')
+        Blog.objects.create(title='Django draft', content='Unfinished', is_published=False)
+        self.project = Project.objects.create(title='Portfolio', description='Personal site', tech_stack='Django, Redis')
+
+    def test_results_are_ranked_and_exclude_drafts(self):
+        """Test that title matches rank first and drafts are hidden"""
+        data = self.client.get('/api/search/?q=django').json()
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(data['results'][0]['title'], 'Django caching guide')
+        self.assertNotIn('Django draft', [hit['title'] for hit in data['results']])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Test that signals keep the index current"""
+        self.project.description = 'Built with Kubernetes'
+        self.project.save()
+        self.assertEqual(self.client.get('/api/search/?q=kubernetes').json()['count'], 1)
+        self.project.delete()
+        self.assertEqual(self.client.get('/api/search/?q=kubernetes').json()['count'], 0)
+
+    def test_results_are_paginated(self):
+        """Test that page_size splits the ranked results"""
+        data = self.client.get('/api/search/?q=django&page_size=2').json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNotNone(data['next'])
+
+    def test_query_syntax_is_escaped(self):
+        """Test that FTS operators in user input are treated as words"""
+        response = self.client.get('/api/search/', {'q': 'django" OR (NEAR'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_public_search_page(self):
+        """Test that the search page renders hits"""
+        response = self.client.get('/search/?q=redis')
+        self.assertContains(response, 'Django caching guide')
+        self.assertContains(response, 'Portfolio')
+
+    def test_search_indexes_match_the_database(self):
+        """Test that the GIN indexes exist on PostgreSQL only and are not in the model state"""
+        declared = {index.name for model in (Blog, Project) for index in model._meta.indexes}
+        self.assertFalse(declared & {'blog_search_idx', 'project_search_idx'})
+        with connection.cursor() as cursor:
+            constraints = {
+                **connection.introspection.get_constraints(cursor, Blog._meta.db_table),
+                **connection.introspection.get_constraints(cursor, Project._meta.db_table),
+            }
+        present = {'blog_search_idx', 'project_search_idx'} <= set(constraints)
+        self.assertEqual(present, connection.vendor == 'postgresql')
+
+
+class ConditionalGetTests(TestCase):
+    """Test cases for ETag / Last-Modified validators"""
+
+    def setUp(self):
+        """Start every test with an empty cache"""
+        cache.clear()
+        self.client = Client()
+        self.project = Project.objects.create(
+            title='Test Project',
+            description='Test',
+            tech_stack='Django'
+        )
+
+    def test_matching_etag_returns_304_without_queries(self):
+        """Test that a repeat request with If-None-Match is answered with 304"""
+        etag = self.client.get('/')['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_changes_etag(self):
+        """Test that saving a project yields a fresh page"""
+        etag = self.client.get('/api/projects/')['ETag']
+        self.project.title = 'Renamed Project'
+        self.project.save()
+        response = self.client.get('/api/projects/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Renamed Project')
+
+    def test_api_sends_last_modified(self):
+        """Test that API responses carry Last-Modified and honour If-Modified-Since"""
+        last_modified = self.client.get('/api/projects/')['Last-Modified']
+        response = self.client.get('/api/projects/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+
+class AdminDashboardTableTests(TestCase):
+    """Test cases for the lazily loaded admin dashboard tables"""
+
+    def setUp(self):
+        """Log in a staff user"""
+        self.client = Client()
+        self.user = User.objects.create_user('admin', password='secret', is_staff=True)
+        self.client.force_login(self.user)
+
+    def test_dashboard_does_not_load_rows(self):
+        """Test that the dashboard renders table placeholders, not rows"""
+        ContactMessage.objects.create(name='Jane Visitor', email='jane@example.com', message='Hi')
+        response = self.client.get('/panel/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '/panel/contactmessage/table/')
+        self.assertNotContains(response, 'Jane Visitor')
+
+    def test_table_fragment_is_paginated(self):
+        """Test that a table fragment shows one page and links to the next"""
+        for i in range(DASHBOARD_PAGE_SIZE + 1):
+            ContactMessage.objects.create(name=f'Visitor {i}', email='v@example.com', message='Hello there')
+        response = self.client.get('/panel/contactmessage/table/')
+        self.assertEqual(len(response.context['rows']), DASHBOARD_PAGE_SIZE)
+        self.assertContains(response, '?page=2')
+        response = self.client.get('/panel/contactmessage/table/?page=2')
+        self.assertEqual(len(response.context['rows']), 1)
+        self.assertNotContains(response, '?page=3')
+
+    def test_unknown_table_returns_404(self):
+        """Test that an unknown model name is rejected"""
+        response = self.client.get('/panel/widget/table/')
+        self.assertEqual(response.status_code, 404)
+
+
+class ContentCounterTests(TestCase):
+    """Test cases for the materialized admin sidebar counters"""
+
+    def test_counters_follow_creates_and_deletes(self):
+        """Test that signals keep the counters in step with the tables"""
+        project = Project.objects.create(title='Counted', description='Test', tech_stack='Django')
+        ContactMessage.objects.create(name='A', email='a@example.com', message='Hi')
+        self.assertEqual(get_counts()['project'], 1)
+        self.assertEqual(get_counts()['contactmessage'], 1)
+        project.delete()
+        self.assertEqual(get_counts()['project'], 0)
+
+    def test_sidebar_counts_use_a_single_query(self):
+        """Test that reading every count costs one query"""
+        get_counts()
+        with self.assertNumQueries(1):
+            get_counts()
+
+    def test_reconcile_fixes_drift(self):
+        """Test that reconciliation corrects counters bypassed by bulk writes"""
+        get_counts()
+        Blog.objects.bulk_create([Blog(title='Bulk', content='Test')])
+        self.assertEqual(get_counts()['blog'], 0)
+        self.assertEqual(reconcile_counters(), {'blog': (0, 1)})
+        self.assertEqual(get_counts()['blog'], 1)
+
+
+def _make_image_file(name='shot.png', size=(1500, 800), mode='RGBA', format='PNG'):
+    """Return an uploaded in-memory image of the given size."""
+    buffer = BytesIO()
+    Image.new(mode, size, (40, 120, 200, 255)[:len(mode)]).save(buffer, format=format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{format.lower()}')
+
+
+class ProjectImageVariantTests(TestCase):
+    """Test cases for responsive project image derivatives"""
+
+    def setUp(self):
+        """Store uploads in a throwaway media directory"""
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_upload_generates_webp_and_jpeg_derivatives(self):
+        """Test that saving a new image builds one WebP and one JPEG per width"""
+        project = Project.objects.create(
+            title='Shot', description='Test', tech_stack='Django', image=_make_image_file(),
+        )
+        variants = list(project.image_variants.all())
+        self.assertEqual(sorted({v.width for v in variants}), [320, 640, 960, 1280])
+        self.assertEqual(sorted({v.format for v in variants}), ['jpg', 'webp'])
+        self.assertEqual(len(variants), 8)
+
+    def test_small_image_is_not_upscaled(self):
+        """Test that no derivative is wider than the original"""
+        project = Project.objects.create(
+            title='Small', description='Test', tech_stack='Django', image=_make_image_file(size=(500, 300)),
+        )
+        self.assertEqual(sorted({v.width for v in project.image_variants.all()}), [320, 500])
+
+    def test_template_tag_emits_srcset_and_dimensions(self):
+        """Test that the tag renders a <picture> with srcset, width and height"""
+        Project.objects.create(
+            title='Shot', description='Test', tech_stack='Django', image=_make_image_file(),
+        )
+        response = self.client.get('/')
+        self.assertContains(response, '<source type="image/webp"')
+        self.assertContains(response, '1280w')
+        self.assertContains(response, 'width="1280" height="683"')
+
+
+@override_settings(IMAGE_PROCESSING_ASYNC=False)
+class ProfileImageProcessingTests(TestCase):
+    """Test cases for deferred profile image optimization"""
+
+    def setUp(self):
+        """Store uploads in a throwaway media directory"""
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _large_upload(self):
+        # Random noise does not compress, so the PNG is well over the 500KB threshold
+        buffer = BytesIO()
+        Image.frombytes('RGB', (800, 800), os.urandom(800 * 800 * 3)).save(buffer, format='PNG')
+        return SimpleUploadedFile('me.png', buffer.getvalue(), content_type='image/png')
+
+    def test_save_defers_optimization_until_commit(self):
+        """Test that saving only stores the upload and marks it pending"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            profile = Profile.objects.create(profile_picture=self._large_upload())
+        self.assertEqual(profile.processing_state, Profile.STATE_PENDING)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_optimized_file_is_swapped_in(self):
+        """Test that the optimized JPEG replaces the original once processed"""
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = Profile.objects.create(profile_picture=self._large_upload())
+        profile.refresh_from_db()
+        self.assertEqual(profile.processing_state, Profile.STATE_READY)
+        self.assertTrue(is_content_addressed(profile.profile_picture.name))
+        self.assertTrue(profile.profile_picture.name.endswith('.jpg'))
+        self.assertEqual((profile.image_width, profile.image_height), (800, 800))
+        self.assertEqual(profile.file_size, profile.profile_picture.size)
+
+    def test_pool_worker_returns_result(self):
+        """Test that optimization runs in the process pool"""
+        data = self._large_upload().read()
+        result = _get_executor().submit(optimize_profile_bytes, data, 'me.png').result(timeout=60)
+        self.assertEqual((result['width'], result['height']), (800, 800))
+        self.assertEqual(result['filename'], 'me_optimized.jpg')
+
+    @override_settings(IMAGE_PROCESSING_ASYNC=False)
+    def test_stale_jobs_are_requeued(self):
+        """Test that a profile left processing by a lost worker is optimized again"""
+        with self.captureOnCommitCallbacks():
+            profile = Profile.objects.create(profile_picture=self._large_upload())
+        # As left by a worker that died mid-job
+        Profile.objects.filter(pk=profile.pk).update(
+            processing_state=Profile.STATE_PROCESSING, updated_at=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(requeue_stale_jobs(older_than=600), [profile.pk])
+        profile.refresh_from_db()
+        self.assertEqual(profile.processing_state, Profile.STATE_READY)
+        self.assertEqual(requeue_stale_jobs(older_than=0), [])
+
+    def test_recent_jobs_are_left_alone(self):
+        """Test that a job still within the timeout is not scheduled twice"""
+        with self.captureOnCommitCallbacks():
+            Profile.objects.create(profile_picture=self._large_upload())
+        with mock.patch('home.image_tasks.schedule_profile_optimization') as schedule:
+            self.assertEqual(requeue_stale_jobs(older_than=600), [])
+        schedule.assert_not_called()
+
+    def test_cancelled_job_stays_for_requeue(self):
+        """Test that a job dropped at worker exit does not mark the profile failed"""
+        future = mock.Mock()
+        future.cancelled.return_value = True
+        with mock.patch('home.image_tasks._apply_result') as apply_result:
+            _on_done(1, 'profile_pics/me.png', future)
+        apply_result.assert_not_called()
+
+
+class ImageIngestTests(TestCase):
+    """Test cases for the single-decode image ingestion pipeline"""
+
+    def _encode(self, format, size=(640, 480), mode='RGB'):
+        buffer = BytesIO()
+        Image.new(mode, size, 'red').save(buffer, format=format)
+        return buffer.getvalue()
+
+    def test_sniff_reads_dimensions_from_header(self):
+        """Test that every allowed format is identified without Pillow"""
+        with mock.patch('PIL.Image.open') as image_open:
+            for format, name in (('JPEG', 'jpeg'), ('PNG', 'png'), ('GIF', 'gif'), ('WEBP', 'webp')):
+                info = sniff_image(BytesIO(self._encode(format)))
+                self.assertEqual(info, (name, 640, 480))
+        image_open.assert_not_called()
+
+    def test_sniff_is_memoized_across_wrappers(self):
+        """Test that repeated validation of one upload parses the header once"""
+        upload = SimpleUploadedFile('me.png', self._encode('PNG'))
+        with mock.patch('home.image_ingest._parse_header', wraps=_parse_header) as parse:
+            validate_profile_image(upload)
+            validate_profile_image(upload)
+            sniff_image(upload)
+        self.assertEqual(parse.call_count, 1)
+
+    def test_validator_rejects_non_image_bytes(self):
+        """Test that a renamed non-image fails on its magic bytes"""
+        upload = SimpleUploadedFile('me.jpg', b'GIF8' + b'\0' * 600)
+        with self.assertRaises(ValidationError):
+            validate_profile_image(upload)
+
+    def test_jpeg_draft_mode_output_dimensions(self):
+        """Test that draft-mode decoding still yields the requested bounds"""
+        result = ingest_image(self._encode('JPEG', size=(4000, 3000)))
+        self.assertEqual((result['width'], result['height']), (1200, 900))
+        self.assertEqual((result['source_width'], result['source_height']), (4000, 3000))
+
+    def test_ingest_decodes_pixels_once(self):
+        """Test that ingesting an upload decodes its pixel data exactly once"""
+        data = self._encode('PNG', size=(1600, 1200))
+        load = ImageFile.ImageFile.load
+        decodes = []
+
+        def counting_load(image):
+            # Only a load() with tiles left to read decodes pixel data
+            if image.tile:
+                decodes.append(image.size)
+            return load(image)
+
+        with mock.patch.object(ImageFile.ImageFile, 'load', autospec=True, side_effect=counting_load):
+            result = ingest_image(data)
+        self.assertEqual(decodes, [(1600, 1200)])
+        self.assertEqual((result['width'], result['height']), (1200, 900))
+
+
+class OptimizeMediaCommandTests(TestCase):
+    """Test cases for the optimize_media management command"""
+
+    def setUp(self):
+        """Store uploads in a throwaway media directory"""
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        buffer = BytesIO()
+        Image.frombytes('RGB', (2000, 1000), os.urandom(2000 * 1000 * 3)).save(buffer, format='JPEG', quality=100)
+        self.project = Project.objects.create(
+            title='Shot', description='Test', tech_stack='Django',
+            image=SimpleUploadedFile('shot.jpg', buffer.getvalue(), content_type='image/jpeg'),
+        )
+        self.original_size = self.project.image.size
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_dry_run_writes_nothing(self):
+        """Test that --dry-run reports without touching files or records"""
+        out = StringIO()
+        call_command('optimize_media', '--dry-run', '--jobs', '1', stdout=out)
+        self.assertIn('Bytes saved', out.getvalue())
+        self.assertFalse(OptimizedMedia.objects.exists())
+        self.assertEqual(Project.objects.get(pk=self.project.pk).image.size, self.original_size)
+
+    def test_optimizes_then_skips_unchanged_files(self):
+        """Test that a second run skips files matching the recorded hash"""
+        call_command('optimize_media', '--jobs', '1', stdout=StringIO())
+        project = Project.objects.get(pk=self.project.pk)
+        self.assertLess(project.image.size, self.original_size)
+        self.assertEqual(OptimizedMedia.objects.get().path, project.image.name)
+
+        out = StringIO()
+        call_command('optimize_media', '--jobs', '1', stdout=out)
+        self.assertIn('Processed 0 file(s)', out.getvalue())
+        self.assertIn('1 already optimized', out.getvalue())
+
+    def test_original_released_only_after_swap(self):
+        """Test that the original is released only once the row references the saved replacement"""
+        original = self.project.image.name
+        storage = self.project.image.storage
+        release = storage.delete
+
+        def delete(name):
+            current = Project.objects.get(pk=self.project.pk).image.name
+            self.assertNotEqual(current, name)
+            self.assertTrue(storage.exists(current))
+            release(name)
+
+        with mock.patch.object(storage, 'delete', side_effect=delete) as deleted:
+            call_command('optimize_media', '--jobs', '1', stdout=StringIO())
+        deleted.assert_called_once_with(original)
+
+    def test_replaced_image_is_kept(self):
+        """Test that an image replaced while optimizing is not overwritten"""
+        command = OptimizeMediaCommand(stdout=StringIO())
+        field_file = self.project.image
+        with field_file.open('rb') as f:
+            data = f.read()
+        Project.objects.filter(pk=self.project.pk).update(image='projects/newer.jpg')
+        command._store('project', self.project, field_file, data, b'smaller', (b'smaller', 10, 10))
+        self.assertEqual(Project.objects.get(pk=self.project.pk).image.name, 'projects/newer.jpg')
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, field_file.name)))
+        self.assertEqual(MediaBlob.objects.filter(sha256=hashlib.sha256(b'smaller').hexdigest()).count(), 0)
+
+    def test_files_are_read_in_chunks(self):
+        """Test that no more than --chunk-size files are held in memory at once"""
+        for i in range(4):
+            Project.objects.create(
+                title=f'Shot {i}', description='Test', tech_stack='Django',
+                image=SimpleUploadedFile(f'{i}.png', _make_image_file(size=(50 + i, 50)).read()),
+            )
+        sizes = []
+        read = OptimizeMediaCommand._read
+        with mock.patch.object(
+            OptimizeMediaCommand, '_read', autospec=True,
+            side_effect=lambda command, chunk, force: sizes.append(len(chunk)) or read(command, chunk, force),
+        ):
+            call_command('optimize_media', '--jobs', '1', '--chunk-size', '2', '--dry-run', stdout=StringIO())
+        self.assertEqual(sizes, [2, 2, 1])
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Test cases for deduplicated, hash-named media storage"""
+
+    def setUp(self):
+        """Store uploads in a throwaway media directory"""
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.data = _make_image_file(size=(300, 200)).read()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _create(self, name):
+        return Project.objects.create(
+            title=name, description='Test', tech_stack='Django',
+            image=SimpleUploadedFile(name, self.data, content_type='image/png'),
+        )
+
+    def test_identical_uploads_share_one_file(self):
+        """Test that re-uploading the same bytes stores one reference-counted blob"""
+        first, second = self._create('a.png'), self._create('b.png')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(is_content_addressed(first.image.name))
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).ref_count, 2)
+
+    def test_file_removed_with_last_reference(self):
+        """Test that a blob survives until its last referencing row is deleted"""
+        first, second = self._create('a.png'), self._create('b.png')
+        name = first.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+            # Removed only after the deletion commits
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, name)))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+
+    def test_rolled_back_save_releases_its_reference(self):
+        """Test that a save whose transaction rolls back leaves the count unchanged"""
+        first = self._create('a.png')
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self._create('b.png')
+            raise RuntimeError
+        self.assertEqual(MediaBlob.objects.get(name=first.image.name).ref_count, 1)
+
+    def test_reupload_keeps_file_pending_deletion(self):
+        """Test that a file whose last reference is re-added before commit is kept"""
+        project = self._create('a.png')
+        name = project.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            project.delete()
+            self._create('b.png')
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+
+    @override_settings(DEBUG=False)
+    def test_uploads_are_served_without_debug(self):
+        """Test that stored uploads are reachable when DEBUG is off, as in the image"""
+        project = self._create('a.png')
+        response = Client().get(project.image.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.data)
+        self.assertEqual(Client().get('/media/projects/missing.png').status_code, 404)
+
+    @override_settings(DEBUG=False)
+    def test_hashed_media_is_served_immutable(self):
+        """Test that hash-named files get far-future caching headers from the production route"""
+        project = self._create('a.png')
+        response = Client().get(project.image.url)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        response.close()
+
+        os.makedirs(os.path.join(self.media_root, 'profile_pics'), exist_ok=True)
+        with open(os.path.join(self.media_root, 'profile_pics', 'me.png'), 'wb') as f:
+            f.write(self.data)
+        response = Client().get('/media/profile_pics/me.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response.get('Cache-Control', ''))
+        response.close()
+
+
+class StaticAssetTests(TestCase):
+    """Test cases for hashed, precompressed static files"""
+
+    def setUp(self):
+        """Collect static files into a throwaway directory"""
+        self.static_root = tempfile.mkdtemp()
+        self.override = override_settings(
+            STATIC_ROOT=self.static_root,
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'home.storage.HashedStaticFilesStorage'},
+            },
+        )
+        self.override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.static_root, ignore_errors=True)
+
+    def test_pages_reference_hashed_names(self):
+        """Test that templates link the hashed stylesheet and script"""
+        css = staticfiles_storage.url('main/css/style.css')
+        self.assertRegex(css, r'style\.[0-9a-f]{12}\.css$')
+        self.assertTrue(os.path.exists(os.path.join(self.static_root, css.split('/static/')[-1] + '.gz')))
+        response = Client().get('/contact/')
+        self.assertContains(response, css)
+        self.assertNotContains(response, '?v=')
+
+    def test_hashed_files_are_immutable(self):
+        """Test that WhiteNoise serves hashed names with far-future caching"""
+        response = Client().get(staticfiles_storage.url('main/js/script.js'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_missing_asset_does_not_break_rendering(self):
+        """Test that an asset absent from the build keeps its plain URL"""
+        self.assertTrue(staticfiles_storage.url('main/images/missing.png').endswith('main/images/missing.png'))
+
+
+class AsyncViewTests(TestCase):
+    """Test cases for the async public views and read-only API"""
+
+    def setUp(self):
+        """Route to the async views and create test data"""
+        cache.clear()
+        with self.settings(ASYNC_VIEWS=True):
+            self._reload_urls()
+        self.addCleanup(self._reload_urls)
+        self.project = Project.objects.create(title='Async Project', description='Test', tech_stack='Django, React')
+        Blog.objects.create(title='Async Blog', content='Test', is_published=True)
+
+    def _reload_urls(self):
+        for module in (home_urls, home_api_urls, portfolio_urls):
+            importlib.reload(module)
+        clear_url_caches()
+
+    def test_urls_use_async_views(self):
+        """Test that ASYNC_VIEWS routes the pages and API to coroutines"""
+        for url in ('/', '/about/', '/projects/', '/contact/', '/blog/', '/api/projects/', '/api/profile/'):
+            self.assertTrue(iscoroutinefunction(resolve(url).func), url)
+
+    async def test_home_renders_all_sections(self):
+        """Test that the async home page renders the concurrently fetched content"""
+        response = await self.async_client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Async Project')
+        self.assertContains(response, 'React')
+        self.assertContains(response, 'Async Blog')
+
+    async def test_contact_post_saves_and_redirects(self):
+        """Test that the async contact path saves the message and queues emails"""
+        data = {'name': 'Async User', 'email': 'async@example.com', 'message': 'Hello'}
+        response = await self.async_client.post('/contact/', data)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(await ContactMessage.objects.filter(name='Async User').aexists())
+        self.assertTrue(await OutboundEmail.objects.aexists())
+
+    async def test_api_matches_sync_output(self):
+        """Test that the async project list returns the same JSON as the sync view"""
+        request = RequestFactory().get('/api/projects/', {'tech': 'react'}, HTTP_ACCEPT='application/json')
+        request.user = AnonymousUser()
+        expected = await sync_to_async(lambda: ProjectListAPI.as_view()(request).render().content)()
+        response = await self.async_client.get('/api/projects/', {'tech': 'react'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json(), json.loads(expected))
+        self.assertEqual(response.json()['results'][0]['tech_tags'], ['Django', 'React'])
+
+    async def test_api_answers_conditional_get(self):
+        """Test that a matching ETag gets a 304 from the async API"""
+        etag = (await self.async_client.get('/api/blogs/'))['ETag']
+        response = await self.async_client.get('/api/blogs/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_api_invalid_cursor(self):
+        """Test that a bad cursor is reported as a JSON 404"""
+        response = await self.async_client.get('/api/projects/', {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+
+class WorkerWarmupTests(TestCase):
+    """Test cases for the app-server configuration and worker warmup"""
+
+    def test_config_preloads_and_recycles(self):
+        """Test that the gunicorn config preloads the app and sizes workers to the cores"""
+        with mock.patch.dict(os.environ, {'GUNICORN_THREADS': '2'}):
+            conf = runpy.run_path(os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'))
+        self.assertTrue(conf['preload_app'])
+        self.assertEqual(conf['workers'], conf['_cores']() * 2 + 1)
+        self.assertEqual(conf['threads'], 2)
+        self.assertGreater(conf['max_requests'], 0)
+        self.assertGreater(conf['max_requests_jitter'], 0)
+
+    def test_refuses_several_workers_on_local_memory_cache(self):
+        """Test that the master will not fork several workers that each keep their own cache"""
+        conf = runpy.run_path(os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'))
+        server = mock.Mock()
+        server.cfg.workers = 3
+        with mock.patch('home.metrics.reset'):
+            with self.assertRaises(SystemExit):
+                conf['on_starting'](server)
+            redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}
+            with self.settings(CACHES=redis):
+                conf['on_starting'](server)
+            server.cfg.workers = 1
+            conf['on_starting'](server)
+
+    def test_worker_exit_stops_image_pool(self):
+        """Test that an exiting worker shuts down its image processing pool"""
+        conf = runpy.run_path(os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'))
+        with mock.patch('home.image_tasks.shutdown_executor') as shutdown, mock.patch('home.metrics.flush'):
+            conf['worker_exit'](mock.Mock(), mock.Mock())
+        shutdown.assert_called_once_with()
+
+    def test_warm_up_primes_templates_and_database(self):
+        """Test that warmup compiles every public template and opens the connection"""
+        with mock.patch('home.warmup.get_template', wraps=get_template) as loader:
+            warm_up()
+        self.assertEqual({c.args[0] for c in loader.call_args_list}, set(PUBLIC_TEMPLATES))
+        self.assertIsNotNone(connection.connection)
+
+    def test_unreachable_database_does_not_stop_worker(self):
+        """Test that warmup only logs when the database is not reachable yet"""
+        with mock.patch.object(connection, 'ensure_connection', side_effect=OperationalError('down')):
+            with self.assertLogs('home.warmup', 'WARNING'):
+                warm_up()
+
+
+class DatabasePoolStatsTests(TestCase):
+    """Test cases for the staff connection-pool statistics endpoint"""
+
+    def setUp(self):
+        """Log in a staff user"""
+        self.client = Client()
+        self.client.force_login(User.objects.create_user('admin', password='secret', is_staff=True))
+
+    def test_requires_staff(self):
+        """Test that visitors and non-staff users are sent to the login page"""
+        response = Client().get('/panel/db-pool/')
+        self.assertEqual(response.status_code, 302)
+        client = Client()
+        client.force_login(User.objects.create_user('visitor', password='secret'))
+        self.assertEqual(client.get('/panel/db-pool/').status_code, 302)
+
+    def test_reports_disabled_without_pool(self):
+        """Test that a backend without pooling is reported as disabled"""
+        response = self.client.get('/panel/db-pool/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['enabled'], False)
+        self.assertEqual(response.json()['pid'], os.getpid())
+
+    def test_reports_occupancy_and_latency(self):
+        """Test that psycopg_pool counters are turned into occupancy and averages"""
+        pool = mock.Mock()
+        pool.get_stats.return_value = {
+            'pool_min': 2, 'pool_max': 10, 'pool_size': 4, 'pool_available': 1,
+            'requests_waiting': 0, 'requests_num': 40, 'requests_queued': 5,
+            'requests_wait_ms': 100, 'connections_num': 4, 'connections_ms': 48,
+        }
+        with mock.patch.object(type(connections['default']), 'pool', new_callable=mock.PropertyMock,
+                               return_value=pool, create=True):
+            data = self.client.get('/panel/db-pool/').json()
+        self.assertTrue(data['enabled'])
+        self.assertEqual(data['occupancy']['in_use'], 3)
+        self.assertEqual(data['checkouts']['avg_checkout_ms'], 2.5)
+        self.assertEqual(data['checkouts']['avg_queued_wait_ms'], 20.0)
+        self.assertEqual(data['checkouts']['timeouts'], 0)
+        self.assertEqual(data['connections']['avg_connect_ms'], 12.0)
+
+    def test_pool_builds_from_project_settings(self):
+        """Test that psycopg_pool accepts the pool options in Portfolio/settings.py"""
+        project = importlib.import_module('Portfolio.settings')
+        if not project.DB_POOL:
+            self.skipTest('psycopg-pool is not installed')
+        # A separate alias, so the pool is built but never opened
+        connection = ConnectionHandler({'pool-test': project.DATABASES['default']})['pool-test']
+        pool = connection.pool
+        try:
+            self.assertEqual(pool.max_size, project.DATABASES['default']['OPTIONS']['pool']['max_size'])
+        finally:
+            connection.close_pool()
+
+
+class QueryBudgetTests(TestCase):
+    """Test cases for per-request query instrumentation and per-view query budgets"""
+
+    # Queries each URL may run with a cold page cache but warm validators,
+    # by URL name. Staff pages include the session and user lookups. Every
+    # URL in home/urls.py and home/api_urls.py needs an entry so new views
+    # get a budget too.
+    BUDGETS = {
+        'home': 8,
+        'about': 1,
+        'projects': 0,
+        'contact': 0,
+        'blog': 0,
+        'blog_detail': 1,
+        'search': 3,
+        'metrics': 2,
+        'admin_login': 0,
+        'admin_dashboard': 3,
+        'admin_logout': 4,
+        'admin_db_pool': 2,
+        'admin_table': 3,
+        'admin_add': 3,
+        'admin_edit': 4,
+        'admin_delete': 4,
+        'api-profile': 1,
+        'api-projects': 3,
+        'api-experiences': 1,
+        'api-educations': 1,
+        'api-blogs': 1,
+        'api-search': 3,
+        'api-contact': 0,
+    }
+    # Queries of a valid contact submission, by URL name: the duplicate
+    # lookup, the message, its counter and its two emails, plus the
+    # savepoint pair the test transaction turns the commit into
+    POST_BUDGETS = {
+        'home': 6,
+        'contact': 6,
+        'api-contact': 6,
+    }
+    STAFF_ONLY = ('metrics', 'admin_dashboard', 'admin_logout', 'admin_db_pool', 'admin_table',
+                  'admin_add', 'admin_edit', 'admin_delete')
+
+    def setUp(self):
+        """Create several rows of everything so N+1 patterns show up"""
+        cache.clear()
+        self.staff = User.objects.create_user('admin', password='secret', is_staff=True)
+        Profile.objects.create()
+        for i in range(3):
+            self.project = Project.objects.create(
+                title=f'Project {i}', description='Test', tech_stack=f'Django, React, Tool{i}', order=i,
+            )
+            self.blog = Blog.objects.create(title=f'Test Blog {i}', content='Test *post*', is_published=True)
+            Education.objects.create(institution=f'School {i}', degree='BSc', duration='2020', description='Test')
+            Experience.objects.create(organization=f'Org {i}', role='Dev', duration='2021', description='Test')
+            ContactMessage.objects.create(name=f'Visitor {i}', email='v@example.com', message='Hi')
+
+    def url_kwargs(self, name):
+        return {
+            'blog_detail': {'slug': self.blog.slug},
+            'admin_table': {'model_name': 'project'},
+            'admin_add': {'model_name': 'project'},
+            'admin_edit': {'model_name': 'project', 'pk': self.project.pk},
+            'admin_delete': {'model_name': 'project', 'pk': self.project.pk},
+        }.get(name, {})
+
+    def assertWithinBudget(self, url, budget, client=None, data=None):
+        """GET `url` (or POST `data`) and assert it runs at most `budget` queries, none of them repeated."""
+        cache.clear()
+        # Last-Modified is aggregated once per model and then kept in the cache
+        for name in ('profile', 'education', 'experience', 'project', 'blog'):
+            get_last_modified(name)
+        if data is not None:
+            response = (client or Client()).post(url, data)
+            self.assertLess(response.status_code, 400, url)
+        else:
+            response = (client or Client()).get(url, {'q': 'test'} if 'search' in url else {})
+            self.assertLess(response.status_code, 500, url)
+        stats = response.wsgi_request.query_stats
+        self.assertLessEqual(
+            stats.count, budget,
+            f'{url} ran {stats.count} queries (budget {budget}): {list(stats.statements)}',
+        )
+        self.assertEqual(stats.similar, 0, f'{url} repeats a query: {stats.most_repeated()}')
+        return stats
+
+    def test_every_url_has_a_budget(self):
+        """Test that all named URLs of the app have a query budget"""
+        names = {p.name for p in home_urls.urlpatterns + home_api_urls.urlpatterns}
+        self.assertEqual(names, set(self.BUDGETS))
+
+    def test_urls_stay_within_budget(self):
+        """Test that no view exceeds its query budget or repeats a query"""
+        for pattern in home_urls.urlpatterns + home_api_urls.urlpatterns:
+            name = pattern.name
+            client = Client()
+            if name in self.STAFF_ONLY:
+                client.force_login(self.staff)
+            with self.subTest(name):
+                self.assertWithinBudget(reverse(name, kwargs=self.url_kwargs(name)), self.BUDGETS[name], client)
+
+    @override_settings(CONTACT_RATE_LIMIT=False)
+    def test_contact_posts_stay_within_budget(self):
+        """Test that submitting the contact form or API stays within its POST budget"""
+        for name, budget in self.POST_BUDGETS.items():
+            data = {'name': f'Visitor {name}', 'email': f'{name}@example.com', 'message': 'Hello there'}
+            with self.subTest(name):
+                self.assertWithinBudget(reverse(name), budget, data=data)
+        self.assertEqual(ContactMessage.objects.filter(name__startswith='Visitor ').count(), 3 + len(self.POST_BUDGETS))
+
+    async def test_async_requests_are_recorded(self):
+        """Test that the middleware stays async under ASGI and still sees the view's queries"""
+        async def view(request):
+            return HttpResponse()
+
+        for middleware in (QueryBudgetMiddleware, metrics.MetricsMiddleware):
+            self.assertTrue(iscoroutinefunction(middleware(view)), middleware)
+        response = await self.async_client.get('/api/projects/')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(response.asgi_request.query_stats.count, 0)
+
+    def test_over_budget_request_is_logged(self):
+        """Test that the middleware logs requests over the configured budget"""
+        with self.settings(QUERY_BUDGET=0):
+            with self.assertLogs('home.query_budget', 'WARNING') as logs:
+                response = Client().get('/api/projects/')
+        stats = response.wsgi_request.query_stats
+        self.assertGreater(stats.count, 0)
+        self.assertGreater(stats.time_ms, 0)
+        self.assertIn('Query budget exceeded: GET /api/projects/ (api-projects)', logs.output[0])
+
+    def test_duplicates_are_counted(self):
+        """Test that repeated statements are counted as duplicate and similar"""
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            Project.objects.get(pk=self.project.pk)
+            Project.objects.get(pk=self.project.pk)
+            Project.objects.filter(pk=self.project.pk + 1).first()
+            list(Project.objects.filter(pk=0))
+        self.assertEqual(recorder.count, 4)
+        self.assertEqual(recorder.duplicates, 1)
+        self.assertEqual(recorder.similar, 1)
+
+
+class MetricsTests(TestCase):
+    """Test cases for the Prometheus /metrics endpoint"""
+
+    def setUp(self):
+        """Collect metrics into a temporary directory"""
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.override = override_settings(METRICS_DIR=self.directory, METRICS_TOKEN='')
+        self.override.enable()
+        metrics.reset()
+        metrics.share()
+        self.staff = Client()
+        self.staff.force_login(User.objects.create_user('admin', password='secret', is_staff=True))
+
+    def tearDown(self):
+        metrics.share(False)
+        metrics.reset()
+        self.override.disable()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write_process(self, pid, values):
+        """Write a metrics file as another worker process would"""
+        with open(os.path.join(self.directory, f'{pid}-1.json'), 'w') as f:
+            json.dump(values, f)
+
+    def test_requests_are_labelled_by_route(self):
+        """Test that latency and status are recorded by route pattern, not path"""
+        Client().get('/blog/missing-post/')
+        body = self.staff.get('/metrics').content.decode()
+        self.assertIn('http_responses_total{route="/blog/<slug:slug>/",method="GET",status="404"} 1', body)
+        self.assertIn('http_request_duration_seconds_count{route="/blog/<slug:slug>/",method="GET"} 1', body)
+        self.assertIn('http_request_sql_seconds_bucket{route="/blog/<slug:slug>/",le="+Inf"} 1', body)
+        self.assertNotIn('missing-post', body)
+
+    def test_response_is_prometheus_text(self):
+        """Test that /metrics declares the Prometheus text format"""
+        response = self.staff.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('# TYPE http_request_duration_seconds histogram', response.content.decode())
+
+    def test_processes_are_summed(self):
+        """Test that the files of other processes are added to this one's totals"""
+        metrics.RESPONSES.inc('/', 'GET', '200')
+        self.write_process(101, {'http_responses_total': {'["/", "GET", "200"]': 2}})
+        self.write_process(102, {'http_responses_total': {'["/", "GET", "200"]': 3}})
+        self.assertEqual(metrics.collect()['http_responses_total']['["/", "GET", "200"]'], 6)
+
+    def test_exited_process_is_archived_once(self):
+        """Test that a recycled worker's totals are kept without being counted twice"""
+        self.write_process(101, {'email_send_failures_total': {'["SMTPException"]': 2}})
+        metrics.mark_process_dead(101)
+        metrics.mark_process_dead(101)
+        self.write_process(102, {'email_send_failures_total': {'["SMTPException"]': 1}})
+        self.assertNotIn('101-1.json', os.listdir(self.directory))
+        self.assertEqual(metrics.collect()['email_send_failures_total']['["SMTPException"]'], 3)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that histogram buckets are rendered cumulatively with sum and count"""
+        metrics.EMAIL_SEND.observe(0.07, 'sent')
+        metrics.EMAIL_SEND.observe(20.0, 'sent')
+        body = metrics.render()
+        self.assertIn('email_send_duration_seconds_bucket{outcome="sent",le="0.05"} 0', body)
+        self.assertIn('email_send_duration_seconds_bucket{outcome="sent",le="0.1"} 1', body)
+        self.assertIn('email_send_duration_seconds_bucket{outcome="sent",le="+Inf"} 2', body)
+        self.assertIn('email_send_duration_seconds_sum{outcome="sent"} 20.07', body)
+
+    @override_settings(EMAIL_HOST_USER='admin@example.com')
+    def test_email_failures_are_counted(self):
+        """Test that outbox send failures are counted by error type"""
+        Client().post('/contact/', {'name': 'Test', 'email': 'test@example.com', 'message': 'Hi'})
+        with mock.patch('home.outbox.EmailMultiAlternatives.send', side_effect=OSError('boom')):
+            send_pending()
+        body = metrics.render()
+        self.assertIn('email_send_failures_total{error="OSError"} 2', body)
+        self.assertIn('email_send_duration_seconds_count{outcome="failed"} 2', body)
+
+    def test_staff_only_without_token(self):
+        """Test that anonymous visitors cannot read metrics when no token is set"""
+        self.assertEqual(Client().get('/metrics').status_code, 401)
+        self.assertEqual(Client().get('/metrics', HTTP_AUTHORIZATION='Bearer ').status_code, 401)
+        self.assertEqual(self.staff.get('/metrics').status_code, 200)
+
+    def test_token_admits_scraper(self):
+        """Test that METRICS_TOKEN lets a bearer-token holder scrape without signing in"""
+        with self.settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(Client().get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+            response = Client().get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+
+    def test_processes_publish_only_when_shared(self):
+        """Test that a process which did not opt in writes nothing to METRICS_DIR"""
+        metrics.share(False)
+        metrics.RESPONSES.inc('/', 'GET', '200')
+        metrics.flush()
+        self.write_process(101, {'http_responses_total': {'["/", "GET", "200"]': 2}})
+        self.assertEqual(os.listdir(self.directory), ['101-1.json'])
+        self.assertEqual(metrics.collect()['http_responses_total']['["/", "GET", "200"]'], 1)
+
+
+@override_settings(CONTACT_RATE_LIMIT=True, CONTACT_RATE_BURST=2, CONTACT_RATE_PERIOD=60, RATELIMIT_PROXY_COUNT=0)
+class ContactRateLimitTests(TestCase):
+    """Test cases for the fixed-window limit on contact submissions"""
+
+    def setUp(self):
+        cache.clear()
+        # 60 seconds into the 120-second window from 960 to 1080
+        patcher = mock.patch('home.ratelimit.time.time', return_value=1020.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.data = {'name': 'Test User', 'email': 'test@example.com', 'message': 'Test message'}
+
+    def post(self, url, email='test@example.com', ip='10.0.0.1'):
+        return Client().post(url, {**self.data, 'email': email}, REMOTE_ADDR=ip)
+
+    def test_form_is_limited_by_ip(self):
+        """Test that a burst from one address is cut off with 429 and Retry-After"""
+        for i in range(2):
+            self.assertEqual(self.post('/contact/', email=f'user{i}@example.com').status_code, 302)
+        response = self.post('/contact/', email='user3@example.com')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+        self.assertEqual(ContactMessage.objects.count(), 2)
+        self.assertEqual(self.post('/contact/', email='user3@example.com', ip='10.0.0.2').status_code, 302)
+
+    def test_form_is_limited_by_email(self):
+        """Test that one email address is limited across client addresses"""
+        self.post('/', ip='10.0.0.1')
+        self.post('/contact/', ip='10.0.0.2')
+        self.assertEqual(self.post('/contact/', ip='10.0.0.3').status_code, 429)
+        self.assertEqual(self.post('/', email='TEST@example.com ', ip='10.0.0.4').status_code, 429)
+
+    def test_rejected_post_does_no_database_work(self):
+        """Test that a limited POST is answered before validation or any query"""
+        self.post('/contact/')
+        self.post('/contact/')
+        with self.assertNumQueries(0):
+            response = Client().post('/contact/', {'email': 'test@example.com'}, REMOTE_ADDR='10.0.0.9')
+        self.assertEqual(response.status_code, 429)
+
+    def test_api_is_limited(self):
+        """Test that the contact API shares the buckets and returns DRF's 429"""
+        self.post('/contact/', email='first@example.com')
+        self.assertEqual(self.post('/api/contact/', email='second@example.com').status_code, 201)
+        with self.assertNumQueries(0):
+            response = self.post('/api/contact/', email='third@example.com')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(OutboundEmail.objects.count(), 4)
+
+    def test_limit_resets_each_window(self):
+        """Test that a new window allows another burst"""
+        self.post('/contact/')
+        self.post('/contact/')
+        self.assertEqual(self.post('/contact/').status_code, 429)
+        with mock.patch('home.ratelimit.time.time', return_value=1081.0):
+            self.assertEqual(self.post('/contact/', email='other@example.com').status_code, 302)
+            self.assertEqual(self.post('/contact/', email='another@example.com').status_code, 302)
+            self.assertEqual(self.post('/contact/', email='third@example.com').status_code, 429)
+
+    def test_window_boundary_allows_two_bursts(self):
+        """Test that bursts either side of a window boundary both go through, and no more"""
+        with mock.patch('home.ratelimit.time.time', return_value=1079.0):
+            self.assertEqual(self.post('/contact/', email='a@example.com').status_code, 302)
+            self.assertEqual(self.post('/contact/', email='b@example.com').status_code, 302)
+            response = self.post('/contact/', email='c@example.com')
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response['Retry-After'], '1')
+        with mock.patch('home.ratelimit.time.time', return_value=1080.0):
+            self.assertEqual(self.post('/contact/', email='c@example.com').status_code, 302)
+            self.assertEqual(self.post('/contact/', email='d@example.com').status_code, 302)
+            self.assertEqual(self.post('/contact/', email='e@example.com').status_code, 429)
+        self.assertEqual(ContactMessage.objects.count(), 4)
+
+    def test_rejected_post_leaves_other_limit_alone(self):
+        """Test that a message refused for its email does not count against its address"""
+        self.post('/contact/', ip='10.0.0.1')
+        self.post('/contact/', ip='10.0.0.2')
+        self.assertEqual(self.post('/contact/', ip='10.0.0.3').status_code, 429)
+        self.assertEqual(self.post('/contact/', email='a@example.com', ip='10.0.0.3').status_code, 302)
+        self.assertEqual(self.post('/contact/', email='b@example.com', ip='10.0.0.3').status_code, 302)
+
+    def test_lost_race_gives_back_its_count(self):
+        """Test that a request pushed over the limit by a concurrent one undoes its counts"""
+        request = RequestFactory().post('/contact/', REMOTE_ADDR='10.0.0.1')
+        contact_wait(request, 'test@example.com')
+        with mock.patch.object(cache, 'get_many', return_value={}):
+            contact_wait(request, 'test@example.com')
+            self.assertTrue(contact_wait(request, 'test@example.com'))
+        self.assertEqual(sorted(cache.get_many(_counters(request, 'test@example.com', 1020.0)[0]).values()), [2, 2])
+
+    def test_forwarded_for_is_trusted_per_proxy(self):
+        """Test that the client address is read past the configured number of proxies"""
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2, 3.3.3.3', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(client_ip(request), '10.0.0.1')
+        with self.settings(RATELIMIT_PROXY_COUNT=2):
+            self.assertEqual(client_ip(request), '2.2.2.2')
+
+
+@override_settings(CONTACT_RATE_LIMIT=False, CONTACT_DUPLICATE_WINDOW=600)
+class DuplicateSubmissionTests(TestCase):
+    """Test cases for acknowledging repeated contact messages without saving them"""
+
+    def setUp(self):
+        cache.clear()
+        self.data = {'name': 'Test User', 'email': 'test@example.com', 'message': 'Hello there'}
+
+    def test_resubmitted_form_is_saved_once(self):
+        """Test that a double-clicked form saves one message and queues its emails once"""
+        for _ in range(2):
+            response = Client().post('/contact/', self.data, follow=True)
+            self.assertContains(response, 'Your message has been sent successfully!')
+        self.assertEqual(ContactMessage.objects.count(), 1)
+        self.assertEqual(OutboundEmail.objects.count(), 2)
+
+    def test_api_repeat_is_acknowledged(self):
+        """Test that the API answers a repeat with 201 without saving it"""
+        Client().post('/contact/', self.data)
+        response = Client().post('/api/contact/', self.data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+    def test_fingerprint_ignores_case_and_whitespace(self):
+        """Test that trivially different copies count as repeats"""
+        submit_contact('Test User', 'test@example.com', 'Hello there')
+        _, created = submit_contact(' test  user', 'TEST@example.com', 'Hello\n there ')
+        self.assertFalse(created)
+        _, created = submit_contact('Test User', 'test@example.com', 'Hello again')
+        self.assertTrue(created)
+        self.assertEqual(ContactMessage.objects.count(), 2)
+
+    def test_repeat_after_window_is_saved(self):
+        """Test that the same message is saved again once the window has passed"""
+        first, _ = submit_contact(**self.data)
+        ContactMessage.objects.filter(pk=first.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        cache.clear()
+        _, created = submit_contact(**self.data)
+        self.assertTrue(created)
+
+    def test_repeat_is_found_without_the_cache(self):
+        """Test that the indexed fingerprint catches repeats when the claim is gone"""
+        first, _ = submit_contact(**self.data)
+        cache.clear()
+        contact, created = submit_contact(**self.data)
+        self.assertEqual((contact, created), (first, False))
+        self.assertEqual(first.fingerprint, ContactMessage.compute_fingerprint(**self.data))
+
+    def test_failed_save_releases_the_claim(self):
+        """Test that a submission that could not be saved can be retried"""
+        with mock.patch('home.submissions.queue_contact_emails', side_effect=OSError('boom')):
+            with self.assertRaises(OSError):
+                submit_contact(**self.data)
+        _, created = submit_contact(**self.data)
+        self.assertTrue(created)
+
+    def test_claim_is_short_lived(self):
+        """Test that the claim expires long before the duplicate window"""
+        with mock.patch('home.submissions.cache') as fake_cache:
+            fake_cache.add.return_value = True
+            submit_contact(**self.data)
+        self.assertEqual(fake_cache.add.call_args.args[2], CLAIM_TIMEOUT)
+        self.assertLess(CLAIM_TIMEOUT, settings.CONTACT_DUPLICATE_WINDOW)
+
+    def test_deleted_message_can_be_resent_once_claim_expires(self):
+        """Test that a claim outliving its message only blocks a retry until it expires"""
+        first, _ = submit_contact(**self.data)
+        first.delete()
+        contact, created = submit_contact(**self.data)
+        self.assertEqual((contact, created), (None, False))
+        cache.delete(f'{CLAIM_KEY_PREFIX}:{first.fingerprint}')
+        _, created = submit_contact(**self.data)
+        self.assertTrue(created)
+
+
+@override_settings(CONTACT_DUPLICATE_WINDOW=0)
+class ContactArchiveTests(TestCase):
+    """Test cases for monthly contact retention and archival"""
+
+    JANUARY = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+    DECEMBER = datetime(2023, 12, 1, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        # On PostgreSQL migration 0019 partitions the table by month
+        self.partitioned = connection.vendor == 'postgresql'
+
+    def tearDown(self):
+        shutil.rmtree(self.archive_dir, ignore_errors=True)
+
+    def message(self, name, created_at):
+        contact, _ = submit_contact(name, f'{name.lower()}@example.com', 'Hello')
+        ContactMessage.objects.filter(pk=contact.pk).update(created_at=created_at)
+        return contact
+
+    def archive(self, **options):
+        out = StringIO()
+        call_command('archive_contact_messages', archive_dir=self.archive_dir, stdout=out, **options)
+        return out.getvalue()
+
+    def read_archive(self, month):
+        with gzip.open(partitions.archive_path(self.archive_dir, month), 'rt') as f:
+            return [json.loads(line) for line in f]
+
+    def require_partitions(self):
+        if not self.partitioned:
+            self.skipTest('Contact messages are only partitioned on PostgreSQL')
+
+    def test_month_arithmetic(self):
+        """Test month boundaries, partition names and the retention cutoff"""
+        month = partitions.month_start(datetime(2026, 11, 30, 23, 59, tzinfo=dt_timezone.utc))
+        self.assertEqual(month, datetime(2026, 11, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(partitions.add_months(month, 3), datetime(2027, 2, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(partitions.add_months(month, -11), datetime(2025, 12, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(partitions.partition_name(month), 'home_contactmessage_y2026m11')
+        self.assertEqual(partitions.retention_cutoff(2, now=month), datetime(2026, 9, 1, tzinfo=dt_timezone.utc))
+
+    def test_table_is_partitioned_on_postgresql(self):
+        """Test that the table is partitioned exactly where the migration does it"""
+        self.assertEqual(partitions.is_partitioned(), self.partitioned)
+        if self.partitioned:
+            current = partitions.month_start(timezone.now())
+            self.assertIn(current, partitions.partitions())
+            self.assertIn(partitions.add_months(current, partitions.MONTHS_AHEAD), partitions.partitions())
+
+    def test_expired_months_are_archived_and_removed(self):
+        """Test that old months are written to gzipped JSON Lines and leave the table"""
+        old = self.message('Old', datetime(2024, 1, 15, tzinfo=dt_timezone.utc))
+        self.message('Older', datetime(2023, 12, 31, 23, tzinfo=dt_timezone.utc))
+        recent = self.message('Recent', timezone.now())
+
+        output = self.archive(retain_months=12)
+
+        self.assertEqual(list(ContactMessage.objects.all()), [recent])
+        rows = self.read_archive(self.JANUARY)
+        self.assertEqual([(row['id'], row['email']) for row in rows], [(old.pk, 'old@example.com')])
+        self.assertEqual(rows[0]['fingerprint'], old.fingerprint)
+        self.assertEqual(len(self.read_archive(self.DECEMBER)), 1)
+        self.assertIn('Archived 2 message(s) from 2 month(s)', output)
+        # Queued emails of archived messages are kept, without the link
+        self.assertEqual(OutboundEmail.objects.filter(contact__isnull=True).count(), 4)
+        self.assertEqual(OutboundEmail.objects.filter(contact=recent).count(), 2)
+        self.assertEqual(get_counts()['contactmessage'], 1)
+
+    def test_dry_run_changes_nothing(self):
+        """Test that --dry-run only lists the expired months"""
+        self.message('Old', datetime(2024, 1, 15, tzinfo=dt_timezone.utc))
+        output = self.archive(retain_months=12, dry_run=True)
+        self.assertIn('Would archive 2024-01', output)
+        self.assertEqual(ContactMessage.objects.count(), 1)
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+    def test_nothing_to_archive(self):
+        """Test that recent messages are left alone"""
+        self.message('Recent', timezone.now())
+        self.assertIn('No contact messages past the retention period', self.archive())
+        self.assertEqual(ContactMessage.objects.count(), 1)
+
+    def test_expired_partitions_are_detached_and_dropped(self):
+        """Test that archived months' partitions leave the table and the database"""
+        self.require_partitions()
+        self.message('Old', datetime(2024, 1, 15, tzinfo=dt_timezone.utc))
+        self.archive(retain_months=12)
+        self.assertNotIn(self.JANUARY, partitions.partitions())
+        self.assertNotIn(partitions.partition_name(self.JANUARY), connection.introspection.table_names())
+
+    def test_keep_tables_only_detaches(self):
+        """Test that --keep-tables leaves the detached partition in place"""
+        self.require_partitions()
+        contact = self.message('Old', datetime(2024, 1, 15, tzinfo=dt_timezone.utc))
+        self.archive(retain_months=12, keep_tables=True)
+        name = partitions.partition_name(self.JANUARY)
+        self.assertNotIn(self.JANUARY, partitions.partitions())
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM {name}')
+            self.assertEqual(cursor.fetchall(), [(contact.pk,)])
+        self.assertFalse(OutboundEmail.objects.filter(contact_id=contact.pk).exists())
+
+    def test_default_partition_months_get_partitions(self):
+        """Test that months left in the default partition are moved out and become archivable"""
+        self.require_partitions()
+        # Older than the partitions the migration created, so in the default partition
+        self.message('Old', datetime(2024, 1, 15, tzinfo=dt_timezone.utc))
+        missed = partitions.add_months(partitions.month_start(timezone.now()), -2)
+        kept = self.message('Missed', missed + timedelta(days=3))
+        self.assertEqual(partitions.default_months(), [self.JANUARY, missed])
+
+        self.assertIn('Would archive 2024-01', self.archive(retain_months=12, dry_run=True))
+        self.archive(retain_months=12)
+
+        self.assertEqual(partitions.default_months(), [])
+        self.assertIn(missed, partitions.partitions())
+        self.assertEqual(list(ContactMessage.objects.all()), [kept])
+        self.assertEqual(len(self.read_archive(self.JANUARY)), 1)
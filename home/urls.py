@@ -1,17 +1,26 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Async variants of the public pages for ASGI deployments
+pages = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
-    path('', views.home, name='home'),
-    path('about/', views.about, name='about'),
-    path('projects/', views.projects, name='projects'),
-    path('contact/', views.contact, name='contact'),
-    path('blog/', views.blog, name='blog'),
+    path('', pages.home, name='home'),
+    path('about/', pages.about, name='about'),
+    path('projects/', pages.projects, name='projects'),
+    path('contact/', pages.contact, name='contact'),
+    path('blog/', pages.blog, name='blog'),
+    path('blog/<slug:slug>/', views.blog_detail, name='blog_detail'),
+    path('search/', views.search, name='search'),
+    path('metrics', views.metrics, name='metrics'),
 
     # Custom Admin Panel
     path('panel/', views.admin_login, name='admin_login'),
     path('panel/dashboard/', views.admin_dashboard, name='admin_dashboard'),
     path('panel/logout/', views.admin_logout, name='admin_logout'),
+    path('panel/db-pool/', views.admin_db_pool, name='admin_db_pool'),
+    path('panel/<str:model_name>/table/', views.admin_table, name='admin_table'),
     path('panel/<str:model_name>/add/', views.admin_add, name='admin_add'),
     path('panel/<str:model_name>/edit/<int:pk>/', views.admin_edit, name='admin_edit'),
     path('panel/<str:model_name>/delete/<int:pk>/', views.admin_delete, name='admin_delete'),
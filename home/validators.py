@@ -2,9 +2,10 @@
 Custom validators for profile picture uploads
 """
 from django.core.exceptions import ValidationError
-from django.core.files.images import get_image_dimensions
 import os
 
+from .image_ingest import sniff_image
+
 
 # Maximum file size: 5MB
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
@@ -46,13 +47,16 @@ def validate_profile_image(image_file):
             f'Invalid image format. Allowed formats: {", ".join(ALLOWED_FORMATS)}'
         )
     
-    # Check image dimensions
+    # Check image dimensions from the header; the parse is memoized on the
+    # upload, so form, model and save() validation share a single read
     try:
-        width, height = get_image_dimensions(image_file)
+        info = sniff_image(image_file)
         
-        if width is None or height is None:
+        if info is None:
             raise ValidationError('Unable to determine image dimensions. Please upload a valid image.')
         
+        width, height = info.width, info.height
+        
         if width < MIN_WIDTH or height < MIN_HEIGHT:
             raise ValidationError(
                 f'Image is too small. Minimum dimensions: {MIN_WIDTH}x{MIN_HEIGHT}px. Your image: {width}x{height}px'
@@ -1,75 +1,50 @@
-from django.shortcuts import render, redirect
-from django.contrib import messages
-from django.core.mail import send_mail
 from django.conf import settings
-from django.template.loader import render_to_string
+from django.core.paginator import Paginator
+from django.shortcuts import get_object_or_404, render, redirect
+from django.views.static import serve
+from django.contrib import messages
 import logging
 
 from .models import Project, Experience, ContactMessage, Blog, Education, Profile
 from .forms import ContactForm
+from .cache import cache_page_by_versions, conditional_by_versions
+from .ratelimit import rate_limit_contact
+from .search import SearchResults
+from .submissions import submit_contact
+from .storage import is_content_addressed
 
 logger = logging.getLogger(__name__)
 
 
+def serve_media(request, path, document_root=None):
+    """Serve uploads, marking content-hashed files as cacheable forever."""
+    response = serve(request, path, document_root=document_root or settings.MEDIA_ROOT)
+    if is_content_addressed(path):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
 def _handle_contact_form(request):
-    """Validate, save to DB, and send email. Returns (success: bool, form)."""
+    """Validate, save to DB, and queue emails. Returns (success: bool, form)."""
     form = ContactForm(request.POST)
     if form.is_valid():
-        contact = form.save()
-
-        # Send email notification to admin
-        subject = f'New Contact Message from {contact.name}'
-        html_body = f"""
-        <html>
-            <body>
-                <h2>New Contact Message</h2>
-                <p><strong>Name:</strong> {contact.name}</p>
-                <p><strong>Email:</strong> {contact.email}</p>
-                <p><strong>Message:</strong></p>
-                <p>{contact.message.replace(chr(10), '<br>')}</p>
-            </body>
-        </html>
-        """
-        
-        try:
-            send_mail(
-                subject,
-                f"Name: {contact.name}\nEmail: {contact.email}\nMessage:\n{contact.message}",
-                settings.DEFAULT_FROM_EMAIL,
-                [settings.EMAIL_HOST_USER],
-                fail_silently=False,
-                html_message=html_body,
-            )
-            logger.info(f'✓ Admin notification email sent for message from {contact.email}')
-        except Exception as e:
-            # Email sending failed but the message is already saved in DB
-            logger.error(f'✗ Failed to send admin email: {type(e).__name__}: {str(e)}')
-            messages.warning(request, f'Message saved but admin notification failed: {str(e)}')
-
-        # Send confirmation email to the visitor
-        try:
-            html_content = render_to_string(
-                'main/emails/confirmations_email.html',
-                {'name': contact.name, 'message': contact.message},
-            )
-            send_mail(
-                'Thank You for Reaching Out — Arun Sah\'s Portfolio',
-                f'Hi {contact.name}, thank you for visiting my portfolio and reaching out. I have received your message and will get back to you soon.',
-                settings.DEFAULT_FROM_EMAIL,
-                [contact.email],
-                fail_silently=False,
-                html_message=html_content,
-            )
-            logger.info(f'✓ Confirmation email sent to {contact.email}')
-        except Exception as e:
-            # Confirmation email failed but the message is already saved
-            logger.error(f'✗ Failed to send confirmation email to {contact.email}: {type(e).__name__}: {str(e)}')
-            messages.warning(request, f'Your message was saved but confirmation email failed: {str(e)}')
-
+        data = form.cleaned_data
+        _, created = submit_contact(data['name'], data['email'], data['message'])
+        if created:
+            logger.info(f'✓ Contact message from {data["email"]} saved and emails queued')
+        else:
+            logger.info(f'Repeated contact message from {data["email"]} acknowledged without saving')
         return True, form
     return False, form
 
 
+# Blog listings never load the Markdown source or the rendered body
+BLOG_LIST_FIELDS = ('title', 'slug', 'excerpt', 'reading_time', 'created_at')
+
+
+@rate_limit_contact
+@conditional_by_versions('profile', 'education', 'experience', 'project', 'blog')
+@cache_page_by_versions('profile', 'education', 'experience', 'project', 'blog')
 def home(request):
     if request.method == 'POST':
         success, form = _handle_contact_form(request)
@@ -86,12 +61,13 @@ def home(request):
         'profile': Profile.objects.first(),
         'educations': Education.objects.all(),
         'experiences': Experience.objects.all(),
-        'projects': Project.objects.all(),
-        'blogs': Blog.objects.filter(is_published=True),
+        'projects': Project.objects.prefetch_related('image_variants', 'tech_links__tag'),
+        'blogs': Blog.objects.filter(is_published=True).only(*BLOG_LIST_FIELDS),
     }
     return render(request, 'main/home.html', context)
 
 
+@cache_page_by_versions('experience', 'profile')
 def about(request):
     experiences = Experience.objects.all()
     profile = Profile.objects.first()
@@ -101,11 +77,14 @@ def about(request):
     })
 
 
+@conditional_by_versions('project')
+@cache_page_by_versions('project')
 def projects(request):
     projects = Project.objects.all()
     return render(request, 'main/projects.html', {'projects': projects})
 
 
+@rate_limit_contact
 def contact(request):
     if request.method == 'POST':
         success, form = _handle_contact_form(request)
@@ -120,19 +99,48 @@ def contact(request):
     return render(request, 'main/contact.html', {'form': form})
 
 
+@conditional_by_versions('blog')
+@cache_page_by_versions('blog')
 def blog(request):
-    blogs = Blog.objects.filter(is_published=True)
+    blogs = Blog.objects.filter(is_published=True).only(*BLOG_LIST_FIELDS)
     return render(request, 'main/blog.html', {'blogs': blogs})
 
 
+@conditional_by_versions('blog')
+@cache_page_by_versions('blog')
+def blog_detail(request, slug):
+    blog = get_object_or_404(
+        Blog.objects.only('title', 'slug', 'content_html', 'excerpt', 'reading_time', 'created_at', 'updated_at'),
+        slug=slug,
+        is_published=True,
+    )
+    return render(request, 'main/blog_detail.html', {'blog': blog})
+
+
+SEARCH_PAGE_SIZE = 10
+
+
+@conditional_by_versions('blog', 'project')
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page = Paginator(SearchResults(query), SEARCH_PAGE_SIZE).get_page(request.GET.get('page'))
+    return render(request, 'main/search.html', {'query': query, 'page': page})
+
+
 # ============================================================
 # CUSTOM ADMIN PANEL VIEWS
 # ============================================================
 from django.contrib.auth import authenticate, login, logout
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import get_object_or_404
+from django.http import Http404, HttpResponse, JsonResponse
+from django.db.models.functions import Left
 from .models import ContactMessage
 from .admin_forms import ProjectForm, BlogForm, EducationForm, ExperienceForm
+from .counters import get_counts
+from django.utils.crypto import constant_time_compare
+from .db_pool import pool_stats
+from .metrics import render as render_metrics
 
 # Model configuration map for DRY CRUD
 MODEL_CONFIG = {
@@ -141,42 +149,52 @@ MODEL_CONFIG = {
         'form': ProjectForm,
         'icon': 'fa-folder-open',
         'label': 'Project',
+        'list_fields': ('title', 'tech_stack', 'order'),
     },
     'blog': {
         'model': Blog,
         'form': BlogForm,
         'icon': 'fa-pen-to-square',
         'label': 'Blog Post',
+        'list_fields': ('title', 'is_published', 'created_at'),
     },
     'education': {
         'model': Education,
         'form': EducationForm,
         'icon': 'fa-graduation-cap',
         'label': 'Education',
+        'list_fields': ('institution', 'degree', 'duration'),
     },
     'experience': {
         'model': Experience,
         'form': ExperienceForm,
         'icon': 'fa-briefcase',
         'label': 'Experience',
+        'list_fields': ('organization', 'role', 'duration'),
     },
     'contactmessage': {
         'model': ContactMessage,
         'form': None,
         'icon': 'fa-envelope',
         'label': 'Contact Message',
+        'list_fields': ('name', 'email', 'created_at'),
     },
 }
 
 
+# Rows per page in the lazily loaded dashboard tables
+DASHBOARD_PAGE_SIZE = 25
+
+
 def _admin_context():
     """Common context for all admin pages (sidebar counts)."""
+    counts = get_counts()
     return {
-        'project_count': Project.objects.count(),
-        'blog_count': Blog.objects.count(),
-        'education_count': Education.objects.count(),
-        'experience_count': Experience.objects.count(),
-        'message_count': ContactMessage.objects.count(),
+        'project_count': counts['project'],
+        'blog_count': counts['blog'],
+        'education_count': counts['education'],
+        'experience_count': counts['experience'],
+        'message_count': counts['contactmessage'],
     }
 
 
@@ -206,18 +224,46 @@ def admin_logout(request):
 
 @login_required(login_url='admin_login')
 def admin_dashboard(request):
+    # Tables are fetched separately by admin_table as each section comes into view
     context = _admin_context()
-    context.update({
-        'active_tab': 'dashboard',
-        'projects': Project.objects.all(),
-        'blogs': Blog.objects.all(),
-        'educations': Education.objects.all(),
-        'experiences': Experience.objects.all(),
-        'contact_messages': ContactMessage.objects.all().order_by('-created_at'),
-    })
+    context['active_tab'] = 'dashboard'
     return render(request, 'main/admin_dashboard.html', context)
 
 
+@login_required(login_url='admin_login')
+def admin_table(request, model_name):
+    """One page of a dashboard table, rendered as an HTML fragment."""
+    config = MODEL_CONFIG.get(model_name)
+    if not config:
+        raise Http404
+
+    try:
+        number = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        number = 1
+
+    model = config['model']
+    queryset = model.objects.only(*config['list_fields'])
+    if model is ContactMessage:
+        # Only the start of each message is shown, so don't fetch whole bodies
+        queryset = queryset.annotate(message_preview=Left('message', 200))
+    ordering = list(model._meta.ordering) + ['id']
+
+    # Fetch one extra row instead of running COUNT(*) to know if there is a next page
+    offset = (number - 1) * DASHBOARD_PAGE_SIZE
+    rows = list(queryset.order_by(*ordering)[offset:offset + DASHBOARD_PAGE_SIZE + 1])
+    page = {
+        'number': number,
+        'has_previous': number > 1,
+        'has_next': len(rows) > DASHBOARD_PAGE_SIZE,
+    }
+    return render(request, f'main/admin_tables/{model_name}.html', {
+        'rows': rows[:DASHBOARD_PAGE_SIZE],
+        'page': page,
+        'model_name': model_name,
+    })
+
+
 @login_required(login_url='admin_login')
 def admin_add(request, model_name):
     config = MODEL_CONFIG.get(model_name)
@@ -292,3 +338,25 @@ def admin_delete(request, model_name, pk):
         'active_tab': f'{model_name}s',
     })
     return render(request, 'main/admin_delete.html', context)
+
+
+@staff_member_required(login_url='admin_login')
+def admin_db_pool(request):
+    """Connection pool statistics of the worker process serving this request."""
+    return JsonResponse(pool_stats())
+
+
+def metrics(request):
+    """
+    Prometheus metrics of every app-server process, for scraping.
+
+    Scrapers send `Authorization: Bearer <METRICS_TOKEN>`; otherwise only
+    signed-in staff may read them.
+    """
+    token = settings.METRICS_TOKEN
+    scraper = bool(token) and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not scraper and not (request.user.is_active and request.user.is_staff):
+        response = HttpResponse('Unauthorized', status=401, content_type='text/plain')
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
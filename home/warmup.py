@@ -0,0 +1,53 @@
+"""
+Prime a freshly started app-server worker before it accepts traffic.
+
+Called from the gunicorn `post_fork` hook (see gunicorn.conf.py) so the
+first visitors to each worker don't pay for compiling templates, building
+the URL resolver or opening a database connection.
+"""
+import logging
+import time
+
+from django.db import DatabaseError, connections
+from django.template.loader import get_template
+from django.urls import get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+# Every template a public page can render, parents and includes included
+PUBLIC_TEMPLATES = (
+    'main/base.html',
+    'main/navbar.html',
+    'main/footer.html',
+    'main/home.html',
+    'main/about.html',
+    'main/projects.html',
+    'main/contact.html',
+    'main/blog.html',
+    'main/blog_detail.html',
+    'main/search.html',
+)
+
+
+def warm_up():
+    """
+    Compile public templates, populate the URL resolver and connect to every
+    database. Returns the time taken in milliseconds.
+    """
+    started = time.perf_counter()
+
+    for name in PUBLIC_TEMPLATES:
+        get_template(name)
+
+    # The first reverse() builds the reverse lookup tables of every URLconf
+    get_resolver().url_patterns
+    reverse('home')
+
+    # A database that is still starting must not stop the worker from booting
+    for connection in connections.all():
+        try:
+            connection.ensure_connection()
+        except DatabaseError as e:
+            logger.warning(f'Could not connect to database {connection.alias!r} during warmup: {e}')
+
+    return (time.perf_counter() - started) * 1000
@@ -0,0 +1,225 @@
+"""
+Benchmark the public pages and API: sync views under WSGI vs async views under ASGI
+Usage: python tools/benchmark_asgi.py [--concurrency 200] [--requests 2000] [--threads 8] [--db-latency 5]
+
+Both handlers run in-process against a throwaway test database, so no server
+is needed. WSGI requests are served by a pool of --threads threads, like one
+threaded gunicorn worker; ASGI requests all run on one event loop, like one
+uvicorn worker. --concurrency clients send requests back to back in both
+cases. --db-latency adds a delay to every query to stand in for the network
+round trip to a remote database. The async ORM still runs each request's
+queries one at a time on a single thread, so expect ASGI to trail WSGI here
+(about 0.6x the throughput at --concurrency 50 --db-latency 5).
+The page cache is disabled unless --cached is given.
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Portfolio.settings')
+
+DEFAULT_PATHS = ['/', '/projects/', '/blog/', '/api/projects/', '/api/blogs/']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=200, help='Concurrent clients')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per handler')
+    parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads')
+    parser.add_argument('--db-latency', type=float, default=5.0, help='Milliseconds added to every query')
+    parser.add_argument('--rows', type=int, default=20, help='Rows seeded per content model')
+    parser.add_argument('--cached', action='store_true', help='Keep the page cache enabled')
+    parser.add_argument('paths', nargs='*', default=DEFAULT_PATHS)
+    return parser.parse_args()
+
+
+args = parse_args()
+# Settings are read from the environment, so these must be set before setup
+os.environ['DEBUG'] = 'False'
+os.environ.setdefault('STATIC_MANIFEST', 'False')
+if not args.cached:
+    os.environ['CACHE_BACKEND'] = 'django.core.cache.backends.dummy.DummyCache'
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.db.backends.utils import CursorWrapper
+from django.test.utils import setup_test_environment
+from django.urls import clear_url_caches
+
+from home.models import Blog, Education, Experience, Profile, Project
+
+
+def add_query_latency(seconds):
+    """Make every query block its thread for `seconds`, as a remote database would."""
+    execute, executemany = CursorWrapper.execute, CursorWrapper.executemany
+
+    def slow_execute(self, *a, **kw):
+        time.sleep(seconds)
+        return execute(self, *a, **kw)
+
+    def slow_executemany(self, *a, **kw):
+        time.sleep(seconds)
+        return executemany(self, *a, **kw)
+
+    CursorWrapper.execute, CursorWrapper.executemany = slow_execute, slow_executemany
+
+
+def seed(rows):
+    Profile.objects.create()
+    for i in range(rows):
+        Project.objects.create(title=f'Project {i}', description='Description ' * 20, tech_stack='Django, React, Postgres', order=i)
+        Blog.objects.create(title=f'Post {i}', content='Some *Markdown* text. ' * 50, is_published=True)
+        Experience.objects.create(organization=f'Org {i}', role='Engineer', duration='2020 - 2024', description='Work', order=i)
+        Education.objects.create(institution=f'School {i}', degree='BSc', duration='2016 - 2020', order=i)
+
+
+def use_async_views(enabled):
+    from Portfolio import urls as portfolio_urls
+    from home import api_urls, urls
+
+    settings.ASYNC_VIEWS = enabled
+    for module in (urls, api_urls, portfolio_urls):
+        importlib.reload(module)
+    clear_url_caches()
+
+
+def wsgi_request(app, path):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'wsgi.input': BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+    }
+    status = []
+    body = app(environ, lambda s, headers, exc_info=None: status.append(s))
+    try:
+        for _ in body:
+            pass
+    finally:
+        body.close()
+    return int(status[0].split()[0])
+
+
+async def asgi_request(app, path):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'headers': [(b'host', b'localhost')],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 0),
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Never disconnects; Django cancels this once the response is sent
+        await asyncio.Future()
+
+    status = []
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def load(issue, paths, total, concurrency):
+    """Run `total` requests from `concurrency` clients; returns (seconds, latencies, errors)."""
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def client():
+        nonlocal errors
+        for n in counter:
+            started = time.perf_counter()
+            status = await issue(paths[n % len(paths)])
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies, errors
+
+
+def run_wsgi(paths, total, concurrency, threads):
+    use_async_views(False)
+    app = WSGIHandler()
+    pool = ThreadPoolExecutor(max_workers=threads)
+
+    async def issue(path):
+        return await asyncio.get_running_loop().run_in_executor(pool, wsgi_request, app, path)
+
+    try:
+        return asyncio.run(load(issue, paths, total, concurrency))
+    finally:
+        pool.shutdown()
+
+
+def run_asgi(paths, total, concurrency):
+    use_async_views(True)
+    app = ASGIHandler()
+    return asyncio.run(load(lambda path: asgi_request(app, path), paths, total, concurrency))
+
+
+def report(label, elapsed, latencies, errors):
+    latencies = sorted(latencies)
+    pct = statistics.quantiles(latencies, n=100)
+    rps = len(latencies) / elapsed
+    print(
+        f'{label:<6}{rps:>9.1f}{pct[49] * 1000:>9.1f}{pct[94] * 1000:>9.1f}'
+        f'{pct[98] * 1000:>9.1f}{errors:>8}'
+    )
+    return rps
+
+
+def main():
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        seed(args.rows)
+        if args.db_latency:
+            add_query_latency(args.db_latency / 1000)
+        print(
+            f'{args.requests} requests, {args.concurrency} clients, {args.threads} WSGI threads, '
+            f'{args.db_latency:g} ms per query, page cache {"on" if args.cached else "off"}\n'
+        )
+        print(f'{"":<6}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"errors":>8}')
+        wsgi = report('wsgi', *run_wsgi(args.paths, args.requests, args.concurrency, args.threads))
+        asgi = report('asgi', *run_asgi(args.paths, args.requests, args.concurrency))
+        print(f'\nASGI throughput: {asgi / wsgi:.2f}x WSGI')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
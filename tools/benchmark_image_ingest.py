@@ -0,0 +1,115 @@
+"""
+Benchmark profile image ingestion: legacy multi-decode path vs single-decode pipeline
+Usage: python tools/benchmark_image_ingest.py [--size 4000x3000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Portfolio.settings')
+django.setup()
+
+from django.core.files.images import get_image_dimensions
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageFile
+
+from home.image_ingest import ingest_image, sniff_image
+from home.image_utils import compress_and_optimize_profile_image
+
+stats = {'parses': 0, 'decodes': 0, 'pixels': 0}
+_original_open = Image.open
+_original_load = ImageFile.ImageFile.load
+_original_dimensions = get_image_dimensions
+
+
+def _counting_open(*args, **kwargs):
+    stats['parses'] += 1
+    return _original_open(*args, **kwargs)
+
+
+def _counting_load(self):
+    # Only the first load() of an image decodes pixel data
+    if self.tile:
+        stats['decodes'] += 1
+        result = _original_load(self)
+        stats['pixels'] += self.width * self.height
+        return result
+    return _original_load(self)
+
+
+def _counting_dimensions(*args, **kwargs):
+    stats['parses'] += 1
+    return _original_dimensions(*args, **kwargs)
+
+
+Image.open = _counting_open
+ImageFile.ImageFile.load = _counting_load
+
+
+def legacy_ingest(data, name):
+    """
+    The previous upload path: the form, the model validator and Profile.save()
+    each parsed the header, then the worker opened the file for its
+    dimensions, decoded it at full size to compress it and reopened the
+    result to read the new dimensions.
+    """
+    upload = SimpleUploadedFile(name, data)
+    for _ in range(3):
+        _counting_dimensions(upload)
+    with Image.open(BytesIO(data)) as img:
+        img.size
+    optimized, _ = compress_and_optimize_profile_image(BytesIO(data), name)
+    with Image.open(BytesIO(optimized.read())) as img:
+        img.size
+
+
+def pipeline_ingest(data, name):
+    """The same work through the memoized sniff_image and one ingest_image decode."""
+    upload = SimpleUploadedFile(name, data)
+    for _ in range(3):
+        sniff_image(upload)
+    ingest_image(data)
+
+
+def run(func, data, repeat):
+    for key in stats:
+        stats[key] = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(data, 'photo.jpg')
+    elapsed = (time.perf_counter() - started) / repeat
+    return elapsed, {key: value / repeat for key, value in stats.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', default='4000x3000', help='Source image size, WIDTHxHEIGHT')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split('x'))
+    buffer = BytesIO()
+    Image.effect_noise((width, height), 64).convert('RGB').save(buffer, format='JPEG', quality=92)
+    data = buffer.getvalue()
+    print(f'Source: {width}x{height} JPEG, {len(data) / 1024:.1f} KB, {args.repeat} run(s)\n')
+
+    legacy_time, legacy = run(legacy_ingest, data, args.repeat)
+    pipeline_time, pipeline = run(pipeline_ingest, data, args.repeat)
+
+    print(f'{"path":<10}{"parses":>8}{"decodes":>9}{"MPixels":>9}{"ms/upload":>11}')
+    for label, elapsed, counts in (('legacy', legacy_time, legacy), ('pipeline', pipeline_time, pipeline)):
+        print(
+            f'{label:<10}{counts["parses"]:>8.0f}{counts["decodes"]:>9.0f}'
+            f'{counts["pixels"] / 1e6:>9.1f}{elapsed * 1000:>11.1f}'
+        )
+    saved = legacy_time - pipeline_time
+    print(f'\nSaved {saved * 1000:.1f} ms per upload ({saved / legacy_time * 100:.0f}%)')
+
+
+if __name__ == '__main__':
+    main()
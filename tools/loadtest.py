@@ -0,0 +1,280 @@
+"""
+Load-test the site in-process and compare the results with a stored baseline
+Usage: python tools/loadtest.py [--concurrency 16] [--requests 400] [--rows 50] [--messages 500]
+                                [--output results.json] [--baseline baseline.json] [--tolerance 0.15]
+
+A throwaway test database is created on the configured database server and
+seeded with --rows projects, blog posts, experiences and educations and
+--messages contact messages. The public pages, the staff dashboard and every
+/api/ endpoint are then driven one at a time by --concurrency client threads
+calling the WSGI application, --requests requests each, after a short warmup.
+
+Latency percentiles and requests per second are printed and written as JSON
+to --output. With --baseline the run is compared against an earlier output
+file and the exit status is 1 if any endpoint's p95 latency or throughput is
+worse by more than --tolerance. Baselines are only comparable between runs on
+the same machine with the same options; mismatched options are reported.
+
+Run it against PostgreSQL: SQLite's in-memory test database locks whole
+tables, so concurrent contact POSTs there fail with errors.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from io import BytesIO
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Portfolio.settings')
+# Never publish into the site's metrics directory (see home/metrics.py)
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'portfolio-tool-metrics'))
+
+# Settings are read from the environment, so these must be set before setup
+os.environ['DEBUG'] = 'False'
+os.environ.setdefault('STATIC_MANIFEST', 'False')
+# Every contact POST comes from one address with the same message, which the
+# limiter would reject and duplicate detection would not save
+os.environ.setdefault('CONTACT_RATE_LIMIT', 'False')
+os.environ.setdefault('CONTACT_DUPLICATE_WINDOW', '0')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from home import api_urls
+from home.counters import reconcile_counters
+from home.models import Blog, ContactMessage, Education, Experience, Profile, Project
+
+PAGES = ['/', '/projects/', '/blog/']
+STAFF_PAGES = ['/panel/dashboard/']
+TECH = ['Django', 'React', 'PostgreSQL', 'Docker', 'Redis', 'Celery', 'TypeScript', 'Pillow']
+WORDS = 'python django query index cache latency worker request template server database'.split()
+
+# Options that must match for two runs to be comparable
+COMPARABLE = ('concurrency', 'requests', 'rows', 'messages', 'cached', 'database')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=16, help='Client threads per endpoint')
+    parser.add_argument('--requests', type=int, default=400, help='Measured requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per endpoint')
+    parser.add_argument('--rows', type=int, default=50, help='Projects, posts, experiences and educations')
+    parser.add_argument('--messages', type=int, default=500, help='Contact messages')
+    parser.add_argument('--no-cache', dest='cached', action='store_false', help='Bypass the page cache')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare against this earlier --output file')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Allowed regression, as a fraction')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the generated content')
+    return parser.parse_args()
+
+
+def words(rng, n):
+    return ' '.join(rng.choice(WORDS) for _ in range(n))
+
+
+def seed(rows, messages, rng):
+    """Fill the database with deterministic content of the requested volume."""
+    Profile.objects.create()
+    for i in range(rows):
+        Project.objects.create(
+            title=f'Project {i}', description=words(rng, 40), order=i,
+            tech_stack=', '.join(rng.sample(TECH, 3)),
+        )
+        Blog.objects.create(title=f'Post {i} {words(rng, 3)}', content=words(rng, 400), is_published=True)
+        Experience.objects.create(
+            organization=f'Org {i}', role='Engineer', duration='2020 - 2024', description=words(rng, 30), order=i,
+        )
+        Education.objects.create(
+            institution=f'School {i}', degree='BSc', duration='2016 - 2020', description=words(rng, 20), order=i,
+        )
+    ContactMessage.objects.bulk_create(
+        ContactMessage(name=f'Visitor {i}', email=f'visitor{i}@example.com', message=words(rng, 50))
+        for i in range(messages)
+    )
+    # bulk_create skips the signals that maintain the dashboard counters
+    reconcile_counters()
+
+
+def staff_cookie():
+    user = User.objects.create_user('loadtest', password='loadtest', is_staff=True)
+    session = SessionStore()
+    session['_auth_user_id'] = str(user.pk)
+    session['_auth_user_backend'] = 'django.contrib.auth.backends.ModelBackend'
+    session['_auth_user_hash'] = user.get_session_auth_hash()
+    session.create()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+def endpoints(cookie):
+    """(label, method, path, body, cookie) for every endpoint under test."""
+    targets = [(path, 'GET', path, None, None) for path in PAGES]
+    targets += [(path, 'GET', path, None, cookie) for path in STAFF_PAGES]
+    for pattern in api_urls.urlpatterns:
+        path = reverse(pattern.name)
+        if pattern.name == 'api-contact':
+            body = json.dumps({'name': 'Load Test', 'email': 'load@example.com', 'message': 'Hello'})
+            targets.append((f'POST {path}', 'POST', path, body, None))
+        elif pattern.name == 'api-search':
+            targets.append((f'{path}?q=django', 'GET', path + '?' + urlencode({'q': 'django'}), None, None))
+        else:
+            targets.append((path, 'GET', path, None, None))
+    return targets
+
+
+def call(app, method, path, body=None, cookie=None):
+    """Run one request through the WSGI application; returns the status code."""
+    path, _, query = path.partition('?')
+    body = (body or '').encode()
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'HTTP_ACCEPT': 'application/json' if path.startswith('/api/') else 'text/html',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+    }
+    if cookie:
+        environ['HTTP_COOKIE'] = cookie
+    status = []
+    response = app(environ, lambda s, headers, exc_info=None: status.append(s))
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return int(status[0].split()[0])
+
+
+def drive(app, target, total, concurrency):
+    """Send `total` requests from `concurrency` threads; returns (seconds, latencies, errors)."""
+    _, method, path, body, cookie = target
+
+    def timed(_):
+        started = time.perf_counter()
+        status = call(app, method, path, body, cookie)
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(total)))
+    elapsed = time.perf_counter() - started
+    errors = sum(1 for _, status in results if status >= 400)
+    return elapsed, [latency for latency, _ in results], errors
+
+
+def summarize(elapsed, latencies, errors):
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2),
+        'p50_ms': round(cuts[49] * 1000, 2),
+        'p95_ms': round(cuts[94] * 1000, 2),
+        'p99_ms': round(cuts[98] * 1000, 2),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against `baseline`; returns the labels that regressed."""
+    mismatched = [
+        key for key in COMPARABLE
+        if results['meta'].get(key) != baseline['meta'].get(key)
+    ]
+    if mismatched:
+        print(f'\nWarning: baseline was run with different {", ".join(mismatched)}')
+
+    print(f'\n{"vs baseline":<28}{"p95":>10}{"rps":>10}')
+    regressions = []
+    for label, current in results['endpoints'].items():
+        before = baseline['endpoints'].get(label)
+        if before is None:
+            print(f'{label:<28}{"new":>10}')
+            continue
+        p95 = current['p95_ms'] / before['p95_ms'] - 1 if before['p95_ms'] else 0.0
+        rps = current['rps'] / before['rps'] - 1 if before['rps'] else 0.0
+        regressed = p95 > tolerance or rps < -tolerance
+        print(f'{label:<28}{p95:>+10.0%}{rps:>+10.0%}{"  REGRESSED" if regressed else ""}')
+        if regressed:
+            regressions.append(label)
+    return regressions
+
+
+def main():
+    args = parse_args()
+    if not args.cached:
+        settings.CACHES['default']['BACKEND'] = 'django.core.cache.backends.dummy.DummyCache'
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        seed(args.rows, args.messages, random.Random(args.seed))
+        app = WSGIHandler()
+        targets = endpoints(staff_cookie())
+        results = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'concurrency': args.concurrency,
+                'requests': args.requests,
+                'rows': args.rows,
+                'messages': args.messages,
+                'cached': args.cached,
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'machine': platform.node(),
+            },
+            'endpoints': {},
+        }
+
+        print(f'{"endpoint":<28}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"errors":>8}')
+        for target in targets:
+            drive(app, target, args.warmup, args.concurrency)
+            stats = summarize(*drive(app, target, args.requests, args.concurrency))
+            results['endpoints'][target[0]] = stats
+            print(
+                f'{target[0]:<28}{stats["rps"]:>9.1f}{stats["p50_ms"]:>9.1f}'
+                f'{stats["p95_ms"]:>9.1f}{stats["p99_ms"]:>9.1f}{stats["errors"]:>8}'
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nResults written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f'\n{len(regressions)} endpoint(s) regressed by more than {args.tolerance:.0%}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,367 @@
+"""
+Microbenchmarks for the image, validation, serializer and template hot paths
+Usage: python tools/microbench.py [--output bench.json] [--compare previous.json] [--filter serializer]
+                                  [--rounds 5] [--quick] [--tolerance 0.10]
+
+Benchmarks:
+  image.optimize_image / image.compress_profile   RGB JPEG photos of several sizes, RGBA
+                                                  and palette (P) PNGs and large PNG screenshots
+  validate.profile_image                          each upload format the validator accepts
+  serializer.<Name>                               every serializer in home/serializers.py over
+                                                  10, 100, 1,000 and 10,000 rows
+  template.home                                   main/home.html with 10, 100 and 1,000 items
+  metrics.observe / metrics.render                the per-request cost of MetricsMiddleware and
+                                                  a /metrics scrape of 200 routes
+
+Serializer and template benchmarks read from a throwaway test database
+seeded with 10,000 rows per model; the querysets are evaluated before
+timing, so only serialization and rendering are measured.
+
+Each benchmark reports the median, minimum and spread of --rounds timed
+rounds (per call, in ms). Results can be written as JSON with --output and
+diffed against an earlier file with --compare, which exits with status 1
+if any benchmark's median is slower by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Portfolio.settings')
+# Never publish into the site's metrics directory (see home/metrics.py)
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'portfolio-tool-metrics'))
+
+import django
+
+django.setup()
+
+import PIL
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.test.utils import setup_test_environment
+from PIL import Image, ImageDraw
+
+from home import metrics, serializers
+from home.forms import ContactForm
+from home.image_utils import compress_and_optimize_profile_image, optimize_image
+from home.markup import html_to_text, reading_time, render_markdown, summarize
+from home.models import (
+    Blog, ContactMessage, Education, Experience, Profile, Project, ProjectTechTag, TechTag,
+)
+from home.validators import validate_profile_image
+
+ROW_COUNTS = (10, 100, 1000, 10000)
+PAGE_SIZES = (10, 100, 1000)
+TECH = ['Django', 'React', 'PostgreSQL', 'Docker', 'Redis', 'Celery', 'TypeScript', 'Pillow']
+
+benchmarks = []
+
+
+def bench(name, setup=None):
+    """Register `func(state)` as benchmark `name`; `setup()` builds its state untimed."""
+    def decorator(func):
+        benchmarks.append((name, setup, func))
+        return func
+    return decorator
+
+
+# ============================================================
+# INPUT IMAGES
+# ============================================================
+
+def photo(width, height):
+    """A noisy RGB JPEG, which compresses about as badly as a real photo."""
+    img = Image.effect_noise((width, height), 48).convert('RGB')
+    return _save(img, 'JPEG', quality=92)
+
+
+def rgba_png(width, height):
+    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    for i in range(0, width, 40):
+        draw.ellipse((i, i % height, i + 120, (i % height) + 120), fill=(i % 255, 90, 200, 160))
+    return _save(img, 'PNG')
+
+
+def palette_png(width, height):
+    return _save(Image.effect_noise((width, height), 64).convert('RGB').quantize(64), 'PNG')
+
+
+def screenshot_png(width, height):
+    """Flat panels and lines of 'text', like a large UI screenshot."""
+    img = Image.new('RGB', (width, height), (246, 247, 249))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((0, 0, width, 64), fill=(32, 33, 36))
+    draw.rectangle((0, 64, 280, height), fill=(232, 234, 237))
+    for y in range(96, height - 24, 28):
+        draw.text((320, y), 'def optimize_image(image_file, max_width=1200):  # ' * 3, fill=(60, 64, 67))
+    return _save(img, 'PNG')
+
+
+def _save(img, format, **options):
+    buffer = BytesIO()
+    img.save(buffer, format=format, **options)
+    return buffer.getvalue()
+
+
+IMAGES = {
+    'jpeg-640x480': lambda: photo(640, 480),
+    'jpeg-1920x1080': lambda: photo(1920, 1080),
+    'jpeg-4000x3000': lambda: photo(4000, 3000),
+    'rgba-png-1200x1200': lambda: rgba_png(1200, 1200),
+    'p-png-800x600': lambda: palette_png(800, 600),
+    'screenshot-png-2880x1800': lambda: screenshot_png(2880, 1800),
+}
+
+UPLOADS = {
+    'jpeg-1920x1080': ('photo.jpg', IMAGES['jpeg-1920x1080']),
+    'png-1200x1200': ('avatar.png', IMAGES['rgba-png-1200x1200']),
+    'webp-800x800': ('avatar.webp', lambda: _save(Image.effect_noise((800, 800), 48).convert('RGB'), 'WEBP')),
+    'gif-400x400': ('avatar.gif', lambda: _save(Image.effect_noise((400, 400), 48).convert('P'), 'GIF')),
+}
+
+
+for label, make in IMAGES.items():
+    bench(f'image.optimize_image[{label}]', make)(lambda data: optimize_image(BytesIO(data)))
+    bench(f'image.compress_profile[{label}]', make)(
+        lambda data: compress_and_optimize_profile_image(BytesIO(data), 'photo.jpg')
+    )
+
+for label, (filename, make) in UPLOADS.items():
+    # A new upload object per call: the header parse is memoized on the file
+    bench(f'validate.profile_image[{label}]', make)(
+        lambda data, filename=filename: validate_profile_image(SimpleUploadedFile(filename, data))
+    )
+
+
+# ============================================================
+# METRICS
+# ============================================================
+
+@bench('metrics.observe')
+def _(state):
+    # What MetricsMiddleware records for each request
+    metrics.REQUEST_DURATION.observe(0.012, '/blog/<slug:slug>/', 'GET')
+    metrics.RESPONSES.inc('/blog/<slug:slug>/', 'GET', '200')
+    metrics.REQUEST_SQL.observe(0.002, '/blog/<slug:slug>/')
+    metrics.REQUEST_QUERIES.inc('/blog/<slug:slug>/', amount=2)
+
+
+def _scrape_values():
+    for i in range(200):
+        metrics.REQUEST_DURATION.observe(0.012, f'/route-{i}/', 'GET')
+        metrics.RESPONSES.inc(f'/route-{i}/', 'GET', '200')
+    return metrics.collect()
+
+
+bench('metrics.render', _scrape_values)(lambda values: metrics.render(values))
+
+
+# ============================================================
+# SERIALIZERS
+# ============================================================
+
+def seed(rows):
+    """Bulk-load `rows` of every content model, bypassing per-row save() work."""
+    Profile.objects.create()
+    content = '## Notes\n\nSome *Markdown* with `code` and a [link](https://example.com).\n\n' * 20
+    html = render_markdown(content)
+    text = html_to_text(html)
+    Blog.objects.bulk_create(
+        Blog(title=f'Post {i}', slug=f'post-{i}', content=content, content_html=html,
+             excerpt=summarize(text), reading_time=reading_time(text), is_published=True)
+        for i in range(rows)
+    )
+    projects = Project.objects.bulk_create(
+        Project(title=f'Project {i}', description='A project. ' * 20, order=i,
+                tech_stack=', '.join(TECH[i % 8:] + TECH[:i % 8])[:60])
+        for i in range(rows)
+    )
+    tags = TechTag.objects.bulk_create(TechTag(name=name, normalized_name=name.lower()) for name in TECH)
+    if connection.features.can_return_rows_from_bulk_insert is False:
+        projects, tags = list(Project.objects.order_by('id')), list(TechTag.objects.order_by('id'))
+    ProjectTechTag.objects.bulk_create(
+        ProjectTechTag(project=project, tag=tags[(i + n) % len(tags)], position=n)
+        for i, project in enumerate(projects) for n in range(3)
+    )
+    Experience.objects.bulk_create(
+        Experience(organization=f'Org {i}', role='Engineer', duration='2020 - 2024',
+                   description='Built things. ' * 10, order=i)
+        for i in range(rows)
+    )
+    Education.objects.bulk_create(
+        Education(institution=f'School {i}', degree='BSc', duration='2016 - 2020',
+                  description='Studied. ' * 10, order=i)
+        for i in range(rows)
+    )
+    ContactMessage.objects.bulk_create(
+        ContactMessage(name=f'Visitor {i}', email=f'visitor{i}@example.com', message='Hello! ' * 30)
+        for i in range(rows)
+    )
+
+
+def request():
+    return RequestFactory().get('/', HTTP_HOST='localhost')
+
+
+def register_serializer_benchmarks(counts):
+    querysets = {
+        'ProfileSerializer': lambda: Profile.objects.all(),
+        'ProjectSerializer': lambda: Project.objects.prefetch_related('tech_links__tag'),
+        'ExperienceSerializer': lambda: Experience.objects.all(),
+        'BlogSerializer': lambda: Blog.objects.all(),
+        'ContactMessageSerializer': lambda: ContactMessage.objects.all(),
+        'EducationSerializer': lambda: Education.objects.all(),
+        'SearchResultSerializer': None,
+    }
+    for name, queryset in querysets.items():
+        serializer_class = getattr(serializers, name)
+        for count in counts:
+            if name == 'ProfileSerializer' and count > 10:
+                continue  # There is only ever one profile
+
+            def setup(queryset=queryset, count=count):
+                if queryset is None:
+                    return [
+                        {'kind': 'blog', 'id': i, 'title': f'Post {i}', 'excerpt': 'Text ' * 40,
+                         'rank': 1.0 / (i + 1), 'url': f'/blog/post-{i}/'}
+                        for i in range(count)
+                    ]
+                return list(queryset()[:count])
+
+            bench(f'serializer.{name}[{count}]', setup)(
+                lambda rows, cls=serializer_class: cls(rows, many=True, context={'request': request()}).data
+            )
+
+
+# ============================================================
+# TEMPLATES
+# ============================================================
+
+def register_template_benchmarks(sizes):
+    for size in sizes:
+        def setup(size=size):
+            return {
+                'form': ContactForm(),
+                'profile': Profile.objects.first(),
+                'educations': list(Education.objects.all()[:size]),
+                'experiences': list(Experience.objects.all()[:size]),
+                'projects': list(Project.objects.prefetch_related('image_variants', 'tech_links__tag')[:size]),
+                'blogs': list(Blog.objects.filter(is_published=True)
+                              .only('title', 'slug', 'excerpt', 'reading_time', 'created_at')[:size]),
+            }
+
+        bench(f'template.home[{size}]', setup)(
+            lambda context: render_to_string('main/home.html', context, request=request())
+        )
+
+
+# ============================================================
+# RUNNER
+# ============================================================
+
+def measure(func, state, rounds, min_round_time=0.05):
+    """Time `func(state)`; returns per-call statistics in milliseconds."""
+    started = time.perf_counter()
+    func(state)  # Also warms caches and lazily imported code
+    single = time.perf_counter() - started
+    loops = max(1, int(min_round_time / single)) if single > 0 else 1000
+
+    times = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func(state)
+        times.append((time.perf_counter() - started) / loops * 1000)
+    return {
+        'median_ms': round(statistics.median(times), 4),
+        'min_ms': round(min(times), 4),
+        'stdev_ms': round(statistics.stdev(times), 4) if len(times) > 1 else 0.0,
+        'rounds': rounds,
+        'loops': loops,
+    }
+
+
+def compare(results, previous, tolerance):
+    """Print each benchmark's change against `previous`; returns the names that regressed."""
+    print(f'\n{"vs previous":<52}{"median":>12}{"change":>9}')
+    regressions = []
+    for name, current in results['benchmarks'].items():
+        before = previous['benchmarks'].get(name)
+        if before is None:
+            print(f'{name:<52}{current["median_ms"]:>12.3f}{"new":>9}')
+            continue
+        change = current['median_ms'] / before['median_ms'] - 1 if before['median_ms'] else 0.0
+        regressed = change > tolerance
+        print(f'{name:<52}{current["median_ms"]:>12.3f}{change:>+9.0%}{"  REGRESSED" if regressed else ""}')
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Diff against this earlier --output file')
+    parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--quick', action='store_true', help='Skip the 10,000-row and largest cases')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed slowdown, as a fraction')
+    args = parser.parse_args()
+
+    counts = [c for c in ROW_COUNTS if not args.quick or c <= 1000]
+    register_serializer_benchmarks(counts)
+    register_template_benchmarks([s for s in PAGE_SIZES if not args.quick or s <= 100])
+    selected = [b for b in benchmarks if args.filter in b[0]]
+    if args.quick:
+        selected = [b for b in selected if '4000x3000' not in b[0]]
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        if any(name.startswith(('serializer.', 'template.')) for name, _, _ in selected):
+            seed(max(counts))
+        results = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'pillow': PIL.__version__,
+                'database': connection.vendor,
+                'machine': platform.node(),
+                'rounds': args.rounds,
+            },
+            'benchmarks': {},
+        }
+        print(f'{"benchmark":<52}{"median ms":>12}{"min ms":>12}{"stdev":>10}')
+        for name, setup, func in selected:
+            state = setup() if setup else None
+            stats = results['benchmarks'][name] = measure(func, state, args.rounds)
+            print(f'{name:<52}{stats["median_ms"]:>12.3f}{stats["min_ms"]:>12.3f}{stats["stdev_ms"]:>10.3f}')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nResults written to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f'\n{len(regressions)} benchmark(s) slower by more than {args.tolerance:.0%}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()